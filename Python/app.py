@@ -1,41 +1,393 @@
+import argparse
 import sys
-from compiler import Compiler, Interpreter
+from typing import Callable, TypeVar
+from compiler.optimizer import OPTIMIZATION_LEVELS
+from compiler.options import ENGINE_NAMES, REQUEST_ACTIONS, SERVER_SOCKET_PATH, WATCH_POLL_SECONDS
+from compiler.output_sink import FLUSH_AUTO, FLUSH_POLICIES
+from compiler.stats import PhaseStats
 
+PROFILE_TOP_COUNT = 25
 
-def invalid_args_error():
-    print(
-        "Invalid args.",
-        "Compiler example: py app.py compile 'path/to/input' 'path/to/output'",
-        "Interpreter example: py app.py run 'path/to/input'",
+T = TypeVar("T")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="app.py",
+        epilog=(
+            "Compiler example: py app.py compile 'path/to/input' 'path/to/output'\n"
+            "Batch compiler example: py app.py compile-many 'path/to/inputs' 'path/to/outputs'\n"
+            "Check example: py app.py check 'path/to/inputs' 'path/to/other.x'\n"
+            "Interpreter example: py app.py run 'path/to/input'\n"
+            "Build example: py app.py build 'path/to/input.x' -o 'path/to/input.xc', then py app.py run 'path/to/input.xc'\n"
+            "Batch run example: py app.py run-batch 'path/to/input' --rows 'path/to/rows.csv' -o 'path/to/outputs.csv'\n"
+            "Watch example: py app.py watch 'path/to/input' 'path/to/output'\n"
+            "Server example: py app.py serve, then py app.py client compile 'path/to/input' -o 'path/to/output'"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    actions = parser.add_subparsers(dest="action", metavar="action")
+
+    optimization_parser = argparse.ArgumentParser(add_help=False)
+    optimization_parser.add_argument(
+        "-O",
+        dest="optimization_level",
+        type=int,
+        choices=OPTIMIZATION_LEVELS,
+        default=0,
+        help="optimization level: 0 none, 1 constant folding, 2 adds copy propagation and dead-store elimination",
+    )
+
+    lexer_parser = argparse.ArgumentParser(add_help=False)
+    lexer_parser.add_argument(
+        "--lex-workers",
+        type=int,
+        default=1,
+        help="processes lexing the source in line-aligned blocks, for very large files (default: 1, in this process)",
+    )
+
+    instrumentation_parser = argparse.ArgumentParser(add_help=False)
+    instrumentation_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="report per-phase times and counters as JSON, to stderr unless --stats-output is given",
+    )
+    instrumentation_parser.add_argument("--stats-output", metavar="PATH", help="write the --stats JSON to PATH")
+    instrumentation_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="run under cProfile and print the top functions to stderr, unless --profile-output is given",
+    )
+    instrumentation_parser.add_argument("--profile-output", metavar="PATH", help="dump the --profile data to PATH")
+
+    compile_parser = actions.add_parser(
+        "compile",
+        parents=[optimization_parser, lexer_parser, instrumentation_parser],
+        help="compile a .x file to C++",
+    )
+    compile_parser.add_argument("input", help="path/to/input")
+    compile_parser.add_argument("output", help="path/to/output")
+    compile_parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="always compile, without reading or filling the compilation cache",
+    )
+
+    compile_many_parser = actions.add_parser(
+        "compile-many",
+        parents=[optimization_parser],
+        help="compile every .x file of a directory or glob to C++ in parallel",
+    )
+    compile_many_parser.add_argument("input", help="path/to/inputs directory or glob such as 'src/**/*.x'")
+    compile_many_parser.add_argument("output", help="path/to/outputs directory")
+    compile_many_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes (default: CPU count, 1 compiles in this process)",
+    )
+    compile_many_parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="files handed to a worker at once (default: a few chunks per worker)",
+    )
+
+    check_parser = actions.add_parser(
+        "check",
+        help="check .x files without generating code and report every error as JSON",
+    )
+    check_parser.add_argument("input", nargs="+", help="files, directories or globs such as 'src/**/*.x'")
+    check_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes (default: CPU count, 1 checks in this process)",
+    )
+    check_parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="files handed to a worker at once (default: a few chunks per worker)",
     )
+    check_parser.add_argument("-o", "--output", metavar="PATH", help="write the JSON report to PATH instead of stdout")
+
+    watch_parser = actions.add_parser("watch", help="recompile a .x file to C++ incrementally whenever it changes")
+    watch_parser.add_argument("input", help="path/to/input")
+    watch_parser.add_argument("output", help="path/to/output")
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        default=WATCH_POLL_SECONDS,
+        help=f"seconds between checks of the input's mtime and size (default: {WATCH_POLL_SECONDS})",
+    )
+
+    artifact_parser = actions.add_parser(
+        "build",
+        parents=[optimization_parser, lexer_parser, instrumentation_parser],
+        help="save a resolved .x program as a .xc artifact that `run` loads without parsing",
+    )
+    artifact_parser.add_argument("input", help="path/to/input")
+    artifact_parser.add_argument("-o", "--output", help="path/to/output.xc (default: the input with a .xc suffix)")
+
+    run_parser = actions.add_parser(
+        "run",
+        parents=[optimization_parser, lexer_parser, instrumentation_parser],
+        help="interpret a .x file",
+    )
+    run_parser.add_argument("input", help="path/to/input, a .x program or a .xc artifact")
+    run_parser.add_argument(
+        "--engine",
+        choices=ENGINE_NAMES,
+        default="tree",
+        help=(
+            "tree: closures per statement, vm: register bytecode machine, "
+            "pyjit: the program compiled into one Python function (default: tree)"
+        ),
+    )
+    run_parser.add_argument(
+        "--input",
+        dest="number_input",
+        metavar="PATH",
+        help="numbers for `in`, one per line, without prompts; `-` for stdin. "
+        "Without it a terminal is prompted and piped stdin is read the same way",
+    )
+    run_parser.add_argument(
+        "--flush",
+        dest="flush_policy",
+        choices=FLUSH_POLICIES,
+        default=FLUSH_AUTO,
+        help="when `out` lines are written: every line, in blocks, or auto: every line on a terminal (default: auto)",
+    )
+    run_parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="pyjit: always compile the Python function, without reading or filling the compilation cache",
+    )
+
+    batch_parser = actions.add_parser(
+        "run-batch",
+        parents=[optimization_parser, lexer_parser, instrumentation_parser],
+        help="run a .x file over every row of a CSV or .npy table at once, vectorized with numpy",
+    )
+    batch_parser.add_argument("input", help="path/to/input, a .x program or a .xc artifact")
+    batch_parser.add_argument(
+        "--rows",
+        required=True,
+        metavar="PATH",
+        help="CSV or .npy table, one row per run: the n-th `in` reads the n-th column",
+    )
+    batch_parser.add_argument(
+        "-o",
+        "--output",
+        help="CSV or .npy table with a column per `out` and a row per input row, CSV on stdout without it",
+    )
+
+    socket_parser = argparse.ArgumentParser(add_help=False)
+    socket_parser.add_argument(
+        "--socket",
+        default=SERVER_SOCKET_PATH,
+        help=f"Unix socket of the server (default: {SERVER_SOCKET_PATH})",
+    )
+
+    actions.add_parser(
+        "serve",
+        parents=[socket_parser],
+        help="keep a compiler process warm and answer compile/check/run requests on a Unix socket",
+    )
+
+    client_parser = actions.add_parser(
+        "client",
+        parents=[optimization_parser, socket_parser],
+        help="send one request to a running `serve`",
+    )
+    client_parser.add_argument("request_action", metavar="request", choices=REQUEST_ACTIONS, help="compile, check or run")
+    client_parser.add_argument("input", help="path/to/input")
+    client_parser.add_argument("-o", "--output", help="where compile saves the C++, stdout without it")
+    client_parser.add_argument("--input", dest="number_input", metavar="PATH", help="numbers for `in` when running")
+    client_parser.add_argument("--engine", choices=ENGINE_NAMES, default="tree", help="engine when running")
+
+    return parser
+
+
+def run_profiled(profile_path: str | None, function: Callable[[], T]) -> T:
+    # Imported here, only --profile needs them
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function)
+    finally:
+        if profile_path:
+            profiler.dump_stats(profile_path)
+        else:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_COUNT)
+
+
+# The engine class of `run`, imported only by the runs that use it
+def load_engine(engine_name: str) -> type:
+    if engine_name == "pyjit":
+        from compiler.pyjit import PythonJit
+
+        return PythonJit
+    elif engine_name == "vm":
+        from compiler.vm import VirtualMachine
+
+        return VirtualMachine
+    from compiler.interpreter import Interpreter
+
+    return Interpreter
 
 
 def main():
-    args = sys.argv[1:]
-    if not args:
-        return invalid_args_error()
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if getattr(args, "profile", False) or getattr(args, "profile_output", None):
+        return run_profiled(args.profile_output, lambda: run_action(parser, args))
+    return run_action(parser, args)
+
 
-    action = args[0]
+def run_action(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    is_stats_enabled = getattr(args, "stats", False) or getattr(args, "stats_output", None)
+    stats = PhaseStats() if is_stats_enabled else None
+    # Errors of the program that compile, build, run or run-batch reported
+    errors = []
 
-    if action == "compile":
-        if len(args) != 3:
-            return invalid_args_error()
+    # Each action imports its modules here, so a command pays only for what it runs
+    if args.action == "compile" and args.use_cache:
+        from compiler.cache import CompilationCache, compile_cached
 
-        compiler = Compiler(args[1], args[2])
+        errors = compile_cached(
+            args.input,
+            args.output,
+            CompilationCache(),
+            optimization_level=args.optimization_level,
+            lex_workers=args.lex_workers,
+            stats=stats,
+        )
 
+    elif args.action == "compile":
+        from compiler.compiler import Compiler
+
+        compiler = Compiler(
+            args.input,
+            args.output,
+            optimization_level=args.optimization_level,
+            lex_workers=args.lex_workers,
+            stats=stats,
+        )
         compiler.start()
+        errors = compiler.errors
+
+    elif args.action == "compile-many":
+        from compiler.batch import compile_many
+
+        report = compile_many(
+            args.input,
+            args.output,
+            workers=args.workers,
+            chunksize=args.chunksize,
+            optimization_level=args.optimization_level,
+        )
+        for line in report.lines():
+            print(line)
+        if report.failed_results:
+            return 1
+
+    elif args.action == "check":
+        from compiler.batch import check_many
+
+        report = check_many(args.input, workers=args.workers, chunksize=args.chunksize)
+        report.write_json(args.output)
+        print(report.summary_line(), file=sys.stderr)
+        if report.failed_results:
+            return 1
+
+    elif args.action == "build":
+        from compiler.builder import build_artifact
+
+        errors = build_artifact(
+            args.input,
+            args.output,
+            optimization_level=args.optimization_level,
+            lex_workers=args.lex_workers,
+            stats=stats,
+        )
+
+    elif args.action == "run-batch":
+        # Imported here, numpy would slow down the start of every other action
+        from compiler.vectorized import NUMPY_AVAILABLE, VectorizedRunner
 
-    elif action == "run":
-        if len(args) != 2:
-            return invalid_args_error()
+        if not NUMPY_AVAILABLE:
+            print("[!] run-batch needs numpy: pip install numpy", file=sys.stderr)
+            return 1
+        runner = VectorizedRunner(
+            args.input,
+            args.rows,
+            args.output,
+            optimization_level=args.optimization_level,
+            lex_workers=args.lex_workers,
+            stats=stats,
+        )
+        runner.start()
+        errors = runner.errors
 
-        interpreter = Interpreter(args[1])
+    elif args.action == "watch":
+        from compiler.watch import watch
+
+        watch(args.input, args.output, poll_seconds=args.interval)
+
+    elif args.action == "serve":
+        from compiler.server import serve
+
+        serve(args.socket)
+
+    elif args.action == "client":
+        from compiler.server import client
+
+        return client(
+            args.request_action,
+            args.input,
+            args.output,
+            socket_path=args.socket,
+            number_input_path=args.number_input,
+            engine=args.engine,
+            optimization_level=args.optimization_level,
+        )
+
+    elif args.action == "run":
+        # Only the pyjit engine has something worth caching: the compiled Python function
+        engine_options = {}
+        if args.engine == "pyjit" and args.use_cache:
+            from compiler.cache import CompilationCache
+
+            engine_options["cache"] = CompilationCache()
+        interpreter = load_engine(args.engine)(
+            args.input,
+            optimization_level=args.optimization_level,
+            lex_workers=args.lex_workers,
+            stats=stats,
+            number_input=args.number_input,
+            output_sink=args.flush_policy,
+            **engine_options,
+        )
         interpreter.start()
+        errors = interpreter.errors
 
     else:
-        print("Invalid action.valid actions are: `run`,`compile`")
-        pass
+        parser.print_help()
+
+    if stats:
+        stats.write_json(args.stats_output)
+    # Any error of the program, a missing number among them, fails the action as a failed file fails `check`
+    return 1 if errors else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
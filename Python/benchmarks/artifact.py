@@ -0,0 +1,67 @@
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+from compiler.builder import build_artifact
+from compiler.stats import PhaseStats
+
+from .generator import ProgramGenerator, ProgramOptionsDetail
+from .memory import ProgramCollector
+
+FRONT_END_PHASES = ("read", "lex", "parse", "resolve", "optimize")
+
+
+def load_program(program_path: str, optimization_level: int = 0) -> tuple[float, dict]:
+    # Wall time until the backend has every instruction, and the phases it was spent in
+    stats = PhaseStats()
+    collector = ProgramCollector(program_path, optimization_level, quiet=True, stats=stats)
+    # The collector keeps every instruction alive, cyclic GC passes over them would swamp the timing
+    gc.disable()
+    try:
+        started_at = time.perf_counter()
+        collector.start()
+        elapsed = time.perf_counter() - started_at
+    finally:
+        gc.enable()
+    return elapsed, stats.phase_seconds
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.artifact",
+        description="time loading a built `.xc` artifact against parsing its source",
+    )
+    parser.add_argument("--lines", type=int, default=100_000, help="lines of the generated program")
+    parser.add_argument("--expression-length", type=int, default=8, help="max operands per expression")
+    parser.add_argument("-O", dest="optimization_level", type=int, choices=(0, 1, 2), default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest is reported")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    options = ProgramOptionsDetail(line_count=args.lines, expression_length=args.expression_length)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        program_path = os.path.join(temp_dir, "artifact.x")
+        artifact_path = os.path.join(temp_dir, "artifact.xc")
+        with open(program_path, "w", encoding="utf-8") as program_file:
+            ProgramGenerator(options).write(program_file)
+
+        build_artifact(program_path, artifact_path, optimization_level=args.optimization_level)
+        print(f"source      : {os.path.getsize(program_path):12,} bytes")
+        print(f"artifact    : {os.path.getsize(artifact_path):12,} bytes")
+
+        parse_seconds, parse_phases = min(load_program(program_path, args.optimization_level) for _ in range(args.repeat))
+        load_seconds, load_phases = min(load_program(artifact_path) for _ in range(args.repeat))
+        front_end = ", ".join(
+            f"{phase} {parse_phases[phase]:.3f}s" for phase in FRONT_END_PHASES if phase in parse_phases
+        )
+        print(f"parse source: {parse_seconds:.3f}s ({front_end})")
+        print(f"load .xc    : {load_seconds:.3f}s (load {load_phases['load']:.3f}s)")
+        print(f"speedup     : {parse_seconds / load_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+
+from compiler.batch import check_many, compile_many
+
+from .compile_many import write_corpus
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    lines_per_file = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    worker_counts = [1, 2, 4, 8]
+    worker_counts = [workers for workers in worker_counts if workers <= max(os.cpu_count() or 1, 2)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_dir = os.path.join(temp_dir, "corpus")
+        os.makedirs(corpus_dir)
+        write_corpus(corpus_dir, file_count, lines_per_file)
+
+        print(f"corpus: {file_count} files x {lines_per_file} lines, {os.cpu_count()} CPUs")
+        for workers in worker_counts:
+            check_report = check_many([corpus_dir], workers=workers)
+            compile_report = compile_many(corpus_dir, os.path.join(temp_dir, f"out_{workers}"), workers=workers)
+            print(
+                f"workers={workers}: check {check_report.files_per_second:,.1f} files/sec, "
+                f"compile-many {compile_report.files_per_second:,.1f} files/sec, "
+                f"failed {len(check_report.failed_results)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+from compiler.batch import compile_many
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "Example")
+EXAMPLE_PROGRAMS = ("1-declare_variables.x", "2-io.x")
+
+
+def write_corpus(corpus_dir: str, file_count: int, lines_per_file: int) -> None:
+    programs = []
+    for example_name in EXAMPLE_PROGRAMS:
+        with open(os.path.join(EXAMPLE_DIR, example_name), "r") as example_file:
+            programs.append([line.strip() for line in example_file if line.strip()])
+
+    for index in range(file_count):
+        statements = programs[index % len(programs)]
+        with open(os.path.join(corpus_dir, f"program_{index}.x"), "w", encoding="utf-8") as program_file:
+            for line_index in range(lines_per_file):
+                program_file.write(statements[line_index % len(statements)])
+                program_file.write("\n")
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lines_per_file = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    worker_counts = [1, 2, 4, 8]
+    worker_counts = [workers for workers in worker_counts if workers <= max(os.cpu_count() or 1, 2)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_dir = os.path.join(temp_dir, "corpus")
+        os.makedirs(corpus_dir)
+        write_corpus(corpus_dir, file_count, lines_per_file)
+
+        print(f"corpus: {file_count} files x {lines_per_file} lines, {os.cpu_count()} CPUs")
+        baseline_elapsed = None
+        for workers in worker_counts:
+            report = compile_many(corpus_dir, os.path.join(temp_dir, f"out_{workers}"), workers=workers)
+            baseline_elapsed = baseline_elapsed or report.elapsed_seconds
+            print(
+                f"workers={workers}: {report.elapsed_seconds:.3f}s -> {report.files_per_second:,.1f} files/sec, "
+                f"speedup x{baseline_elapsed / report.elapsed_seconds:.2f}, failed {len(report.failed_results)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
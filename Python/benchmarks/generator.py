@@ -0,0 +1,176 @@
+import argparse
+import random
+import sys
+from typing import Iterator, TextIO
+
+INT_TYPE = "int"
+FLOAT_TYPE = "float"
+STRING_TYPE = "string"
+VALUE_TYPES = (INT_TYPE, FLOAT_TYPE, STRING_TYPE)
+STRING_WORDS = ("Hi", "o", "n", "abc", "x_y", "42")
+
+
+class ProgramOptionsDetail:
+    __slots__ = (
+        "line_count",
+        "expression_length",
+        "variable_count",
+        "type_weights",
+        "input_density",
+        "output_density",
+        "seed",
+    )
+
+    line_count: int
+    expression_length: int
+    variable_count: int
+    type_weights: tuple[float, float, float]
+    input_density: float
+    output_density: float
+    seed: int
+
+    def __init__(
+        self,
+        line_count: int = 10_000,
+        expression_length: int = 4,
+        variable_count: int = 50,
+        type_weights: tuple[float, float, float] = (0.6, 0.2, 0.2),
+        input_density: float = 0.0,
+        output_density: float = 0.2,
+        seed: int = 0,
+    ) -> None:
+        self.line_count = line_count
+        # Operands per expression
+        self.expression_length = expression_length
+        self.variable_count = variable_count
+        # Weights of int, float and string among variables and expressions
+        self.type_weights = type_weights
+        # Share of the lines that are `in` and `out` statements
+        self.input_density = input_density
+        self.output_density = output_density
+        self.seed = seed
+
+    def as_dict(self) -> dict:
+        # JSON ready, so it compares equal to a report read back from disk
+        program_options = {name: getattr(self, name) for name in self.__slots__}
+        program_options["type_weights"] = list(self.type_weights)
+        return program_options
+
+
+# Emits only valid programs: every variable is declared before it is read, keeps one type, `in` only
+# targets int variables and strings never meet '-'. Numeric stores read at most one variable and string
+# stores none, so values grow linearly at worst and a long program stays cheap to run; `out` expressions
+# mix variables freely.
+class ProgramGenerator:
+
+    def __init__(self, options: ProgramOptionsDetail) -> None:
+        self.options = options
+        self.input_count = 0
+        self.__random = random.Random(options.seed)
+        self.__variables: dict[str, list[str]] = {value_type: [] for value_type in VALUE_TYPES}
+        self.__variable_types: list[str] = self.__random.choices(
+            VALUE_TYPES,
+            weights=options.type_weights,
+            k=max(options.variable_count, 1),
+        )
+
+    def lines(self) -> Iterator[str]:
+        for index in range(self.options.line_count):
+            if index < len(self.__variable_types):
+                yield self.__declaration(index)
+                continue
+
+            roll = self.__random.random()
+            if roll < self.options.input_density and self.__variables[INT_TYPE]:
+                self.input_count += 1
+                yield f"in {self.__random.choice(self.__variables[INT_TYPE])}"
+            elif roll < self.options.input_density + self.options.output_density:
+                yield f"out {self.__expression(self.__random_type(), max_variable_count=None)}"
+            else:
+                value_type = self.__random_type()
+                variable_name = self.__random.choice(self.__variables[value_type])
+                max_variable_count = 0 if value_type == STRING_TYPE else 1
+                yield f"{variable_name} = {self.__expression(value_type, max_variable_count)}"
+
+    def write(self, output_file: TextIO) -> None:
+        for line in self.lines():
+            output_file.write(line)
+            output_file.write("\n")
+
+    def __random_type(self) -> str:
+        # Only types that already have a declared variable
+        declared_types = [value_type for value_type in VALUE_TYPES if self.__variables[value_type]]
+        weights = [self.options.type_weights[VALUE_TYPES.index(value_type)] for value_type in declared_types]
+        return self.__random.choices(declared_types, weights=weights)[0]
+
+    def __declaration(self, index: int) -> str:
+        value_type = self.__variable_types[index]
+        variable_name = f"{value_type[0]}{index}"
+        expression = self.__expression(value_type, max_variable_count=0)
+        self.__variables[value_type].append(variable_name)
+        return f"{variable_name} = {expression}"
+
+    def __expression(self, value_type: str, max_variable_count: int | None) -> str:
+        operand_count = self.__random.randint(1, max(self.options.expression_length, 1))
+        variable_count = 0
+        words: list[str] = []
+        for operand_index in range(operand_count):
+            if operand_index:
+                is_addition = value_type == STRING_TYPE or self.__random.random() < 0.5
+                words.append("+" if is_addition else "-")
+
+            if (max_variable_count is None or variable_count < max_variable_count) and self.__random.random() < 0.5:
+                variable_count += 1
+                words.append(self.__random.choice(self.__variables[value_type]))
+            else:
+                words.append(self.__const(value_type))
+        return " ".join(words)
+
+    def __const(self, value_type: str) -> str:
+        if value_type == INT_TYPE:
+            return str(self.__random.randint(0, 999))
+        elif value_type == FLOAT_TYPE:
+            return f"{self.__random.randint(0, 99)}.{self.__random.randint(1, 9)}"
+        return f'"{self.__random.choice(STRING_WORDS)}"'
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.generator", description="write a random valid .x program")
+    add_program_arguments(parser)
+    return parser
+
+
+def add_program_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = ProgramOptionsDetail()
+    parser.add_argument("--lines", type=int, default=defaults.line_count, help="line count")
+    parser.add_argument("--expression-length", type=int, default=defaults.expression_length, help="max operands")
+    parser.add_argument("--variables", type=int, default=defaults.variable_count, help="variable count")
+    parser.add_argument(
+        "--mix",
+        default=",".join(str(weight) for weight in defaults.type_weights),
+        help="int,float,string weights",
+    )
+    parser.add_argument("--in-density", type=float, default=defaults.input_density, help="share of `in` lines")
+    parser.add_argument("--out-density", type=float, default=defaults.output_density, help="share of `out` lines")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="random seed")
+
+
+def program_options(args: argparse.Namespace) -> ProgramOptionsDetail:
+    return ProgramOptionsDetail(
+        line_count=args.lines,
+        expression_length=args.expression_length,
+        variable_count=args.variables,
+        type_weights=tuple(float(weight) for weight in args.mix.split(",")),
+        input_density=args.in_density,
+        output_density=args.out_density,
+        seed=args.seed,
+    )
+
+
+def main():
+    args = build_parser().parse_args()
+    ProgramGenerator(program_options(args)).write(sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import Callable
+
+from compiler import Compiler, Interpreter
+from compiler.lexer import lex_blocks
+from compiler.source import FileSource
+
+from .generator import ProgramGenerator, add_program_arguments, program_options
+from .memory import ProgramCollector
+
+# Phases timed on their own; `compile` and `interpret` are end to end, the rest are their front-end parts
+PHASES = ("read", "lex", "front_end", "compile", "interpret")
+DEFAULT_THRESHOLD = 0.10
+INPUT_VALUE = "3\n"
+
+
+def run_read(program_path: str, output_dir: str, input_count: int) -> None:
+    source = FileSource(program_path)
+    try:
+        for _ in source.read_blocks():
+            pass
+    finally:
+        source.close()
+
+
+def run_lex(program_path: str, output_dir: str, input_count: int) -> None:
+    source = FileSource(program_path)
+    try:
+        for _ in lex_blocks(source.read_blocks()):
+            pass
+    finally:
+        source.close()
+
+
+def run_front_end(program_path: str, output_dir: str, input_count: int) -> None:
+    ProgramCollector(program_path).start()
+
+
+def run_compile(program_path: str, output_dir: str, input_count: int) -> None:
+    Compiler(program_path, os.path.join(output_dir, "program.cpp")).start()
+
+
+def run_interpret(program_path: str, output_dir: str, input_count: int) -> None:
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(INPUT_VALUE * input_count)
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            Interpreter(program_path).start()
+    finally:
+        sys.stdin = stdin
+
+
+PHASE_RUNNERS: dict[str, Callable[[str, str, int], None]] = {
+    "read": run_read,
+    "lex": run_lex,
+    "front_end": run_front_end,
+    "compile": run_compile,
+    "interpret": run_interpret,
+}
+
+
+def _measure_in_child(phase: str, program_path: str, output_dir: str, input_count: int, connection) -> None:
+    started_at = time.perf_counter()
+    PHASE_RUNNERS[phase](program_path, output_dir, input_count)
+    elapsed = time.perf_counter() - started_at
+    connection.send((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+    connection.close()
+
+
+def measure(phase: str, program_path: str, output_dir: str, input_count: int) -> tuple[float, int]:
+    # Every run gets a fresh process, so peak RSS belongs to that phase alone and runs don't warm each other
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_in_child, args=(phase, program_path, output_dir, input_count, sender))
+    process.start()
+    sender.close()
+    try:
+        elapsed, peak_rss_kib = receiver.recv()
+    except EOFError:
+        raise RuntimeError(f"phase '{phase}' exited with code {process.exitcode}") from None
+    finally:
+        process.join()
+    return elapsed, peak_rss_kib
+
+
+def count_tokens(program_path: str) -> int:
+    source = FileSource(program_path)
+    try:
+        return sum(len(lexed_block.kinds) for lexed_block, _ in lex_blocks(source.read_blocks()))
+    finally:
+        source.close()
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    options = program_options(args)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        program_path = os.path.join(temp_dir, "program.x")
+        generator = ProgramGenerator(options)
+        with open(program_path, "w", encoding="utf-8") as program_file:
+            generator.write(program_file)
+
+        token_count = count_tokens(program_path)
+        results = {}
+        for phase in args.phases:
+            runs = [measure(phase, program_path, temp_dir, generator.input_count) for _ in range(args.repeat)]
+            elapsed = min(run[0] for run in runs)
+            results[phase] = {
+                "seconds": round(elapsed, 6),
+                "lines_per_second": round(options.line_count / elapsed, 1),
+                "tokens_per_second": round(token_count / elapsed, 1),
+                "peak_rss_kib": max(run[1] for run in runs),
+            }
+
+    return {
+        "program": {**options.as_dict(), "token_count": token_count, "input_count": generator.input_count},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    # A phase regresses when it got slower, or its peak memory grew, by more than `threshold`
+    regressions = []
+    for phase, result in report["results"].items():
+        baseline_result = baseline.get("results", {}).get(phase)
+        if not baseline_result:
+            continue
+
+        for metric in ("seconds", "peak_rss_kib"):
+            ratio = result[metric] / baseline_result[metric] - 1 if baseline_result[metric] else 0.0
+            if ratio > threshold:
+                regressions.append(
+                    f"{phase} {metric}: {baseline_result[metric]} -> {result[metric]} (+{ratio * 100:.1f}%)"
+                )
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.harness",
+        description="time Compiler and Interpreter on a generated program and report JSON",
+    )
+    add_program_arguments(parser)
+    parser.add_argument("--phases", nargs="+", choices=PHASES, default=list(PHASES), help="phases to time")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per phase, the fastest is reported")
+    parser.add_argument("--output", help="also write the JSON report to this file, e.g. to keep as a baseline")
+    parser.add_argument("--baseline", help="JSON report to compare against; exits with 1 on a regression")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"allowed slowdown or memory growth against the baseline (default: {DEFAULT_THRESHOLD})",
+    )
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    report = run_benchmark(args)
+
+    if args.baseline:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("program") != report["program"]:
+            print("[!] The baseline was measured on a different program", file=sys.stderr)
+        report["regressions"] = compare(report, baseline, args.threshold)
+
+    report_text = json.dumps(report, indent=2)
+    print(report_text)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report_text + "\n")
+
+    if report.get("regressions"):
+        for regression in report["regressions"]:
+            print(f"[!] Regression {regression}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
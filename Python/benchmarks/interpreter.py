@@ -0,0 +1,64 @@
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from compiler import Interpreter, VirtualMachine
+from compiler.pyjit import PythonJit
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "Example")
+EXAMPLE_PROGRAMS = ("1-declare_variables.x", "2-io.x")
+ENGINES = {"tree": Interpreter, "vm": VirtualMachine, "pyjit": PythonJit}
+
+
+def read_statements(example_name: str) -> list[str]:
+    with open(os.path.join(EXAMPLE_DIR, example_name), "r") as example_file:
+        return [line.strip() for line in example_file if line.strip()]
+
+
+def write_scaled_program(path: str, statements: list[str], line_count: int) -> None:
+    with open(path, "w", encoding="utf-8") as program_file:
+        for index in range(line_count):
+            program_file.write(statements[index % len(statements)])
+            program_file.write("\n")
+
+
+def run_example(example_name: str, line_count: int, engine: str = "tree") -> tuple[int, float]:
+    statements = read_statements(example_name)
+    input_count = sum(1 for statement in statements if statement.startswith("in ")) * (line_count // len(statements) + 1)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        program_path = os.path.join(temp_dir, example_name)
+        write_scaled_program(program_path, statements, line_count)
+
+        stdin = sys.stdin
+        sys.stdin = io.StringIO("3\n" * input_count)
+        try:
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                started_at = time.perf_counter()
+                ENGINES[engine](program_path).start()
+                elapsed = time.perf_counter() - started_at
+        finally:
+            sys.stdin = stdin
+
+    return line_count, elapsed
+
+
+def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    engines = sys.argv[2].split(",") if len(sys.argv) > 2 else list(ENGINES)
+
+    for example_name in EXAMPLE_PROGRAMS:
+        for engine in engines:
+            statement_count, elapsed = run_example(example_name, line_count, engine)
+            print(
+                f"{example_name} [{engine}]: {statement_count} statements in {elapsed:.3f}s "
+                f"-> {statement_count / elapsed:,.0f} statements/sec"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Iterator
+
+from compiler.core import Core
+
+from .tokenizer import write_program
+
+
+class ProgramCollector(Core):
+
+    def _handle(self, line_details: Iterator):
+        self.line_details = list(line_details)
+
+
+def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        program_path = os.path.join(temp_dir, "memory.x")
+        write_program(program_path, line_count)
+
+        baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        collector = ProgramCollector(program_path)
+        started_at = time.perf_counter()
+        collector.start()
+        elapsed = time.perf_counter() - started_at
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"lines: {line_count}")
+    print(f"line details kept: {len(collector.line_details)}")
+    print(f"seconds: {elapsed:.3f}")
+    print(f"peak RSS: {peak_rss / 1024:.1f} MiB (+{(peak_rss - baseline_rss) / 1024:.1f} MiB while parsing)")
+
+
+if __name__ == "__main__":
+    main()
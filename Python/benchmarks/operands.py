@@ -0,0 +1,111 @@
+import argparse
+import gc
+import io
+import os
+import sys
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+
+from compiler import Interpreter, VirtualMachine
+from compiler.ir import IRInstructionTypeEnum
+from compiler.stats import PhaseStats
+
+from .generator import ProgramGenerator, ProgramOptionsDetail
+from .memory import ProgramCollector
+
+ENGINES = {"tree": Interpreter, "vm": VirtualMachine}
+READ_COUNT = 1_000_000
+VARIABLE_NAME = "i7"
+
+
+# The value holder of the former string-keyed symbol table, kept here to compare the layouts
+class SymbolValueDetail:
+    __slots__ = ("variable_value",)
+
+    def __init__(self, variable_value) -> None:
+        self.variable_value = variable_value
+
+
+def operand_readers() -> dict:
+    # One operand read in each layout: by name through the table, through the captured value holder, by slot
+    symbol_table = {f"i{index}": SymbolValueDetail(index) for index in range(50)}
+    values = [index for index in range(50)]
+    detail = symbol_table[VARIABLE_NAME]
+    slot = int(VARIABLE_NAME[1:])
+    return {
+        "name": lambda: symbol_table[VARIABLE_NAME].variable_value,
+        "detail": lambda: detail.variable_value,
+        "slot": lambda: values[slot],
+    }
+
+
+def resolve_program(program_path: str) -> tuple[int, float]:
+    # Operands in the resolved program, and the time the front end spent resolving them
+    stats = PhaseStats()
+    collector = ProgramCollector(program_path, stats=stats)
+    # The collector keeps every instruction alive, cyclic GC passes over them would swamp the timing
+    gc.disable()
+    try:
+        collector.start()
+    finally:
+        gc.enable()
+    operand_count = 0
+    for instruction in collector.line_details:
+        if instruction.instruction_type == IRInstructionTypeEnum.BINARY_OPERATION:
+            operand_count += 2
+        else:
+            operand_count += 1
+    return operand_count, stats.phase_seconds["resolve"]
+
+
+def run_engine(engine: str, program_path: str, input_count: int) -> float:
+    stats = PhaseStats()
+    stdin = sys.stdin
+    sys.stdin = io.StringIO("3\n" * input_count)
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            ENGINES[engine](program_path, stats=stats).start()
+    finally:
+        sys.stdin = stdin
+    return stats.phase_seconds["execute"]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.operands",
+        description="time one variable operand read, alone, in the front end and inside the engines",
+    )
+    parser.add_argument("--lines", type=int, default=100_000, help="lines of the generated program")
+    parser.add_argument("--expression-length", type=int, default=8, help="max operands per expression")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest is reported")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+
+    readers = operand_readers()
+    for layout, read in readers.items():
+        seconds = min(timeit.repeat(read, number=READ_COUNT, repeat=args.repeat))
+        print(f"read by {layout:<6}: {seconds / READ_COUNT * 1e9:6.1f} ns/operand")
+
+    options = ProgramOptionsDetail(line_count=args.lines, expression_length=args.expression_length, output_density=0.02)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        program_path = os.path.join(temp_dir, "operands.x")
+        generator = ProgramGenerator(options)
+        with open(program_path, "w", encoding="utf-8") as program_file:
+            generator.write(program_file)
+
+        operand_count, seconds = min(resolve_program(program_path) for _ in range(args.repeat))
+        print(f"resolve     : {operand_count} operands in {seconds:.3f}s -> {seconds / operand_count * 1e9:6.1f} ns/operand")
+        for engine in ENGINES:
+            seconds = min(run_engine(engine, program_path, generator.input_count) for _ in range(args.repeat))
+            print(
+                f"{engine:<4} execute: {operand_count} operands in {seconds:.3f}s "
+                f"-> {seconds / operand_count * 1e9:6.1f} ns/operand"
+            )
+
+
+if __name__ == "__main__":
+    main()
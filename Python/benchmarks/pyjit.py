@@ -0,0 +1,64 @@
+import argparse
+import gc
+import os
+import tempfile
+
+from compiler import CollectingOutputSink, Interpreter, VirtualMachine
+from compiler.pyjit import PythonJit
+from compiler.number_input import BatchNumberInput
+from compiler.source import StringSource
+from compiler.stats import PhaseStats
+
+from .generator import ProgramGenerator, ProgramOptionsDetail
+
+ENGINES = {"tree": Interpreter, "vm": VirtualMachine, "pyjit": PythonJit}
+BACKEND_PHASES = ("build", "jit", "execute")
+
+
+def run_engine(engine: str, program_path: str, input_count: int) -> tuple[dict, str]:
+    # Seconds of every backend phase, and the program output
+    stats = PhaseStats()
+    output_sink = CollectingOutputSink()
+    number_input = BatchNumberInput(StringSource("3\n" * input_count, name="<input>"))
+    gc.collect()
+    ENGINES[engine](program_path, quiet=True, stats=stats, number_input=number_input, output_sink=output_sink).start()
+    return stats.phase_seconds, output_sink.text
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.pyjit",
+        description="time the backend phases of the pyjit engine against the tree and vm engines",
+    )
+    parser.add_argument("--lines", type=int, default=50_000, help="lines of the generated program")
+    parser.add_argument("--expression-length", type=int, default=8, help="max operands per expression")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    options = ProgramOptionsDetail(
+        line_count=args.lines,
+        expression_length=args.expression_length,
+        input_density=0.05,
+        output_density=0.05,
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        program_path = os.path.join(temp_dir, "pyjit.x")
+        generator = ProgramGenerator(options)
+        with open(program_path, "w", encoding="utf-8") as program_file:
+            generator.write(program_file)
+
+        outputs = {}
+        # pyjit runs twice: the second run finds the compiled function in the cache
+        for label, engine in (("tree", "tree"), ("vm", "vm"), ("pyjit", "pyjit"), ("pyjit cached", "pyjit")):
+            phase_seconds, outputs[label] = run_engine(engine, program_path, generator.input_count)
+            phases = ", ".join(f"{phase} {phase_seconds[phase]:.3f}s" for phase in BACKEND_PHASES if phase in phase_seconds)
+            backend_seconds = sum(phase_seconds.get(phase, 0.0) for phase in BACKEND_PHASES)
+            print(f"{label:<12}: backend {backend_seconds:.3f}s ({phases})")
+
+        print(f"same output : {len(set(outputs.values())) == 1}")
+
+
+if __name__ == "__main__":
+    main()
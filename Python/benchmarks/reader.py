@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from compiler.source import FileSource
+
+from .tokenizer import LINE_TEMPLATES
+
+DEFAULT_SIZES_MB = (10, 100)
+
+
+def write_source(path: str, size_bytes: int) -> int:
+    lines = [LINE_TEMPLATES[index % len(LINE_TEMPLATES)].format(index) + "\n" for index in range(1000)]
+    block = "".join(lines)
+    written = 0
+    with open(path, "w", encoding="utf-8") as source_file:
+        while written < size_bytes:
+            source_file.write(block)
+            written += len(block)
+    return written
+
+
+def read_with_readline(path: str) -> int:
+    # The reader `Core` used before: one `readline()` and two `strip()` calls per line
+    line_count = 0
+    with open(path, "r") as source_file:
+        line_text = source_file.readline()
+        while line_text:
+            if line_text.strip():
+                line_text.strip()
+                line_count += 1
+            line_text = source_file.readline()
+    return line_count
+
+
+def read_with_blocks(path: str) -> int:
+    # Same walk `Core` does over each block: line spans only, no per-line strings
+    line_count = 0
+    source = FileSource(path)
+    try:
+        for _, block_text in source.read_blocks():
+            block_length = len(block_text)
+            line_start = 0
+            while line_start < block_length:
+                line_end = block_text.find("\n", line_start)
+                if line_end == -1:
+                    line_end = block_length
+                if line_end > line_start:
+                    line_count += 1
+                line_start = line_end + 1
+    finally:
+        source.close()
+    return line_count
+
+
+def measure(reader: Callable[[str], int], path: str, size_bytes: int) -> str:
+    started_at = time.perf_counter()
+    line_count = reader(path)
+    elapsed = time.perf_counter() - started_at
+    return f"{line_count} lines in {elapsed:.2f}s -> {size_bytes / elapsed / (1 << 20):,.0f} MB/s"
+
+
+def main():
+    sizes_mb = [int(size) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else DEFAULT_SIZES_MB
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size_mb in sizes_mb:
+            path = os.path.join(temp_dir, f"source-{size_mb}mb.x")
+            size_bytes = write_source(path, size_mb << 20)
+
+            print(f"{size_mb} MB source")
+            print(f"  readline: {measure(read_with_readline, path, size_bytes)}")
+            print(f"  blocks:   {measure(read_with_blocks, path, size_bytes)}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from compiler.server import ServerClient
+
+APP_PATH = os.path.join(os.path.dirname(__file__), "..", "app.py")
+EXAMPLE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "Example", "1-declare_variables.x")
+SERVER_START_TIMEOUT_SECONDS = 10.0
+
+
+def start_server(socket_path: str) -> subprocess.Popen:
+    server = subprocess.Popen([sys.executable, APP_PATH, "serve", "--socket", socket_path], stderr=subprocess.DEVNULL)
+    deadline = time.perf_counter() + SERVER_START_TIMEOUT_SECONDS
+    while not os.path.exists(socket_path):
+        if time.perf_counter() > deadline or server.poll() is not None:
+            server.kill()
+            raise RuntimeError("the server did not start")
+        time.sleep(0.01)
+    return server
+
+
+def time_requests(socket_path: str, request: dict, count: int) -> tuple[float, float]:
+    # Mean round trip per request, and the part of it spent outside the request's own handling
+    client = ServerClient(socket_path)
+    try:
+        client.request(request)
+        handled_seconds = 0.0
+        started_at = time.perf_counter()
+        for _ in range(count):
+            handled_seconds += client.request(request)["elapsed_seconds"]
+        elapsed = time.perf_counter() - started_at
+    finally:
+        client.close()
+    return elapsed / count, (elapsed - handled_seconds) / count
+
+
+def time_concurrent_requests(socket_path: str, request: dict, client_count: int, count: int) -> float:
+    # Requests per second with `client_count` connections sending at once
+    def send_requests():
+        client = ServerClient(socket_path)
+        try:
+            for _ in range(count):
+                client.request(request)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=send_requests) for _ in range(client_count)]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return client_count * count / (time.perf_counter() - started_at)
+
+
+def time_cold_cli(output_dir: str, count: int) -> float:
+    output_path = os.path.join(output_dir, "cold.cpp")
+    command = [sys.executable, APP_PATH, "compile", EXAMPLE_PATH, output_path, "--no-cache"]
+    started_at = time.perf_counter()
+    for _ in range(count):
+        subprocess.run(command, check=True, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - started_at) / count
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.server",
+        description="time requests to `app.py serve` against cold `app.py compile` processes",
+    )
+    parser.add_argument("--requests", type=int, default=2000, help="requests per measurement")
+    parser.add_argument("--clients", type=int, default=4, help="connections for the concurrent measurement")
+    parser.add_argument("--cold-runs", type=int, default=10, help="cold CLI processes to time")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    with open(EXAMPLE_PATH, "r") as example_file:
+        source_text = example_file.read()
+
+    requests = {
+        "compile (cached)": {"action": "compile", "source": source_text},
+        "check (cached)": {"action": "check", "source": source_text},
+        "run": {"action": "run", "source": source_text, "input": "3\n" * 10},
+        "run vm": {"action": "run", "source": source_text, "input": "3\n" * 10, "engine": "vm"},
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        socket_path = os.path.join(temp_dir, "server.sock")
+        server = start_server(socket_path)
+        try:
+            for label, request in requests.items():
+                round_trip, overhead = time_requests(socket_path, request, args.requests)
+                print(f"{label:<17}: {round_trip * 1e6:8.1f} us/request, {overhead * 1e6:6.1f} us outside the handler")
+
+            requests_per_second = time_concurrent_requests(
+                socket_path,
+                requests["run"],
+                args.clients,
+                args.requests // args.clients,
+            )
+            print(f"{f'run, {args.clients} clients':<17}: {requests_per_second:10,.0f} requests/sec")
+        finally:
+            server.terminate()
+            server.wait()
+
+        cold_seconds = time_cold_cli(temp_dir, args.cold_runs)
+        print(f"{'cold CLI compile':<17}: {cold_seconds * 1e6:8.1f} us/process")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import os
+import time
+
+from compiler import StringSource, VirtualMachine
+from compiler.session import QueueNumberInput, Session, run_sessions
+from compiler.number_input import BatchNumberInput
+from compiler.output_sink import CollectingOutputSink
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "Example", "2-io.x")
+
+
+def read_program(repeat: int) -> str:
+    with open(EXAMPLE_PATH, "r") as example_file:
+        example_text = example_file.read().rstrip("\n") + "\n"
+    return example_text * repeat
+
+
+async def run_fed_sessions(program_text: str, session_count: int, input_count: int, concurrency: int | None) -> float:
+    # Every session waits on its `in`s, their numbers arrive one event loop pass after the sessions started
+    sessions = [
+        Session(StringSource(program_text), number_input=QueueNumberInput(), max_instructions=1_000_000, timeout_seconds=60)
+        for _ in range(session_count)
+    ]
+
+    async def feed_sessions():
+        for session in sessions:
+            await asyncio.sleep(0)
+            session.number_input.feed("3\n" * input_count)
+            session.number_input.close()
+
+    started_at = time.perf_counter()
+    results, _ = await asyncio.gather(run_sessions(sessions, concurrency), feed_sessions())
+    elapsed = time.perf_counter() - started_at
+    if not all(results):
+        raise RuntimeError(f"{results.count(False)} sessions failed")
+    return elapsed
+
+
+def run_serial(program_text: str, session_count: int, input_count: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(session_count):
+        VirtualMachine(
+            StringSource(program_text),
+            quiet=True,
+            number_input=BatchNumberInput(StringSource("3\n" * input_count)),
+            output_sink=CollectingOutputSink(),
+        ).start()
+    return time.perf_counter() - started_at
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.sessions",
+        description="run many small programs as asyncio sessions and report sessions/sec",
+    )
+    parser.add_argument("--sessions", type=int, default=2000, help="sessions per measurement")
+    parser.add_argument("--repeat", type=int, default=10, help="copies of the example program in each session")
+    parser.add_argument("--concurrency", type=int, help="sessions running at once (default: all)")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    program_text = read_program(args.repeat)
+    input_count = args.repeat
+
+    elapsed = asyncio.run(run_fed_sessions(program_text, args.sessions, input_count, args.concurrency))
+    print(f"asyncio sessions  : {args.sessions} in {elapsed:.3f}s -> {args.sessions / elapsed:,.0f} sessions/sec")
+
+    elapsed = run_serial(program_text, args.sessions, input_count)
+    print(f"one VM at a time  : {args.sessions} in {elapsed:.3f}s -> {args.sessions / elapsed:,.0f} sessions/sec")
+
+
+if __name__ == "__main__":
+    main()
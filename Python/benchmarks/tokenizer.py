@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import time
+
+from compiler.lexer import lex_blocks
+from compiler.source import FileSource
+
+LINE_TEMPLATES = (
+    "v{0} = {0}+2-7",
+    "s{0} = \"Hi\"+\"o\"+\"n\"",
+    "f{0} = 2.2 + 9.3",
+    "v{0} = v{0} + 3 - v{0} + 909",
+    "out v{0}+8+69",
+)
+
+
+def write_program(path: str, line_count: int) -> None:
+    with open(path, "w", encoding="utf-8") as program_file:
+        for index in range(line_count):
+            program_file.write(LINE_TEMPLATES[index % len(LINE_TEMPLATES)].format(index // len(LINE_TEMPLATES)))
+            program_file.write("\n")
+
+
+def count_tokens(program_path: str, workers: int) -> tuple[int, float]:
+    source = FileSource(program_path)
+    started_at = time.perf_counter()
+    try:
+        token_count = sum(len(lexed_block.kinds) for lexed_block, _ in lex_blocks(source.read_blocks(), workers))
+    finally:
+        source.close()
+    return token_count, time.perf_counter() - started_at
+
+
+def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    worker_counts = [int(workers) for workers in sys.argv[2].split(",")] if len(sys.argv) > 2 else [1]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        program_path = os.path.join(temp_dir, "tokenizer.x")
+        write_program(program_path, line_count)
+
+        print(f"lines: {line_count}, CPUs: {os.cpu_count()}")
+        for workers in worker_counts:
+            token_count, elapsed = count_tokens(program_path, workers)
+            print(f"workers={workers}: {token_count} tokens in {elapsed:.3f}s -> {token_count / elapsed:,.0f} tokens/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from compiler import CollectingOutputSink, Interpreter
+from compiler.number_input import BatchNumberInput
+from compiler.source import StringSource
+from compiler.vectorized import NUMPY_AVAILABLE, VectorizedRunner
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "Example", "2-io.x")
+CELL_LIMIT = 10**6
+
+
+def write_rows(path: str, row_count: int, column_count: int) -> None:
+    with open(path, "w") as rows_file:
+        for _ in range(row_count):
+            rows_file.write(",".join(str(random.randint(-CELL_LIMIT, CELL_LIMIT)) for _ in range(column_count)))
+            rows_file.write("\n")
+
+
+def time_batch(program_path: str, rows_path: str, output_path: str) -> tuple[float, bool]:
+    started_at = time.perf_counter()
+    runner = VectorizedRunner(program_path, rows_path, output_path, quiet=True)
+    runner.start()
+    return time.perf_counter() - started_at, runner.is_vectorized
+
+
+def time_interpreter_rows(program_path: str, rows_path: str, row_count: int) -> float:
+    # What a batch costs today: one interpreter run, front end included, per row
+    with open(rows_path, "r") as rows_file:
+        rows = [rows_file.readline().strip() for _ in range(row_count)]
+    started_at = time.perf_counter()
+    for row in rows:
+        number_input = BatchNumberInput(StringSource(row.replace(",", "\n"), name="<row>"))
+        Interpreter(program_path, quiet=True, number_input=number_input, output_sink=CollectingOutputSink()).start()
+    return time.perf_counter() - started_at
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.vectorized",
+        description="rows/sec of `run-batch`, vectorized and row by row, against one interpreter run per row",
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows of the generated table")
+    parser.add_argument("--interpreter-rows", type=int, default=2000, help="rows timed with one interpreter run each")
+    parser.add_argument("--program", default=EXAMPLE_PATH, help="program to run (default: Example/2-io.x)")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if not NUMPY_AVAILABLE:
+        print("this benchmark needs numpy: pip install numpy", file=sys.stderr)
+        return 1
+
+    with open(args.program, "r") as program_file:
+        column_count = sum(line.strip().startswith("in ") for line in program_file)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        rows_path = os.path.join(temp_dir, "rows.csv")
+        output_path = os.path.join(temp_dir, "outputs.csv")
+        write_rows(rows_path, args.rows, column_count)
+
+        seconds, is_vectorized = time_batch(args.program, rows_path, output_path)
+        print(f"run-batch {'vectorized' if is_vectorized else 'row by row'}: {args.rows / seconds:12,.0f} rows/sec")
+
+        # `inf` can't be vectorized into an int column, so the whole table runs row by row
+        fallback_rows_path = os.path.join(temp_dir, "fallback_rows.csv")
+        fallback_row_count = args.rows // 10
+        write_rows(fallback_rows_path, fallback_row_count - 1, column_count)
+        with open(fallback_rows_path, "a") as rows_file:
+            rows_file.write(",".join(["inf"] * column_count) + "\n")
+        seconds, is_vectorized = time_batch(args.program, fallback_rows_path, output_path)
+        print(f"run-batch {'vectorized' if is_vectorized else 'row by row'}: {fallback_row_count / seconds:12,.0f} rows/sec")
+
+        seconds = time_interpreter_rows(args.program, rows_path, args.interpreter_rows)
+        print(f"interpreter per row : {args.interpreter_rows / seconds:12,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
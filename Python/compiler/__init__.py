@@ -1,2 +1,5 @@
 from .compiler import Compiler
 from .interpreter import Interpreter
+from .output_sink import CollectingOutputSink, OutputSink
+from .source import BytesSource, FileSource, Source, StdinSource, StringSource
+from .vm import VirtualMachine
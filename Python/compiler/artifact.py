@@ -0,0 +1,265 @@
+import hashlib
+import os
+import struct
+import sys
+from array import array
+from typing import Iterator
+from .common import *
+from .ir import *
+from .source import Source
+
+ARTIFACT_MAGIC = b"PNUXC\0"
+# Bumped whenever the layout below changes; artifacts of any other version are rejected
+ARTIFACT_FORMAT_VERSION = 1
+
+# magic, format version, optimization level, SHA-256 of the source
+ARTIFACT_HEADER = struct.Struct("<6sHB32s")
+ARTIFACT_COUNT = struct.Struct("<I")
+
+# Every instruction is six words: type, line number, flags, target, first and second operand
+INSTRUCTION_WORDS = 6
+FLAG_IS_DECLARATION = 1
+FLAG_SUBSTRACTION = 2
+
+# An operand is `index << 4 | type code << 2 | kind`; the index is into the constant pool, the name table
+# or the statement's temporaries
+OPERAND_KIND_CONST = 0
+OPERAND_KIND_VARIABLE = 1
+OPERAND_KIND_TEMP = 2
+NO_OPERAND = 0xFFFFFFFF
+
+IR_INSTRUCTION_TYPES = {instruction_type.value: instruction_type for instruction_type in IRInstructionTypeEnum}
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def source_hash(source_bytes: bytes) -> bytes:
+    return hashlib.sha256(source_bytes).digest()
+
+
+def _words_bytes(words: array) -> bytes:
+    # Stored little-endian whatever the machine
+    if sys.byteorder != "little":
+        words = array(words.typecode, words)
+        words.byteswap()
+    return words.tobytes()
+
+
+def _pack_strings(strings: list[str]) -> bytes:
+    encoded = [string.encode("utf-8") for string in strings]
+    lengths = array("I", (len(string) for string in encoded))
+    return ARTIFACT_COUNT.pack(len(encoded)) + _words_bytes(lengths) + b"".join(encoded)
+
+
+# Layout, all little-endian: header, source path, name table (names and type codes), constant pool (words
+# as written in the source and type codes), then the instruction stream
+def pack_artifact(
+    source_digest: bytes,
+    source_path: str,
+    optimization_level: int,
+    symbol_table: SymbolTable,
+    instructions: list[IRInstruction],
+) -> bytes:
+    const_indexes: Dict[tuple[str, str], int] = {}
+    const_words: list[str] = []
+    const_types = array("B")
+
+    def operand_word(operand: IROperand | None) -> int:
+        if operand is None:
+            return NO_OPERAND
+
+        type_code = SYMBOL_VARIABLE_TYPE_CODES[operand.value_type]
+        if operand.operand_type == IROperandTypeEnum.CONST:
+            const_key = (operand.value_type, operand.word)
+            index = const_indexes.get(const_key)
+            if index is None:
+                index = const_indexes[const_key] = len(const_words)
+                const_words.append(operand.word)
+                const_types.append(type_code)
+            return index << 4 | type_code << 2 | OPERAND_KIND_CONST
+        elif operand.operand_type == IROperandTypeEnum.VARIABLE:
+            return operand.slot << 4 | type_code << 2 | OPERAND_KIND_VARIABLE
+        return operand.index << 4 | type_code << 2 | OPERAND_KIND_TEMP
+
+    words = array("I")
+    for instruction in instructions:
+        instruction_type = instruction.instruction_type
+        flags = FLAG_IS_DECLARATION if getattr(instruction, "is_declaration", False) else 0
+        if instruction_type == IRInstructionTypeEnum.BINARY_OPERATION:
+            if instruction.operator == IROperatorEnum.SUBSTRACTION:
+                flags |= FLAG_SUBSTRACTION
+            operands = (instruction.target, instruction.left, instruction.right)
+        elif instruction_type == IRInstructionTypeEnum.ASSIGN:
+            operands = (instruction.target, instruction.source, None)
+        elif instruction_type == IRInstructionTypeEnum.INPUT:
+            operands = (instruction.target, None, None)
+        else:
+            operands = (None, instruction.source, None)
+        words.extend((instruction_type.value, instruction.line_number, flags, *map(operand_word, operands)))
+
+    return b"".join(
+        (
+            ARTIFACT_HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_FORMAT_VERSION, optimization_level, source_digest),
+            _pack_strings([source_path]),
+            _pack_strings(symbol_table.names),
+            symbol_table.types.tobytes(),
+            _pack_strings(const_words),
+            const_types.tobytes(),
+            ARTIFACT_COUNT.pack(len(instructions)),
+            _words_bytes(words),
+        )
+    )
+
+
+class ArtifactReader:
+
+    def __init__(self, data: bytes, name: str) -> None:
+        self.name = name
+        self.__data = memoryview(data)
+        self.__offset = 0
+
+    def take(self, size: int) -> memoryview:
+        if self.__offset + size > len(self.__data):
+            raise ArtifactError(f"'{self.name}' is damaged: it ends too early")
+        chunk = self.__data[self.__offset : self.__offset + size]
+        self.__offset += size
+        return chunk
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        return layout.unpack(self.take(layout.size))
+
+    def words(self, count: int) -> array:
+        words = array("I")
+        words.frombytes(self.take(count * words.itemsize))
+        if sys.byteorder != "little":
+            words.byteswap()
+        return words
+
+    def strings(self) -> list[str]:
+        (count,) = self.unpack(ARTIFACT_COUNT)
+        lengths = self.words(count)
+        blob = bytes(self.take(sum(lengths)))
+        strings = []
+        offset = 0
+        try:
+            for length in lengths:
+                strings.append(blob[offset : offset + length].decode("utf-8"))
+                offset += length
+        except UnicodeDecodeError:
+            raise ArtifactError(f"'{self.name}' is damaged: invalid text") from None
+        return strings
+
+
+# A built program instead of source text: the front end is skipped and `load()` hands the instructions and
+# the symbol table straight to the backend. The artifact is read in one go, and rejected when it was built
+# by another format version or from a source file that changed since.
+class ArtifactSource(Source):
+
+    def __init__(self, path: str) -> None:
+        self.name = path
+        self.optimization_level = 0
+        # Set by `load()` when the source the artifact was built from is gone, so it couldn't be checked
+        self.missing_source_path: str | None = None
+
+    def read_blocks(self) -> Iterator[tuple[int, str]]:
+        return iter(())
+
+    def load(self) -> tuple[SymbolTable, list[IRInstruction]]:
+        with open(self.name, "rb") as artifact_file:
+            data = artifact_file.read()
+
+        reader = ArtifactReader(data, self.name)
+        if len(data) < ARTIFACT_HEADER.size or not data.startswith(ARTIFACT_MAGIC):
+            raise ArtifactError(f"'{self.name}' is not a program artifact")
+
+        _, format_version, self.optimization_level, source_digest = reader.unpack(ARTIFACT_HEADER)
+        if format_version != ARTIFACT_FORMAT_VERSION:
+            raise ArtifactError(
+                f"'{self.name}' has format version {format_version}, expected {ARTIFACT_FORMAT_VERSION}: rebuild it"
+            )
+
+        (source_path,) = reader.strings()
+        self.__check_source(source_path, source_digest)
+
+        symbol_table = SymbolTable()
+        names = reader.strings()
+        name_types = reader.take(len(names))
+        const_words = reader.strings()
+        const_types = reader.take(len(const_words))
+        consts = []
+        try:
+            for name, type_code in zip(names, name_types):
+                symbol_table.declare(name, SYMBOL_VARIABLE_TYPES[type_code])
+            for word, type_code in zip(const_words, const_types):
+                value_type = SYMBOL_VARIABLE_TYPES[type_code]
+                consts.append(IRConst(value_type, CONST_VALUE_PARSERS[value_type](word), word))
+        except (IndexError, KeyError, ValueError):
+            raise ArtifactError(f"'{self.name}' is damaged: invalid name table or constant pool") from None
+        variables = [
+            IRVariable(symbol_table.type_of(slot), name, slot) for slot, name in enumerate(symbol_table.names)
+        ]
+
+        (instruction_count,) = reader.unpack(ARTIFACT_COUNT)
+        words = reader.words(instruction_count * INSTRUCTION_WORDS)
+
+        # Every temporary is read once, after the instruction that writes it; the backends count on that
+        written_temps: set[int] = set()
+
+        def operand(word: int) -> IROperand | None:
+            if word == NO_OPERAND:
+                return None
+            kind = word & 3
+            if kind == OPERAND_KIND_CONST:
+                return consts[word >> 4]
+            elif kind == OPERAND_KIND_VARIABLE:
+                return variables[word >> 4]
+            written_temps.remove(word >> 4)
+            return IRTemp(SYMBOL_VARIABLE_TYPES[word >> 2 & 3], word >> 4)
+
+        def target_operand(word: int) -> IROperand | None:
+            if word != NO_OPERAND and word & 3 == OPERAND_KIND_TEMP:
+                written_temps.add(word >> 4)
+                return IRTemp(SYMBOL_VARIABLE_TYPES[word >> 2 & 3], word >> 4)
+            return operand(word)
+
+        instructions: list[IRInstruction] = []
+        try:
+            for position in range(0, len(words), INSTRUCTION_WORDS):
+                type_value, line_number, flags, target, first, second = words[position : position + INSTRUCTION_WORDS]
+                instruction_type = IR_INSTRUCTION_TYPES[type_value]
+                is_declaration = bool(flags & FLAG_IS_DECLARATION)
+                if instruction_type == IRInstructionTypeEnum.BINARY_OPERATION:
+                    operator = IROperatorEnum.SUBSTRACTION if flags & FLAG_SUBSTRACTION else IROperatorEnum.ADDITION
+                    left, right = operand(first), operand(second)
+                    instruction = IRBinaryOperation(
+                        target_operand(target), operator, left, right, is_declaration, line_number
+                    )
+                elif instruction_type == IRInstructionTypeEnum.ASSIGN:
+                    source = operand(first)
+                    instruction = IRAssign(target_operand(target), source, is_declaration, line_number)
+                elif instruction_type == IRInstructionTypeEnum.INPUT:
+                    instruction = IRInput(operand(target), is_declaration, line_number)
+                else:
+                    instruction = IROutput(operand(first), line_number)
+                instructions.append(instruction)
+        except (KeyError, IndexError):
+            raise ArtifactError(f"'{self.name}' is damaged: invalid instruction") from None
+
+        return symbol_table, instructions
+
+    def __check_source(self, source_path: str, source_digest: bytes) -> None:
+        # The source is found relative to the artifact. An artifact may be shipped without its source, so a
+        # missing one doesn't stop the run, it is only noted in `missing_source_path` for the caller to report
+        if not source_path:
+            return
+        source_path = os.path.join(os.path.dirname(self.name), source_path)
+        try:
+            with open(source_path, "rb") as source_file:
+                current_digest = source_hash(source_file.read())
+        except OSError:
+            self.missing_source_path = source_path
+            return
+        if current_digest != source_digest:
+            raise ArtifactError(f"'{self.name}' is stale: '{source_path}' changed since it was built, rebuild it")
@@ -0,0 +1,252 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+from .checker import Checker
+from .common import ErrorDetail
+from .compiler import Compiler
+
+INPUT_FILE_SUFFIX = ".x"
+OUTPUT_FILE_SUFFIX = ".cpp"
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class CompileJobDetail:
+    __slots__ = ("input_path", "output_path", "optimization_level")
+
+    input_path: str
+    output_path: str
+    optimization_level: int
+
+    def __init__(self, input_path: str, output_path: str, optimization_level: int = 0) -> None:
+        self.input_path = input_path
+        self.output_path = output_path
+        self.optimization_level = optimization_level
+
+
+# The outcome of one file, checked or compiled in a worker process
+class FileResultDetail:
+    __slots__ = ("input_path", "errors", "elapsed_seconds")
+
+    input_path: str
+    errors: list[ErrorDetail]
+    elapsed_seconds: float
+
+    def __init__(self, input_path: str, errors: list[ErrorDetail], elapsed_seconds: float) -> None:
+        self.input_path = input_path
+        self.errors = errors
+        self.elapsed_seconds = elapsed_seconds
+
+    @property
+    def is_failed(self) -> bool:
+        return bool(self.errors)
+
+
+class CompileResultDetail(FileResultDetail):
+    __slots__ = ("output_path",)
+
+    output_path: str
+
+    def __init__(self, input_path: str, output_path: str, errors: list[ErrorDetail], elapsed_seconds: float) -> None:
+        super().__init__(input_path, errors, elapsed_seconds)
+        self.output_path = output_path
+
+
+class CheckResultDetail(FileResultDetail):
+    __slots__ = ()
+
+    def as_dict(self) -> dict:
+        return {
+            "file": self.input_path,
+            "errors": [error.as_dict() for error in self.errors],
+            "elapsed_seconds": round(self.elapsed_seconds, 6),
+        }
+
+
+class FileManyReport:
+    __slots__ = ("results", "workers", "elapsed_seconds")
+
+    results: list[FileResultDetail]
+    workers: int
+    elapsed_seconds: float
+
+    def __init__(self, results: list[FileResultDetail], workers: int, elapsed_seconds: float) -> None:
+        self.results = results
+        self.workers = workers
+        self.elapsed_seconds = elapsed_seconds
+
+    @property
+    def failed_results(self) -> list[FileResultDetail]:
+        return [result for result in self.results if result.is_failed]
+
+    @property
+    def files_per_second(self) -> float:
+        return len(self.results) / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def _summary_line(self, action: str) -> str:
+        return (
+            f"[.] {action} {len(self.results) - len(self.failed_results)} of {len(self.results)} files, "
+            f"{len(self.failed_results)} failed, in {self.elapsed_seconds:.2f}s "
+            f"({self.files_per_second:.1f} files/s, {self.workers} workers)"
+        )
+
+
+class CompileManyReport(FileManyReport):
+    __slots__ = ()
+
+    def lines(self) -> Iterator[str]:
+        for result in self.failed_results:
+            yield f"[!] {result.input_path}"
+            for error in result.errors:
+                yield f"    {error}"
+
+        yield self._summary_line("Compiled")
+
+
+class CheckManyReport(FileManyReport):
+    __slots__ = ()
+
+    def as_dict(self) -> dict:
+        return {
+            "files": [result.as_dict() for result in self.results],
+            "summary": {
+                "files": len(self.results),
+                "failed_files": len(self.failed_results),
+                "errors": sum(len(result.errors) for result in self.results),
+                "workers": self.workers,
+                "elapsed_seconds": round(self.elapsed_seconds, 6),
+                "files_per_second": round(self.files_per_second, 1),
+            },
+        }
+
+    def write_json(self, path: str | None = None) -> None:
+        report_json = json.dumps(self.as_dict(), indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as report_file:
+                report_file.write(report_json + "\n")
+        else:
+            print(report_json)
+
+    def summary_line(self) -> str:
+        return self._summary_line("Checked")
+
+
+def find_input_files(input_pattern: str) -> list[str]:
+    # A directory means every `.x` file below it, anything else is a glob pattern
+    if os.path.isdir(input_pattern):
+        input_pattern = os.path.join(input_pattern, "**", f"*{INPUT_FILE_SUFFIX}")
+    return sorted(path for path in glob.glob(input_pattern, recursive=True) if os.path.isfile(path))
+
+
+def unmatched_pattern_error(input_pattern: str) -> ErrorDetail:
+    # A path that matches nothing is an error of its own, so a typo can't pass as a run over no files
+    return ErrorDetail("IOError", f"no {INPUT_FILE_SUFFIX} files match '{input_pattern}'", source_name=input_pattern)
+
+
+def plan_jobs(input_paths: list[str], output_directory: str, optimization_level: int = 0) -> list[CompileJobDetail]:
+    # Outputs mirror the inputs' layout below their common directory, so equal names in different folders never clash
+    if not input_paths:
+        return []
+
+    common_directory = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in input_paths])
+    jobs: list[CompileJobDetail] = []
+    for input_path in input_paths:
+        relative_path = os.path.relpath(os.path.abspath(input_path), common_directory)
+        output_path = os.path.join(output_directory, os.path.splitext(relative_path)[0] + OUTPUT_FILE_SUFFIX)
+        jobs.append(CompileJobDetail(input_path, output_path, optimization_level))
+    return jobs
+
+
+def _compile_file(job: CompileJobDetail) -> CompileResultDetail:
+    # Runs in a worker process, so every file gets its own `Compiler` and symbol table
+    start_time = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(job.output_path)), exist_ok=True)
+        compiler = Compiler(job.input_path, job.output_path, optimization_level=job.optimization_level, quiet=True)
+        compiler.start()
+        errors = compiler.errors
+    except Exception as ex:
+        errors = [ErrorDetail("SystemError", str(ex), source_name=job.input_path)]
+
+    return CompileResultDetail(job.input_path, job.output_path, errors, time.perf_counter() - start_time)
+
+
+def run_jobs(
+    function: Callable[[T], R],
+    jobs: Iterable[T],
+    workers: int | None = None,
+    chunksize: int | None = None,
+) -> tuple[list[R], int, float]:
+    # The results in job order, the worker count used and the elapsed seconds
+    jobs = list(jobs)
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker keeps them all busy without paying a round trip per small file
+    chunksize = chunksize or max(1, len(jobs) // (workers * 4))
+
+    start_time = time.perf_counter()
+    if workers == 1:
+        results = [function(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(function, jobs, chunksize=chunksize))
+
+    return results, workers, time.perf_counter() - start_time
+
+
+def compile_jobs(
+    jobs: Iterable[CompileJobDetail],
+    workers: int | None = None,
+    chunksize: int | None = None,
+) -> CompileManyReport:
+    return CompileManyReport(*run_jobs(_compile_file, jobs, workers=workers, chunksize=chunksize))
+
+
+def compile_many(
+    input_pattern: str,
+    output_directory: str,
+    workers: int | None = None,
+    chunksize: int | None = None,
+    optimization_level: int = 0,
+) -> CompileManyReport:
+    input_paths = find_input_files(input_pattern)
+    unmatched_results: list[CompileResultDetail] = []
+    if not input_paths:
+        error = unmatched_pattern_error(input_pattern)
+        unmatched_results.append(CompileResultDetail(input_pattern, output_directory, [error], 0.0))
+    jobs = plan_jobs(input_paths, output_directory, optimization_level)
+    results, workers, elapsed_seconds = run_jobs(_compile_file, jobs, workers=workers, chunksize=chunksize)
+    return CompileManyReport(unmatched_results + results, workers, elapsed_seconds)
+
+
+def _check_file(input_path: str) -> CheckResultDetail:
+    # Runs in a worker process; the front end goes on past an error, so every error of the file is collected
+    start_time = time.perf_counter()
+    try:
+        checker = Checker(input_path)
+        checker.start()
+        errors = checker.errors
+    except Exception as ex:
+        errors = [ErrorDetail("SystemError", str(ex), source_name=input_path)]
+
+    return CheckResultDetail(input_path, errors, time.perf_counter() - start_time)
+
+
+def check_many(
+    input_patterns: Iterable[str],
+    workers: int | None = None,
+    chunksize: int | None = None,
+) -> CheckManyReport:
+    # Every path is a file, a directory or a glob, as for `compile_many`; a file named twice is checked once
+    input_paths: set[str] = set()
+    unmatched_results: list[CheckResultDetail] = []
+    for input_pattern in input_patterns:
+        matched_paths = find_input_files(input_pattern)
+        if not matched_paths:
+            unmatched_results.append(CheckResultDetail(input_pattern, [unmatched_pattern_error(input_pattern)], 0.0))
+        input_paths.update(matched_paths)
+    results, workers, elapsed_seconds = run_jobs(_check_file, sorted(input_paths), workers=workers, chunksize=chunksize)
+    return CheckManyReport(unmatched_results + results, workers, elapsed_seconds)
@@ -0,0 +1,94 @@
+import os
+from typing import Iterator
+from .artifact import pack_artifact, source_hash
+from .common import ErrorDetail
+from .compiler import save_file_atomically
+from .core import Core
+from .ir import IRInstruction
+from .source import ARTIFACT_SUFFIX, STDIN_SOURCE_PATH, BytesSource, Source, read_source_bytes
+from .stats import PhaseStats
+
+
+# Saves the resolved and optimized program as a `.xc` artifact, which `run` loads without the front end
+class ArtifactBuilder(Core):
+
+    def __init__(
+        self,
+        input_file_x_path: str | Source,
+        output_file_xc_path: str,
+        source_digest: bytes,
+        source_path: str = "",
+        optimization_level: int = 0,
+        quiet: bool = False,
+        lex_workers: int = 1,
+        stats: PhaseStats | None = None,
+    ) -> None:
+        super().__init__(input_file_x_path, optimization_level, quiet, lex_workers, stats)
+        self.__output_file_xc_path = output_file_xc_path
+        self.__source_digest = source_digest
+        # Path of the source relative to the artifact, empty when there is no file to check it against
+        self.__source_path = source_path
+
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        instructions = list(instructions)
+        if self._is_error_thrown:
+            return
+
+        artifact_data = pack_artifact(
+            self.__source_digest,
+            self.__source_path,
+            self._optimization_level,
+            self._symbol_table,
+            instructions,
+        )
+        try:
+            if self._stats:
+                self._stats.call("write", self.__save, artifact_data)
+            else:
+                self.__save(artifact_data)
+        except OSError as ex:
+            self._is_error_thrown = True
+            self._errors.append(ErrorDetail("IOError", f"Cannot save file to '{self.__output_file_xc_path}': {ex}"))
+            self._print(f"Error save file to '{self.__output_file_xc_path}' : {ex}")
+            return
+
+        self._print_optimization_report()
+
+    def __save(self, artifact_data: bytes) -> None:
+        save_file_atomically(
+            self.__output_file_xc_path,
+            lambda output_file: output_file.write(artifact_data),
+            is_binary=True,
+        )
+
+
+def artifact_path(input_file_x_path: str) -> str:
+    return os.path.splitext(input_file_x_path)[0] + ARTIFACT_SUFFIX
+
+
+def build_artifact(
+    input_file_x_path: str,
+    output_file_xc_path: str | None = None,
+    optimization_level: int = 0,
+    lex_workers: int = 1,
+    stats: PhaseStats | None = None,
+) -> list[ErrorDetail]:
+    output_file_xc_path = output_file_xc_path or artifact_path(input_file_x_path)
+    source_bytes = read_source_bytes(input_file_x_path)
+    if input_file_x_path == STDIN_SOURCE_PATH:
+        source_name, source_path = "<stdin>", ""
+    else:
+        output_directory = os.path.dirname(os.path.abspath(output_file_xc_path))
+        source_name, source_path = input_file_x_path, os.path.relpath(os.path.abspath(input_file_x_path), output_directory)
+
+    builder = ArtifactBuilder(
+        BytesSource(source_bytes, name=source_name),
+        output_file_xc_path,
+        source_hash(source_bytes),
+        source_path,
+        optimization_level=optimization_level,
+        lex_workers=lex_workers,
+        stats=stats,
+    )
+    builder.start()
+    return builder.errors
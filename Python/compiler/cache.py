@@ -0,0 +1,214 @@
+import hashlib
+import marshal
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any
+from .common import ErrorDetail
+from .compiler import Compiler, save_file_atomically
+from .source import ARTIFACT_SUFFIX, BytesSource, STDIN_SOURCE_PATH, read_source_bytes
+from .stats import PhaseStats
+
+CACHE_DIRECTORY = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "pnu_compiler")
+CACHE_SIZE_LIMIT = 256 << 20
+# Bumped whenever the layout of the cache entries changes
+CACHE_FORMAT_VERSION = 1
+
+CPP_ENTRY_SUFFIX = ".cpp"
+CODE_ENTRY_SUFFIX = ".pyc"
+ENTRY_SUFFIXES = (CPP_ENTRY_SUFFIX, CODE_ENTRY_SUFFIX)
+# Fraction of stores that run `evict`, whose directory scan costs as much as the whole cache is large; the
+# cache may pass its limit by about 1 / rate entries before a store notices
+CACHE_EVICT_SAMPLE_RATE = 1 / 32
+# Temporary files older than this were left behind by a killed process
+STALE_TEMP_FILE_SECONDS = 3600
+
+_compiler_version: str | None = None
+
+
+def compiler_version() -> str:
+    # Digest of the compiler's own sources, so any change to the compiler invalidates old entries
+    global _compiler_version
+    if _compiler_version is None:
+        package_directory = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256(str(CACHE_FORMAT_VERSION).encode())
+        for file_name in sorted(os.listdir(package_directory)):
+            if file_name.endswith(".py"):
+                with open(os.path.join(package_directory, file_name), "rb") as module_file:
+                    digest.update(file_name.encode())
+                    digest.update(module_file.read())
+        _compiler_version = digest.hexdigest()
+    return _compiler_version
+
+
+def cache_key(source_bytes: bytes, **options: Any) -> str:
+    digest = hashlib.sha256(compiler_version().encode())
+    digest.update(repr(sorted(options.items())).encode())
+    digest.update(source_bytes)
+    return digest.hexdigest()
+
+
+# Content-addressed entries in one flat directory, `<key>.cpp` with the C++ and `<key>.pyc` with the compiled
+# function of the pyjit engine. Every file is written to a temporary
+# name and renamed into place, so processes sharing the directory only ever see whole entries; a file that
+# vanishes under a reader counts as a miss. The modification time is the last use, and the least recently
+# used entries are evicted past `size_limit`, checked on a sampled fraction of the stores.
+class CompilationCache:
+
+    def __init__(
+        self,
+        directory: str = CACHE_DIRECTORY,
+        size_limit: int = CACHE_SIZE_LIMIT,
+        evict_sample_rate: float = CACHE_EVICT_SAMPLE_RATE,
+    ) -> None:
+        self.directory = directory
+        self.size_limit = size_limit
+        self.evict_sample_rate = evict_sample_rate
+
+    def __entry_path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def load_cpp(self, key: str) -> str | None:
+        cpp_path = self.__entry_path(key, CPP_ENTRY_SUFFIX)
+        try:
+            with open(cpp_path, "r", encoding="utf-8") as cpp_file:
+                cpp_code = cpp_file.read()
+            os.utime(cpp_path)
+        except OSError:
+            return None
+        return cpp_code
+
+    def load_code(self, key: str) -> Any:
+        code_path = self.__entry_path(key, CODE_ENTRY_SUFFIX)
+        try:
+            with open(code_path, "rb") as code_file:
+                code = marshal.load(code_file)
+            os.utime(code_path)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return code
+
+    def store_code(self, key: str, code: Any) -> None:
+        # Python code objects of the pyjit engine; marshal data only loads in the Python that wrote it, so
+        # the key has to cover the interpreter version
+        os.makedirs(self.directory, exist_ok=True)
+        self.__write_entry_file(key, CODE_ENTRY_SUFFIX, marshal.dumps(code))
+        self.__evict_sampled()
+
+    def store(self, key: str, cpp_code: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self.__write_entry_file(key, CPP_ENTRY_SUFFIX, cpp_code.encode("utf-8"))
+        self.__evict_sampled()
+
+    def __write_entry_file(self, key: str, suffix: str, data: bytes) -> None:
+        temp_file_descriptor, temp_path = tempfile.mkstemp(prefix=f".{key}{suffix}.", suffix=".tmp", dir=self.directory)
+        try:
+            with open(temp_file_descriptor, "wb") as entry_file:
+                entry_file.write(data)
+            os.replace(temp_path, self.__entry_path(key, suffix))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def __evict_sampled(self) -> None:
+        if random.random() < self.evict_sample_rate:
+            self.evict()
+
+    def evict(self) -> None:
+        # Entries are (last use, size, paths); a concurrent process may remove any of them while we look
+        entries: dict[str, list] = {}
+        now = time.time()
+        try:
+            directory_entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+
+        for directory_entry in directory_entries:
+            try:
+                stat = directory_entry.stat()
+            except OSError:
+                continue
+
+            if directory_entry.name.startswith("."):
+                if now - stat.st_mtime > STALE_TEMP_FILE_SECONDS:
+                    self.__remove(directory_entry.path)
+                continue
+
+            key, suffix = os.path.splitext(directory_entry.name)
+            if suffix not in ENTRY_SUFFIXES:
+                continue
+
+            entry = entries.setdefault(key, [0.0, 0, []])
+            entry[0] = max(entry[0], stat.st_mtime)
+            entry[1] += stat.st_size
+            entry[2].append(directory_entry.path)
+
+        total_size = sum(entry[1] for entry in entries.values())
+        for _, entry_size, entry_paths in sorted(entries.values()):
+            if total_size <= self.size_limit:
+                break
+
+            for entry_path in entry_paths:
+                self.__remove(entry_path)
+            total_size -= entry_size
+
+    def __remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def compile_cached(
+    input_file_x_path: str,
+    output_file_cpp_path: str,
+    cache: CompilationCache,
+    optimization_level: int = 0,
+    lex_workers: int = 1,
+    stats: PhaseStats | None = None,
+) -> list[ErrorDetail]:
+    # Returns the errors of the compile, a cache hit never reaches the lexer and can only fail to save
+    if input_file_x_path.endswith(ARTIFACT_SUFFIX):
+        # A built program skips the front end already, and isn't text to hash with the sources
+        compiler = Compiler(input_file_x_path, output_file_cpp_path, lex_workers=lex_workers, stats=stats)
+        compiler.start()
+        return compiler.errors
+
+    source_bytes = read_source_bytes(input_file_x_path)
+    key = cache_key(source_bytes, optimization_level=optimization_level)
+
+    cpp_code = stats.call("cache_lookup", cache.load_cpp, key) if stats else cache.load_cpp(key)
+    if stats:
+        stats.count("cache_hits", cpp_code is not None)
+    if cpp_code is not None:
+        errors = []
+        try:
+            save_file_atomically(output_file_cpp_path, lambda output_file: output_file.write(cpp_code))
+        except OSError as ex:
+            errors.append(ErrorDetail("IOError", f"Cannot save file to '{output_file_cpp_path}': {ex}"))
+            print(f"Error save file to '{output_file_cpp_path}' : {ex}", file=sys.stderr)
+        if stats:
+            stats.finish()
+        return errors
+
+    source_name = "<stdin>" if input_file_x_path == STDIN_SOURCE_PATH else input_file_x_path
+    compiler = Compiler(
+        BytesSource(source_bytes, name=source_name),
+        output_file_cpp_path,
+        optimization_level=optimization_level,
+        lex_workers=lex_workers,
+        stats=stats,
+    )
+    compiler.start()
+
+    if not compiler.errors:
+        try:
+            with open(output_file_cpp_path, "r", encoding="utf-8") as cpp_file:
+                cache.store(key, cpp_file.read())
+        except OSError:
+            # The cache is only an accelerator, a full disk or a read-only home must not fail the compile
+            pass
+    return compiler.errors
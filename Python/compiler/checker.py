@@ -0,0 +1,16 @@
+from typing import Iterator
+from .core import Core
+from .ir import IRInstruction
+from .source import Source
+
+
+# Runs the front end only: lexing, line recognition and resolution with its type checks. Every line is
+# checked, so all errors of the program end up in `errors`, not just the first one.
+class Checker(Core):
+
+    def __init__(self, input_file_x_path: str | Source, quiet: bool = True) -> None:
+        super().__init__(input_file_x_path, quiet=quiet)
+
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        for _ in instructions:
+            pass
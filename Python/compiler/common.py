@@ -1,5 +1,6 @@
-from enum import Enum
-from typing import Any
+from array import array
+from enum import Enum, IntEnum
+from typing import Any, Callable, Dict, Iterator
 
 
 # WordType
@@ -21,6 +22,8 @@ class WordTypeEnum(Enum):
 
 
 class WordDetail:
+    __slots__ = ("word_type", "detail", "word")
+
     word_type: WordTypeEnum
     detail: Any | None
     word: str
@@ -33,6 +36,8 @@ class WordDetail:
 
 # WordType - Const
 class ConstWordTypeDetail:
+    __slots__ = ("const_name", "const_type", "is_known")
+
     const_name: str
     const_type: str
     is_known: bool
@@ -51,12 +56,108 @@ class ConstWordTypeKnownTypesEnum(Enum):
 
 # WordType - Reserved
 class ReservedWordTypeDetail:
+    __slots__ = ("word_in_cpp",)
+
     word_in_cpp: str | None
 
     def __init__(self, word_in_cpp: str) -> None:
         self.word_in_cpp = word_in_cpp
 
 
+# TokenKind
+class TokenKindEnum(IntEnum):
+    COMMENT = WordTypeEnum.COMMENT.value
+    VARIABLE_NAME = WordTypeEnum.VARIABLE_NAME.value
+
+    CONST_STRING = WordTypeEnum.CONST.value + 1
+    CONST_NUM_INT = WordTypeEnum.CONST.value + 2
+    CONST_NUM_FLOAT = WordTypeEnum.CONST.value + 3
+
+    OPERATOR_ASSIGNMENT_EQUALS = WordTypeEnum.OPERATOR_ASSIGNMENT_EQUALS.value
+    OPERATOR_ARITHMETIC_ADDITION = WordTypeEnum.OPERATOR_ARITHMETIC_ADDITION.value
+    OPERATOR_ARITHMETIC_SUBSTRACTION = WordTypeEnum.OPERATOR_ARITHMETIC_SUBSTRACTION.value
+
+    IO_OUTPUT = WordTypeEnum.IO_OUTPUT.value
+    IO_INPUT_INT = WordTypeEnum.IO_INPUT_INT.value
+
+
+# Token - Stream
+# Tokens of `source` packed as kind codes plus `[start, end)` offsets into it
+class TokenStream:
+    __slots__ = ("source", "kinds", "starts", "ends")
+
+    source: str
+    kinds: array
+    starts: array
+    ends: array
+
+    def __init__(
+        self,
+        source: str,
+        kinds: array | None = None,
+        starts: array | None = None,
+        ends: array | None = None,
+    ) -> None:
+        # Already lexed arrays, e.g. from a lexer process, can be attached to their source text
+        self.source = source
+        self.kinds = array("H") if kinds is None else kinds
+        self.starts = array("I") if starts is None else starts
+        self.ends = array("I") if ends is None else ends
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def append(self, kind: int, start: int, end: int) -> None:
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def view(self, begin: int = 0, end: int | None = None) -> "TokenView":
+        return TokenView(self, begin, len(self.kinds) if end is None else end)
+
+
+# Read-only window on a `TokenStream`, indexed from the first token of the window
+class TokenView:
+    __slots__ = ("stream", "begin", "end")
+
+    stream: TokenStream
+    begin: int
+    end: int
+
+    def __init__(self, stream: TokenStream, begin: int, end: int) -> None:
+        self.stream = stream
+        self.begin = begin
+        self.end = end
+
+    def __len__(self) -> int:
+        return self.end - self.begin
+
+    def __getitem__(self, index: int) -> WordDetail:
+        return WordDetail(
+            word_type=self.word_type(index),
+            word=self.word(index),
+            word_detail=self.detail(index),
+        )
+
+    def __iter__(self) -> Iterator[WordDetail]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def kind(self, index: int) -> int:
+        return self.stream.kinds[self.begin + index]
+
+    def word(self, index: int) -> str:
+        stream = self.stream
+        position = self.begin + index
+        return stream.source[stream.starts[position] : stream.ends[position]]
+
+    def word_type(self, index: int) -> WordTypeEnum:
+        return TOKEN_KIND_WORD_TYPES[self.stream.kinds[self.begin + index]]
+
+    def detail(self, index: int) -> Any | None:
+        return TOKEN_KIND_DETAILS.get(self.stream.kinds[self.begin + index])
+
+
 # LineAction
 class LineActionTypeEnum(Enum):
     SET_VARIABLE = 100
@@ -65,42 +166,163 @@ class LineActionTypeEnum(Enum):
 
 
 class LineActionDetail:
+    __slots__ = ("line_action_type", "line_word_details", "line_number")
+
     line_action_type: LineActionTypeEnum
-    line_word_details: list[WordDetail]
+    line_word_details: TokenView
+    line_number: int
 
-    def __init__(self, line_action_type: LineActionTypeEnum, line_word_details: list[WordDetail]) -> None:
+    def __init__(
+        self,
+        line_action_type: LineActionTypeEnum,
+        line_word_details: TokenView,
+        line_number: int = 0,
+    ) -> None:
         self.line_action_type = line_action_type
         self.line_word_details = line_word_details
+        self.line_number = line_number
+
+
+# LineAction - Recognizer
+class LineActionTableNode:
+    __slots__ = ("children", "exact_action_type", "prefix_action_type")
+
+    children: Dict[int, "LineActionTableNode"]
+    exact_action_type: LineActionTypeEnum | None
+    prefix_action_type: LineActionTypeEnum | None
+
+    def __init__(self) -> None:
+        self.children = {}
+        self.exact_action_type = None
+        self.prefix_action_type = None
+
+
+# Prefix trie over the token kinds of a line, built from the `WordTypeEnum` sequence of each statement form.
+# An exact form wins over a prefix form, and the longest matching prefix form wins over shorter ones.
+class LineActionTable:
+    __slots__ = ("__root",)
+
+    def __init__(self) -> None:
+        self.__root = LineActionTableNode()
+
+    def register(
+        self,
+        word_types: tuple[WordTypeEnum, ...],
+        line_action_type: LineActionTypeEnum,
+        is_prefix: bool = False,
+    ) -> None:
+        nodes = [self.__root]
+        for word_type in word_types:
+            nodes = [
+                node.children.setdefault(kind, LineActionTableNode())
+                for node in nodes
+                for kind in WORD_TYPE_TOKEN_KINDS[word_type]
+            ]
+
+        for node in nodes:
+            if is_prefix:
+                node.prefix_action_type = line_action_type
+            else:
+                node.exact_action_type = line_action_type
+
+    def match(self, tokens: TokenView) -> LineActionTypeEnum | None:
+        kinds = tokens.stream.kinds
+        node = self.__root
+        line_action_type = None
+        for index in range(tokens.begin, tokens.end):
+            if node.prefix_action_type:
+                line_action_type = node.prefix_action_type
+
+            node = node.children.get(kinds[index])
+            if node is None:
+                return line_action_type
+
+        return node.exact_action_type or node.prefix_action_type or line_action_type
 
 
 # Symbol
-class SymbolTypeEnum(Enum):
-    VARIABLE = 1
+# Declared types are kept per slot as an index into this tuple
+SYMBOL_VARIABLE_TYPES = tuple(type_enum.value for type_enum in ConstWordTypeKnownTypesEnum)
+SYMBOL_VARIABLE_TYPE_CODES: Dict[str, int] = {variable_type: code for code, variable_type in enumerate(SYMBOL_VARIABLE_TYPES)}
+
+
+# Every variable name is interned once, when it is declared, and gets the next slot index. Everything
+# after the front end addresses variables by slot; names are only kept for error messages and codegen.
+class SymbolTable:
+    __slots__ = ("slots", "names", "types")
 
+    slots: Dict[str, int]
+    names: list[str]
+    types: array
 
-class SymbolVariableDetail:
-    variable_value: Any | None
-    variable_type: str
+    def __init__(self) -> None:
+        self.slots = {}
+        self.names = []
+        self.types = array("B")
 
-    def __init__(self, variable_type: str, variable_value: Any | None = None) -> None:
-        self.variable_value = variable_value
-        self.variable_type = variable_type
+    def __len__(self) -> int:
+        return len(self.names)
 
+    def slot(self, name: str) -> int | None:
+        return self.slots.get(name)
 
-class SymbolDetail:
-    symbol_name: str
-    symbol_type: SymbolTypeEnum
-    type_detail: SymbolVariableDetail | None
+    def type_of(self, slot: int) -> str:
+        return SYMBOL_VARIABLE_TYPES[self.types[slot]]
+
+    def declare(self, name: str, variable_type: str) -> int:
+        slot = len(self.names)
+        self.slots[name] = slot
+        self.names.append(name)
+        self.types.append(SYMBOL_VARIABLE_TYPE_CODES[variable_type])
+        return slot
+
+    def truncate(self, count: int) -> None:
+        # Forgets every slot from `count` on, i.e. the latest declarations
+        for name in self.names[count:]:
+            del self.slots[name]
+        del self.names[count:]
+        del self.types[count:]
+
+
+# Error
+class ErrorDetail:
+    __slots__ = ("error_type", "message_detail", "line_number", "word", "source_name")
+
+    error_type: str
+    message_detail: str
+    line_number: int | None
+    word: str | None
+    source_name: str | None
 
     def __init__(
         self,
-        symbol_name: str,
-        symbol_type: SymbolTypeEnum,
-        type_detail: SymbolVariableDetail | None = None,
+        error_type: str,
+        message_detail: str = "",
+        line_number: int | None = None,
+        word: str | None = None,
+        source_name: str | None = None,
     ) -> None:
-        self.symbol_name = symbol_name
-        self.symbol_type = symbol_type
-        self.type_detail = type_detail
+        self.error_type = error_type
+        self.message_detail = message_detail
+        self.line_number = line_number
+        self.word = word
+        self.source_name = source_name
+
+    def __str__(self) -> str:
+        if self.line_number is None:
+            return f"{self.error_type}: {self.message_detail}"
+
+        error_message = f"{self.error_type} Error in line `{self.line_number}` "
+        if self.word is not None:
+            error_message += f"- word `{self.word}`"
+
+        if self.message_detail:
+            error_message += f": {self.message_detail}"
+
+        return error_message
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
 
 
 # Defines
@@ -123,15 +345,46 @@ OPERATORS = {
     "-": WordDetail(word_type=WordTypeEnum.OPERATOR_ARITHMETIC_SUBSTRACTION, word="-"),
 }
 
-LINE_ACTION_STATIC_EXPRESSIONS = {
-    f"{WordTypeEnum.IO_INPUT_INT.value}{WordTypeEnum.VARIABLE_NAME.value}": LineActionTypeEnum.IO_INPUT_INT,  # in a
+COMMENT_WORD = "//"
+
+CONST_WORD_TYPE_DETAILS = {
+    const_type: ConstWordTypeDetail(const_name=const_type.value, const_type=const_type.value, is_known=True)
+    for const_type in ConstWordTypeKnownTypesEnum
 }
-LINE_ACTION_DYNAMIC_EXPRESSIONS = {
-    f"{WordTypeEnum.IO_OUTPUT.value}": LineActionTypeEnum.IO_OUTPUT,  # out a+b-2...
-    f"{WordTypeEnum.VARIABLE_NAME.value}{WordTypeEnum.OPERATOR_ASSIGNMENT_EQUALS.value}": LineActionTypeEnum.SET_VARIABLE,  # a = 5+9-b...
+
+CONST_TOKEN_KINDS = {
+    ConstWordTypeKnownTypesEnum.STRING: TokenKindEnum.CONST_STRING,
+    ConstWordTypeKnownTypesEnum.NUM_INT: TokenKindEnum.CONST_NUM_INT,
+    ConstWordTypeKnownTypesEnum.NUM_FLOAT: TokenKindEnum.CONST_NUM_FLOAT,
 }
 
-COMMENT_WORD = "//"
+# Value type of every constant token kind, so a constant's type is known from its kind alone
+CONST_TOKEN_KIND_TYPES: Dict[int, str] = {kind.value: const_type.value for const_type, kind in CONST_TOKEN_KINDS.items()}
+
+RESERVED_WORD_TOKEN_KINDS = {word: TokenKindEnum(detail.word_type.value) for word, detail in RESERVED_WORDS.items()}
+OPERATOR_TOKEN_KINDS = {word: TokenKindEnum(detail.word_type.value) for word, detail in OPERATORS.items()}
+
+ARITHMETIC_OPERATOR_TOKEN_KINDS = frozenset(
+    (
+        TokenKindEnum.OPERATOR_ARITHMETIC_ADDITION,
+        TokenKindEnum.OPERATOR_ARITHMETIC_SUBSTRACTION,
+    )
+)
+
+TOKEN_KIND_WORD_TYPES: Dict[int, WordTypeEnum] = {
+    **{kind.value: WordTypeEnum(kind.value) for kind in TokenKindEnum if kind not in CONST_TOKEN_KINDS.values()},
+    **{kind.value: WordTypeEnum.CONST for kind in CONST_TOKEN_KINDS.values()},
+}
+
+WORD_TYPE_TOKEN_KINDS: Dict[WordTypeEnum, list[int]] = {word_type: [] for word_type in WordTypeEnum}
+for kind, word_type in TOKEN_KIND_WORD_TYPES.items():
+    WORD_TYPE_TOKEN_KINDS[word_type].append(kind)
+
+# Shared detail instances, so tokens never allocate their own
+TOKEN_KIND_DETAILS: Dict[int, Any] = {
+    **{kind.value: CONST_WORD_TYPE_DETAILS[const_type] for const_type, kind in CONST_TOKEN_KINDS.items()},
+    **{RESERVED_WORD_TOKEN_KINDS[word].value: detail.detail for word, detail in RESERVED_WORDS.items()},
+}
 
 NUMERIC_TYPES = [
     type_enum.value
@@ -140,3 +393,25 @@ NUMERIC_TYPES = [
         ConstWordTypeKnownTypesEnum.NUM_INT,
     )
 ]
+
+CONST_VALUE_PARSERS: Dict[str, Callable[[str], Any]] = {
+    ConstWordTypeKnownTypesEnum.STRING.value: lambda word: word[1:-1],
+    ConstWordTypeKnownTypesEnum.NUM_INT.value: int,
+    ConstWordTypeKnownTypesEnum.NUM_FLOAT.value: float,
+}
+
+LINE_ACTIONS = LineActionTable()
+LINE_ACTIONS.register(
+    (WordTypeEnum.IO_INPUT_INT, WordTypeEnum.VARIABLE_NAME),
+    LineActionTypeEnum.IO_INPUT_INT,
+)  # in a
+LINE_ACTIONS.register(
+    (WordTypeEnum.IO_OUTPUT,),
+    LineActionTypeEnum.IO_OUTPUT,
+    is_prefix=True,
+)  # out a+b-2...
+LINE_ACTIONS.register(
+    (WordTypeEnum.VARIABLE_NAME, WordTypeEnum.OPERATOR_ASSIGNMENT_EQUALS),
+    LineActionTypeEnum.SET_VARIABLE,
+    is_prefix=True,
+)  # a = 5+9-b...
@@ -1,6 +1,11 @@
-from typing import Iterator
+import os
+import tempfile
+from typing import BinaryIO, Callable, Dict, Iterator, TextIO, TypeVar
 from .common import *
 from .core import Core
+from .ir import *
+from .source import Source
+from .stats import PhaseStats
 
 
 BASE_CPP_CODE = """
@@ -15,202 +20,200 @@ int main()
 }}
 """
 
+CPP_BODY_MARKER = "\0"
+CPP_PROLOGUE, CPP_EPILOGUE = BASE_CPP_CODE.format(CPP_BODY_MARKER).split(CPP_BODY_MARKER)
 
-class Compiler(Core):
-
-    def __init__(self, input_file_x_path: str, output_file_cpp_path: str) -> None:
-        super().__init__(input_file_x_path)
-        self.__output_file_cpp_path: str = output_file_cpp_path
-
-    def _handle(self, line_details: Iterator[LineActionDetail]):
-        compiled_text = self.__compile(line_details)
+OUTPUT_BUFFER_SIZE = 1 << 20
 
-        if not self._is_error_thrown:
-            self.__save_compiled_file(compiled_text, self.__output_file_cpp_path)
+T = TypeVar("T")
 
-    def __compile(self, line_details: Iterator[LineActionDetail]) -> str:
-        compiled_text = ""
-        for line_detail in line_details:
-            compiled_text += "\t"
 
-            if line_detail.line_action_type == LineActionTypeEnum.SET_VARIABLE:
-                compile_line_result = self.__compile_set_variable(line_detail)
-            elif line_detail.line_action_type == LineActionTypeEnum.IO_OUTPUT:
-                compile_line_result = self.__compile_output_variable(line_detail)
-            elif line_detail.line_action_type == LineActionTypeEnum.IO_INPUT_INT:
-                compile_line_result = self.__compile_input_int(line_detail)
+def _default_file_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
 
-            if compile_line_result:
-                compiled_text += compile_line_result
-            compiled_text += "\n"
 
-        return BASE_CPP_CODE.format(compiled_text)
+# `mkstemp` creates private files, so the output gets the mode a plain `open()` would give it
+OUTPUT_FILE_MODE = _default_file_mode()
 
-    def __compile_input_int(self, line_detail: LineActionDetail) -> str:
-        input_command_detail: ReservedWordTypeDetail = line_detail.line_word_details[0].detail
-        input_command = input_command_detail.word_in_cpp
 
-        variable_name = line_detail.line_word_details[1].word
+class AbortedSaveError(Exception):
+    pass
 
-        symbol = self._symbol_table.get(variable_name)
-        symbol_exists = False
-        if symbol:
-            if symbol.symbol_type != SymbolTypeEnum.VARIABLE:
-                self._print_error("TypeError", f"Cannot use '{variable_name}': is not variable")
-                return
-
-            symbol_exists = True
 
+def save_file_atomically(output_path: str, write: Callable[[TextIO | BinaryIO], T], is_binary: bool = False) -> T:
+    # Written next to the target and renamed over it, so a failed compile never leaves partial output.
+    # `write` may raise `AbortedSaveError` to drop the output, e.g. after a compile error.
+    output_directory = os.path.dirname(os.path.abspath(output_path))
+    temp_file_descriptor, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(output_path)}.",
+        suffix=".tmp",
+        dir=output_directory,
+    )
+    try:
+        if is_binary:
+            output_file = open(temp_file_descriptor, "wb", buffering=OUTPUT_BUFFER_SIZE)
         else:
-            symbol = SymbolDetail(
-                symbol_type=SymbolTypeEnum.VARIABLE,
-                symbol_name=variable_name,
-                type_detail=SymbolVariableDetail(
-                    variable_type=ConstWordTypeKnownTypesEnum.NUM_INT.value,
-                    variable_value=None,
-                ),
-            )
-
-        if symbol_exists and symbol.type_detail.variable_type not in NUMERIC_TYPES:
-            self._print_error("TypeError", f"Cannot use '{variable_name}': is not numeric type")
-            return
-
-        if symbol_exists:
-            return f"{input_command} {variable_name};"
-        else:
-            self._symbol_table[variable_name] = symbol
-            return f"{symbol.type_detail.variable_type} {variable_name};\n" + f"\t{input_command} {variable_name};"
-
-    def __compile_output_variable(self, line_detail: LineActionDetail) -> str:
-        output_command_detail: ReservedWordTypeDetail = line_detail.line_word_details[0].detail
-        output_command = output_command_detail.word_in_cpp
-
-        variable_value = ""
-        variable_type = None
-        word_must_be_operator = False
-        for word_detail in line_detail.line_word_details[1:]:
-            word_variable_type = None
-            if word_must_be_operator and word_detail.word_type.name.startswith("OPERATOR_ARITHMETIC"):
-                word_must_be_operator = False
-                variable_value += f"{word_detail.word} "
-                continue
-
-            elif word_detail.word_type == WordTypeEnum.CONST:
-                variable_type_detail: ConstWordTypeDetail = word_detail.detail
-                word_variable_type = variable_type_detail.const_type
-                if variable_type and word_variable_type != variable_type:
-                    self._print_error(
-                        "TypeError",
-                        f"Cannot use operators between '{word_variable_type}' and '{variable_type}': is not supported",
-                    )
-                    return
-
-            elif word_detail.word_type == WordTypeEnum.VARIABLE_NAME:
-                word_symbol = self._symbol_table.get(word_detail.word)
-                if not word_symbol:
-                    self._print_error("ValueError", f"variable '{word_detail.word}' is not defined")
-                    return
-
-                if word_symbol.symbol_type != SymbolTypeEnum.VARIABLE:
-                    raise ValueError(f"'{word_detail.word}' is not a variable")
-
-                word_variable_type = word_symbol.type_detail.variable_type
-                if variable_type and word_variable_type != variable_type:
-                    self._print_error(
-                        "ValueError",
-                        f"Cannot use operators between '{word_variable_type}' and '{variable_type}': is not supported",
-                    )
-                    return
-
-            else:
-                self._print_error("SyntaxError")
-                return
+            output_file = open(temp_file_descriptor, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE)
+        with output_file:
+            result = write(output_file)
 
-            variable_value += f"{word_detail.word} "
-            variable_type = word_variable_type
-            word_must_be_operator = True
+        os.chmod(temp_path, OUTPUT_FILE_MODE)
+        os.replace(temp_path, output_path)
+        return result
 
-        variable_value = variable_value.strip()
-        return f"{output_command} {variable_value};"
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
 
-    def __compile_set_variable(self, line_detail: LineActionDetail) -> str:
-        variable_name = line_detail.line_word_details[0].word
 
-        variable_value = ""
-        variable_type = None
+INPUT_COMMAND_CPP: str = TOKEN_KIND_DETAILS[TokenKindEnum.IO_INPUT_INT].word_in_cpp
+OUTPUT_COMMAND_CPP: str = TOKEN_KIND_DETAILS[TokenKindEnum.IO_OUTPUT].word_in_cpp
 
-        symbol = self._symbol_table.get(variable_name)
-        symbol_exists = False
-        if symbol:
-            if symbol.symbol_type != SymbolTypeEnum.VARIABLE:
-                self._print_error("TypeError", f"Cannot use '{variable_name}': is not variable")
-                return
 
-            variable_type = symbol.type_detail.variable_type
-            symbol_exists = True
+class Compiler(Core):
 
-        else:
-            symbol = SymbolDetail(
-                symbol_type=SymbolTypeEnum.VARIABLE,
-                symbol_name=variable_name,
-                type_detail=SymbolVariableDetail(variable_type=variable_type, variable_value=variable_value),
+    def __init__(
+        self,
+        input_file_x_path: str | Source,
+        output_file_cpp_path: str,
+        optimization_level: int = 0,
+        quiet: bool = False,
+        lex_workers: int = 1,
+        stats: PhaseStats | None = None,
+    ) -> None:
+        super().__init__(input_file_x_path, optimization_level, quiet, lex_workers, stats)
+        self.__output_file_cpp_path: str = output_file_cpp_path
+        self.__temp_expressions: Dict[int, str] = {}
+        self.__unoptimized_size: int = 0
+
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        if self._stats:
+            compiled_size = self._stats.call(
+                "write",
+                self.__save_compiled_file,
+                instructions,
+                self.__output_file_cpp_path,
             )
+        else:
+            compiled_size = self.__save_compiled_file(instructions, self.__output_file_cpp_path)
 
-        word_must_be_operator = False
-        for word_detail in line_detail.line_word_details[2:]:
-            word_variable_type = None
-            if word_must_be_operator and word_detail.word_type.name.startswith("OPERATOR_ARITHMETIC"):
-                word_must_be_operator = False
-                variable_value += f"{word_detail.word} "
-                continue
+        if compiled_size is not None:
+            self.__print_optimization_report(compiled_size)
 
-            elif word_detail.word_type == WordTypeEnum.CONST:
-                variable_type_detail: ConstWordTypeDetail = word_detail.detail
-                word_variable_type = variable_type_detail.const_type
-                if variable_type and word_variable_type != variable_type:
-                    self._print_error(
-                        "TypeError",
-                        f"Cannot assign '{variable_name}' as '{word_variable_type}': is already declared as '{variable_type}'",
-                    )
-                    return
-
-            elif word_detail.word_type == WordTypeEnum.VARIABLE_NAME:
-                word_symbol = self._symbol_table.get(word_detail.word)
-                if not word_symbol:
-                    raise ValueError(f"variable '{word_detail.word}' is not defined")
-
-                if word_symbol.symbol_type != SymbolTypeEnum.VARIABLE:
-                    raise ValueError(f"'{word_detail.word}' is not a variable")
-
-                word_variable_type = word_symbol.type_detail.variable_type
-                if variable_type and word_variable_type != variable_type:
-                    self._print_error(
-                        "TypeError",
-                        f"Cannot assign '{variable_name}' as '{word_variable_type}': is already declared as '{variable_type}'",
-                    )
-                    return
-            else:
-                self._print_error("SyntaxError")
-                return
+    def _optimize(self, instructions: list[IRInstruction]) -> list[IRInstruction]:
+        # Sizing the unoptimized C++ is a whole extra codegen pass, so the report only compares sizes with `--stats`
+        if self._stats and not self._is_error_thrown:
+            self.__unoptimized_size = self._stats.call("measure", self.__write_compiled, instructions, None)
+        return super()._optimize(instructions)
 
-            variable_value += f"{word_detail.word} "
-            variable_type = word_variable_type
-            word_must_be_operator = True
-
-        variable_value = variable_value.strip()
-        symbol.type_detail.variable_value = variable_value
-        symbol.type_detail.variable_type = variable_type
-        self._symbol_table[variable_name] = symbol
+    def __print_optimization_report(self, compiled_size: int):
+        if not self.__unoptimized_size:
+            self._print_optimization_report()
+            return
 
-        if symbol_exists:
-            return f"{variable_name} = {variable_value};"
-        else:
-            return f"{variable_type} {variable_name} = {variable_value};"
+        shrink_percent = 100 * (self.__unoptimized_size - compiled_size) / self.__unoptimized_size
+        self._print_optimization_report(
+            f"C++ output {self.__unoptimized_size} -> {compiled_size} bytes ({shrink_percent:.1f}% smaller)"
+        )
+
+    def __compile(self, instructions: Iterator[IRInstruction]) -> Iterator[str]:
+        # Compared in order of frequency: hashing an enum member for a dict lookup is a Python-level call
+        compile_binary_operation = self.__compile_binary_operation
+        for instruction in instructions:
+            instruction_type = instruction.instruction_type
+            if instruction_type == IRInstructionTypeEnum.BINARY_OPERATION:
+                compile_line_result = compile_binary_operation(instruction)
+            elif instruction_type == IRInstructionTypeEnum.ASSIGN:
+                compile_line_result = self.__compile_assign(instruction)
+            elif instruction_type == IRInstructionTypeEnum.OUTPUT:
+                compile_line_result = self.__compile_output_variable(instruction)
+            else:
+                compile_line_result = self.__compile_input_int(instruction)
+            if compile_line_result is None:
+                continue
 
-    def __save_compiled_file(self, compiled_text: str, output_cpp_path: str):
+            yield f"\t{compile_line_result}\n"
+
+    def _compile_statements(self, instructions: Iterator[IRInstruction]) -> str:
+        return "".join(self.__compile(instructions))
+
+    def __write_compiled(self, instructions: Iterator[IRInstruction], output_file: TextIO | None) -> int:
+        # Streams the program statement by statement; without `output_file` it only measures the output
+        compiled_size = len(CPP_PROLOGUE) + len(CPP_EPILOGUE)
+        if output_file:
+            output_file.write(CPP_PROLOGUE)
+
+        compiled_lines = self.__compile(instructions)
+        if self._stats and output_file:
+            compiled_lines = self._stats.timed("codegen", compiled_lines)
+
+        for compiled_line in compiled_lines:
+            compiled_size += len(compiled_line)
+            if output_file:
+                output_file.write(compiled_line)
+
+        if output_file:
+            output_file.write(CPP_EPILOGUE)
+        return compiled_size
+
+    def __operand_text(self, operand: IROperand) -> str:
+        if operand.operand_type == IROperandTypeEnum.TEMP:
+            return self.__temp_expressions.pop(operand.index)
+        elif operand.operand_type == IROperandTypeEnum.CONST:
+            return operand.word
+        return operand.name
+
+    def __compile_store(self, target: IRVariable | IRTemp, value: str, is_declaration: bool) -> str | None:
+        # Temporaries are read once, so their expression is inlined where it is used
+        if target.operand_type == IROperandTypeEnum.TEMP:
+            self.__temp_expressions[target.index] = value
+            return None
+
+        if is_declaration:
+            return f"{target.value_type} {target.name} = {value};"
+        return f"{target.name} = {value};"
+
+    def __compile_assign(self, instruction: IRAssign) -> str | None:
+        value = self.__operand_text(instruction.source)
+        return self.__compile_store(instruction.target, value, instruction.is_declaration)
+
+    def __compile_binary_operation(self, instruction: IRBinaryOperation) -> str | None:
+        left = self.__operand_text(instruction.left)
+        right = self.__operand_text(instruction.right)
+        value = f"{left} {instruction.operator.value} {right}"
+        return self.__compile_store(instruction.target, value, instruction.is_declaration)
+
+    def __compile_input_int(self, instruction: IRInput) -> str:
+        variable_name = instruction.target.name
+        if instruction.is_declaration:
+            return f"{instruction.target.value_type} {variable_name};\n" + f"\t{INPUT_COMMAND_CPP} {variable_name};"
+        return f"{INPUT_COMMAND_CPP} {variable_name};"
+
+    def __compile_output_variable(self, instruction: IROutput) -> str:
+        return f"{OUTPUT_COMMAND_CPP} {self.__operand_text(instruction.source)};"
+
+    def __write_compiled_file(self, instructions: Iterator[IRInstruction], output_file: TextIO) -> int:
+        compiled_size = self.__write_compiled(instructions, output_file)
+        if self._is_error_thrown:
+            raise AbortedSaveError()
+        return compiled_size
+
+    def __save_compiled_file(self, instructions: Iterator[IRInstruction], output_cpp_path: str) -> int | None:
         try:
-            with open(output_cpp_path, "w", encoding="utf-8") as output_file:
-                output_file.write(compiled_text)
-        except Exception as ex:
-            self.__input_file.close()
-            print(f"Error save file to '{output_cpp_path}' : {ex}")
+            return save_file_atomically(
+                output_cpp_path,
+                lambda output_file: self.__write_compiled_file(instructions, output_file),
+            )
+        except AbortedSaveError:
+            return None
+        except OSError as ex:
+            self.__report_save_error(output_cpp_path, ex)
+            return None
+
+    def __report_save_error(self, output_cpp_path: str, ex: Exception):
+        self._is_error_thrown = True
+        self._errors.append(ErrorDetail("IOError", f"Cannot save file to '{output_cpp_path}': {ex}"))
+        self._print(f"Error save file to '{output_cpp_path}' : {ex}")
@@ -1,170 +1,436 @@
+import sys
 from abc import ABC, abstractmethod
-from io import TextIOWrapper
-import re
 from typing import Dict, Iterator
+from .artifact import ArtifactError, ArtifactSource
 from .common import *
+from .ir import *
+from .lexer import LINE_ACTION_TYPES, LINE_CODE_INVALID_WORD, LINE_CODE_UNKNOWN_ACTION, LexedBlockDetail, lex_blocks
+from .optimizer import OptimizationReport, optimize
+from .source import Source, open_source
+from .stats import PhaseStats
 
-REGEX_VARIABLE_NAME = "^[a-zA-Z_][a-zA-Z0-9_]*$"
-REGEX_CONST_STRING = '^".*"$'
-REGEX_CONST_INTEGER = "^[-+]?[0-9]*$"
-REGEX_CONST_FLOAT = "^[-+]?[0-9]*\.?[0-9]+$"
+TOKEN_KIND_IR_OPERATORS: Dict[int, IROperatorEnum] = {
+    TokenKindEnum.OPERATOR_ARITHMETIC_ADDITION: IROperatorEnum.ADDITION,
+    TokenKindEnum.OPERATOR_ARITHMETIC_SUBSTRACTION: IROperatorEnum.SUBSTRACTION,
+}
 
 
 class Core(ABC):
 
-    def __init__(self, input_file_x_path: str) -> None:
+    def __init__(
+        self,
+        input_file_x_path: str | Source,
+        optimization_level: int = 0,
+        quiet: bool = False,
+        lex_workers: int = 1,
+        stats: PhaseStats | None = None,
+    ) -> None:
         self._is_error_thrown: bool = False
+        self._errors: list[ErrorDetail] = []
+        # Quiet cores only collect their errors in `_errors`, e.g. when running in a worker process
+        self._quiet: bool = quiet
+        self._optimization_level: int = optimization_level
+        self._lex_workers: int = lex_workers
+        self._stats: PhaseStats | None = stats
+        self._optimization_report: OptimizationReport | None = None
         self.__cursor_current_line_number: int = 1
         self.__cursor_current_word: str = ""
 
-        self.__input_file: TextIOWrapper = None
-        self._symbol_table: Dict[str, SymbolDetail] = {}
-
-        self.__input_file_x_path = input_file_x_path
-
-        self._open_file()
-
-    def _open_file(self) -> None:
-        if self.__input_file:
-            self.__input_file.close()
-
-        self.__input_file = open(self.__input_file_x_path, "r")
-
-    def _read_lines(self) -> Iterator[str]:
-        line_text = self.__input_file.readline()
-        while line_text:
-            if line_text.strip():
-                yield line_text.strip()
-            self.__cursor_current_line_number += 1
-            line_text = self.__input_file.readline()
-
-    def __split_words(self, text: str) -> Iterator[str]:
-        split_pattern = " |" + "|".join([f"(\\{k})" for k in OPERATORS.keys()])
-        words: list[str] = re.split(split_pattern, text)
-
-        for word in words:
-            if word and word.strip():
-                self.__cursor_current_word = word
-                yield word.strip()
-
-    def __lex_word(self, word: str) -> WordDetail:
-        if word == COMMENT_WORD:
-            return WordDetail(word_type=WordTypeEnum.COMMENT, word=COMMENT_WORD)
-
-        reserved_word_detail = RESERVED_WORDS.get(word)
-        if reserved_word_detail != None:
-            return reserved_word_detail
-
-        operator_word_detail = OPERATORS.get(word)
-        if operator_word_detail != None:
-            return operator_word_detail
-
-        is_variable_name = re.match(REGEX_VARIABLE_NAME, word)
-        if is_variable_name:
-            return WordDetail(word_type=WordTypeEnum.VARIABLE_NAME, word=word)
-
-        is_string_value = re.match(REGEX_CONST_STRING, word)
-        if is_string_value:
-            return WordDetail(
-                word_type=WordTypeEnum.CONST,
-                word=word,
-                word_detail=ConstWordTypeDetail(
-                    const_name=ConstWordTypeKnownTypesEnum.STRING.value,
-                    const_type=ConstWordTypeKnownTypesEnum.STRING.value,
-                    is_known=True,
-                ),
-            )
+        # Slots are handed out in declaration order, so the symbols can be rolled back to any statement
+        self._symbol_table: SymbolTable = SymbolTable()
+        # IR operand of every variable, by slot
+        self.__variables: list[IRVariable] = []
+        # Operands never change once built, so every constant word and every temporary is built once
+        self.__consts: Dict[str, IRConst] = {}
+        self.__temps: Dict[tuple[str, int], IRTemp] = {}
 
-        is_integer_value = re.match(REGEX_CONST_INTEGER, word)
-        if is_integer_value:
-            return WordDetail(
-                word_type=WordTypeEnum.CONST,
-                word=word,
-                word_detail=ConstWordTypeDetail(
-                    const_name=ConstWordTypeKnownTypesEnum.NUM_INT.value,
-                    const_type=ConstWordTypeKnownTypesEnum.NUM_INT.value,
-                    is_known=True,
-                ),
-            )
+        # A path, `-` for stdin, or any `Source` such as `StringSource` for in-memory programs
+        self.__source: Source = open_source(input_file_x_path)
 
-        is_float_value = re.match(REGEX_CONST_FLOAT, word)
-        if is_float_value:
-            return WordDetail(
-                word_type=WordTypeEnum.CONST,
-                word=word,
-                word_detail=ConstWordTypeDetail(
-                    const_name=ConstWordTypeKnownTypesEnum.NUM_FLOAT.value,
-                    const_type=ConstWordTypeKnownTypesEnum.NUM_FLOAT.value,
-                    is_known=True,
+    def _read_blocks(self) -> Iterator[tuple[int, str]]:
+        return self.__source.read_blocks()
+
+    def __parse_lines(self) -> Iterator[LineActionDetail]:
+        # Lexing and line recognition don't depend on other lines, so they may run in `lex_workers`
+        # processes; their per-line results are replayed here in source order, errors included.
+        stats = self._stats
+        blocks = self._read_blocks()
+        if stats:
+            blocks = stats.timed("read", blocks)
+
+        lexed_blocks = lex_blocks(blocks, self._lex_workers)
+        if stats:
+            lexed_blocks = self.__count_lexed_blocks(stats, stats.timed("lex", lexed_blocks))
+
+        for lexed_block, block_text in lexed_blocks:
+            yield from self._parse_lexed_block(lexed_block, block_text)
+
+    def __count_lexed_blocks(
+        self,
+        stats: PhaseStats,
+        lexed_blocks: Iterator[tuple[LexedBlockDetail, str]],
+    ) -> Iterator[tuple[LexedBlockDetail, str]]:
+        for lexed_block, block_text in lexed_blocks:
+            stats.count("lines", block_text.count("\n") + (not block_text.endswith("\n")))
+            stats.count("statement_lines", len(lexed_block))
+            stats.count("tokens", len(lexed_block.kinds))
+            yield lexed_block, block_text
+
+    def _parse_lexed_block(self, lexed_block: LexedBlockDetail, block_text: str) -> Iterator[LineActionDetail]:
+        token_stream = lexed_block.token_stream(block_text)
+        for index in range(len(lexed_block)):
+            line_detail = self._parse_lexed_line(lexed_block, token_stream, index)
+            if line_detail:
+                yield line_detail
+
+    def _parse_lexed_line(
+        self,
+        lexed_block: LexedBlockDetail,
+        token_stream: TokenStream,
+        index: int,
+        line_number: int | None = None,
+    ) -> LineActionDetail | None:
+        # `line_number` places a line lexed elsewhere in the source, e.g. a line that moved
+        lexed_line_number = lexed_block.line_numbers[index]
+        if line_number is None:
+            line_number = lexed_line_number
+        self.__cursor_current_line_number = line_number
+
+        line_code = lexed_block.line_codes[index]
+        line_action_type = LINE_ACTION_TYPES.get(line_code)
+        if line_action_type:
+            return LineActionDetail(
+                line_action_type=line_action_type,
+                line_word_details=TokenView(
+                    token_stream, lexed_block.line_token_begins[index], lexed_block.line_token_ends[index]
                 ),
+                line_number=line_number,
             )
+        elif line_code == LINE_CODE_INVALID_WORD:
+            self.__cursor_current_word = lexed_block.invalid_words[lexed_line_number]
+            self._print_error("SyntaxError", f"'{self.__cursor_current_word}' is not a valid word", show_word=True)
+        elif line_code == LINE_CODE_UNKNOWN_ACTION:
+            self._print_error("SyntaxError")
+        return None
+
+    def __resolve_expression(
+        self,
+        tokens: TokenView,
+        first_index: int,
+        variable_name: str | None = None,
+        variable_type: str | None = None,
+    ) -> tuple[list[IROperand], list[IROperatorEnum], str] | None:
+        # `variable_name` is the assigned variable, or None for an `out` expression. The token arrays are read
+        # by position: operators are told by their kind alone, and only names and constants are sliced out of
+        # the source.
+        stream = tokens.stream
+        kinds, starts, ends, source = stream.kinds, stream.starts, stream.ends, stream.source
+        symbol_slots = self._symbol_table.slots
+        variables = self.__variables
+        consts = self.__consts
+        operands: list[IROperand] = []
+        operators: list[IROperatorEnum] = []
+        word_must_be_operator = False
+        for position in range(tokens.begin + first_index, tokens.end):
+            kind = kinds[position]
+            if word_must_be_operator:
+                operator = TOKEN_KIND_IR_OPERATORS.get(kind)
+                if operator:
+                    word_must_be_operator = False
+                    operators.append(operator)
+                    continue
+
+            word_variable_type = CONST_TOKEN_KIND_TYPES.get(kind)
+            if word_variable_type:
+                if variable_type and word_variable_type != variable_type:
+                    self.__print_type_mismatch_error("TypeError", variable_name, word_variable_type, variable_type)
+                    return None
+
+                word = source[starts[position] : ends[position]]
+                const = consts.get(word)
+                if const is None:
+                    const = consts[word] = IRConst(word_variable_type, CONST_VALUE_PARSERS[word_variable_type](word), word)
+                operands.append(const)
+
+            elif kind == TokenKindEnum.VARIABLE_NAME:
+                word = source[starts[position] : ends[position]]
+                word_slot = symbol_slots.get(word)
+                if word_slot is None:
+                    self._print_error("ValueError", f"variable '{word}' is not defined")
+                    return None
+
+                word_variable = variables[word_slot]
+                word_variable_type = word_variable.value_type
+                if variable_type and word_variable_type != variable_type:
+                    error_type = "TypeError" if variable_name else "ValueError"
+                    self.__print_type_mismatch_error(error_type, variable_name, word_variable_type, variable_type)
+                    return None
+
+                operands.append(word_variable)
+
+            else:
+                self._print_error("SyntaxError")
+                return None
+
+            variable_type = word_variable_type
+            word_must_be_operator = True
+
+        if not operands or not word_must_be_operator:
+            self._print_error("SyntaxError")
+            return None
 
-        self._print_error("SyntaxError", f"'{word}' is not a valid word", show_word=True)
+        if variable_type not in NUMERIC_TYPES and IROperatorEnum.SUBSTRACTION in operators:
+            self._print_error(
+                "TypeError",
+                f"Cannot use operator '{IROperatorEnum.SUBSTRACTION.value}' on '{variable_type}': is not supported",
+            )
+            return None
 
-    def __lex_line(self, line: str) -> list[WordDetail]:
-        words = self.__split_words(line)
+        return operands, operators, variable_type
+
+    def __print_type_mismatch_error(
+        self,
+        error_type: str,
+        variable_name: str | None,
+        word_variable_type: str,
+        variable_type: str,
+    ):
+        if variable_name:
+            self._print_error(
+                error_type,
+                f"Cannot assign '{variable_name}' as '{word_variable_type}': is already declared as '{variable_type}'",
+            )
+        else:
+            self._print_error(
+                error_type,
+                f"Cannot use operators between '{word_variable_type}' and '{variable_type}': is not supported",
+            )
 
-        word_detail_list: list[WordDetail] = []
-        for word in words:
-            word_detail = self.__lex_word(word)
-            if not word_detail:
-                return []
+    def __chain_expression(
+        self,
+        operands: list[IROperand],
+        operators: list[IROperatorEnum],
+        target: IRVariable | None,
+        is_declaration: bool,
+        line_number: int,
+    ) -> tuple[list[IRInstruction], IROperand]:
+        # a + b - 2  ->  %0 = a + b ; target = %0 - 2
+        instructions: list[IRInstruction] = []
+        temps = self.__temps
+        left = operands[0]
+        last_index = len(operators) - 1
+        for index, operator in enumerate(operators):
+            if target and index == last_index:
+                result = target
+            else:
+                result = temps.get((left.value_type, index))
+                if result is None:
+                    result = temps[left.value_type, index] = IRTemp(left.value_type, index)
+
+            instructions.append(
+                IRBinaryOperation(
+                    result, operator, left, operands[index + 1], is_declaration and result is target, line_number
+                )
+            )
+            left = result
 
-            word_detail_list.append(word_detail)
+        return instructions, left
 
-        return word_detail_list
+    def __lower_input_int(self, line_detail: LineActionDetail) -> list[IRInstruction] | None:
+        variable_name = line_detail.line_word_details.word(1)
 
-    def __parse_line(self, line: str) -> LineActionDetail:
-        word_detail_list = self.__lex_line(line)
-        if len(word_detail_list) == 0:
-            return None
+        slot = self._symbol_table.slot(variable_name)
+        if slot is not None:
+            if self._symbol_table.type_of(slot) not in NUMERIC_TYPES:
+                self._print_error("TypeError", f"Cannot use '{variable_name}': is not numeric type")
+                return None
 
-        line_expression = "".join([str(word_detail.word_type.value) for word_detail in word_detail_list])  # a = 2  -> 104300200
+            return [IRInput(self.__variables[slot], is_declaration=False, line_number=line_detail.line_number)]
 
-        line_action_type = LINE_ACTION_STATIC_EXPRESSIONS.get(line_expression)
-        if not line_action_type:
-            for expression, action_type in LINE_ACTION_DYNAMIC_EXPRESSIONS.items():
-                if line_expression.startswith(expression):
-                    line_action_type = action_type
-                    break
+        variable = self.__declare_variable(variable_name, ConstWordTypeKnownTypesEnum.NUM_INT.value)
+        return [IRInput(variable, is_declaration=True, line_number=line_detail.line_number)]
 
-        if line_action_type:
-            return LineActionDetail(
-                line_action_type=line_action_type,
-                line_word_details=word_detail_list,
-            )
-        self._print_error("SyntaxError")
+    def __lower_output(self, line_detail: LineActionDetail) -> list[IRInstruction] | None:
+        resolved_expression = self.__resolve_expression(line_detail.line_word_details, 1)
+        if not resolved_expression:
+            return None
 
-    def __parse_lines(self) -> Iterator[LineActionDetail]:
-        lines = self._read_lines()
-        for line in lines:
-            line_detail = self.__parse_line(line)
-            if line_detail == None:
-                continue
+        operands, operators, _ = resolved_expression
+        instructions, result = self.__chain_expression(
+            operands,
+            operators,
+            target=None,
+            is_declaration=False,
+            line_number=line_detail.line_number,
+        )
+        instructions.append(IROutput(result, line_number=line_detail.line_number))
+        return instructions
+
+    def __lower_set_variable(self, line_detail: LineActionDetail) -> list[IRInstruction] | None:
+        variable_name = line_detail.line_word_details.word(0)
+
+        variable_type = None
+        slot = self._symbol_table.slot(variable_name)
+        if slot is not None:
+            variable_type = self._symbol_table.type_of(slot)
+
+        resolved_expression = self.__resolve_expression(
+            line_detail.line_word_details,
+            2,
+            variable_name=variable_name,
+            variable_type=variable_type,
+        )
+        if not resolved_expression:
+            return None
 
-            yield line_detail
+        operands, operators, variable_type = resolved_expression
+        is_declaration = slot is None
+        if is_declaration:
+            variable = self.__declare_variable(variable_name, variable_type)
+        else:
+            variable = self.__variables[slot]
+
+        if not operators:
+            return [IRAssign(variable, operands[0], is_declaration, line_number=line_detail.line_number)]
+
+        instructions, _ = self.__chain_expression(
+            operands,
+            operators,
+            target=variable,
+            is_declaration=is_declaration,
+            line_number=line_detail.line_number,
+        )
+        return instructions
+
+    def __declare_variable(self, variable_name: str, variable_type: str) -> IRVariable:
+        slot = self._symbol_table.declare(variable_name, variable_type)
+        variable = IRVariable(value_type=variable_type, name=variable_name, slot=slot)
+        self.__variables.append(variable)
+        return variable
+
+    def _rollback_declarations(self, declaration_count: int):
+        # Forgets every variable declared after the first `declaration_count` declarations
+        self._symbol_table.truncate(declaration_count)
+        del self.__variables[declaration_count:]
+
+    def _lower_line(self, line_detail: LineActionDetail) -> list[IRInstruction] | None:
+        if line_detail.line_action_type == LineActionTypeEnum.SET_VARIABLE:
+            return self.__lower_set_variable(line_detail)
+        elif line_detail.line_action_type == LineActionTypeEnum.IO_OUTPUT:
+            return self.__lower_output(line_detail)
+        elif line_detail.line_action_type == LineActionTypeEnum.IO_INPUT_INT:
+            return self.__lower_input_int(line_detail)
+
+    def __build_instructions(self, line_details: Iterator[LineActionDetail]) -> Iterator[IRInstruction]:
+        for line_detail in line_details:
+            instructions = self._lower_line(line_detail)
+            if instructions:
+                yield from instructions
 
     def start(self):
+        stats = self._stats
         try:
-            line_details = self.__parse_lines()
-            self._handle(line_details)
+            if isinstance(self.__source, ArtifactSource):
+                instructions = stats.call("load", self.__load_artifact) if stats else self.__load_artifact()
+            else:
+                instructions = self.__front_end()
+
+            if stats:
+                instructions = stats.counted("instructions", instructions, key=lambda ir: ir.instruction_type.name)
+            self._handle(instructions)
+        except ArtifactError as ex:
+            self._is_error_thrown = True
+            error = ErrorDetail("ArtifactError", str(ex), source_name=self.__source.name)
+            self._errors.append(error)
+            self._print(str(error))
         except Exception as ex:
-            print("System Error!" + str(ex))
+            self._is_error_thrown = True
+            self._errors.append(ErrorDetail("SystemError", str(ex), source_name=self.__source.name))
+            self._print("System Error!" + str(ex))
 
         finally:
-            self.__input_file.close()
+            self.__source.close()
+            if stats:
+                stats.count("symbols", len(self._symbol_table))
+                stats.count("errors", len(self._errors))
+                stats.finish()
+
+    def __front_end(self) -> Iterator[IRInstruction] | list[IRInstruction]:
+        stats = self._stats
+        line_details = self.__parse_lines()
+        if stats:
+            line_details = stats.timed("parse", line_details)
+            line_details = stats.counted("line_actions", line_details, key=lambda line: line.line_action_type.name)
+
+        instructions = self.__build_instructions(line_details)
+        if stats:
+            instructions = stats.timed("resolve", instructions)
+
+        if self._optimization_level:
+            instructions = list(instructions)
+            if stats:
+                instructions = stats.call("optimize", self._optimize, instructions)
+            else:
+                instructions = self._optimize(instructions)
+        return instructions
+
+    def __load_artifact(self) -> list[IRInstruction]:
+        # Built programs are resolved and optimized already, at the level they were built with
+        self._symbol_table, instructions = self.__source.load()
+        if self.__source.missing_source_path:
+            self._print(f"[.] '{self.__source.missing_source_path}' is missing, '{self.__source.name}' runs unchecked")
+        return instructions
+
+    def _optimize(self, instructions: list[IRInstruction]) -> list[IRInstruction]:
+        if self._is_error_thrown:
+            return instructions
+
+        optimized_instructions, self._optimization_report = optimize(instructions, self._optimization_level)
+        return optimized_instructions
+
+    def _print_optimization_report(self, message_detail: str = ""):
+        report = self._optimization_report
+        if not report:
+            return
+
+        message = (
+            f"[.] Optimized with -O{report.optimization_level}: "
+            f"removed {report.removed_instruction_count} of {report.instruction_count_before} instructions"
+        )
+        if message_detail:
+            message += f", {message_detail}"
+        self._print(message)
 
     @abstractmethod
-    def _handle(self, line_details: Iterator[LineActionDetail]):
-        raise NotImplementedError("Method `handle(line_details)` isn't implemented")
-
-    def _print_error(self, error_type: str, message_detail: str = "", show_word: bool = False):
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        raise NotImplementedError("Method `handle(instructions)` isn't implemented")
+
+    def _print(self, message: str):
+        # Status and errors go to stderr, so they never mix with a program's own output
+        if not self._quiet:
+            print(message, file=sys.stderr)
+
+    def _print_error(
+        self,
+        error_type: str,
+        message_detail: str = "",
+        show_word: bool = False,
+        line_number: int | None = None,
+    ):
         self._is_error_thrown = True
-        error_message = f"{error_type} Error in line `{self.__cursor_current_line_number}` "
-        if show_word:
-            error_message += f"- word `{self.__cursor_current_word}`"
-
-        if message_detail:
-            error_message += f": {message_detail}"
-
-        print(error_message)
+        if line_number is None:
+            line_number = self.__cursor_current_line_number
+
+        error = ErrorDetail(
+            error_type,
+            message_detail,
+            line_number=line_number,
+            word=self.__cursor_current_word if show_word else None,
+            source_name=self.__source.name,
+        )
+        self._errors.append(error)
+        self._print(str(error))
+
+    @property
+    def errors(self) -> list[ErrorDetail]:
+        return self._errors
@@ -1,220 +1,235 @@
-from typing import Iterator
+import gc
+import operator
+from collections import Counter
+from typing import Any, Callable, Dict, Iterator
 from .common import *
 from .core import Core
+from .ir import *
+from .number_input import InputError, NumberInput, open_number_input
+from .output_sink import OutputSink, open_output_sink
+from .source import Source
+from .stats import PhaseStats
 
 
-class Interpreter(Core):
+IR_OPERATOR_FUNCTIONS: Dict[IROperatorEnum, Callable[[Any, Any], Any]] = {
+    IROperatorEnum.ADDITION: operator.add,
+    IROperatorEnum.SUBSTRACTION: operator.sub,
+}
 
-    def _handle(self, line_details: Iterator[LineActionDetail]):
-        for line in self._read_lines():
-            # Just for get SyntaxErrors
-            pass
 
-        if not self._is_error_thrown:
-            self._open_file()
-            self.__run(line_details)
+def const_reader(value: Any) -> Callable[[], Any]:
+    return lambda: value
 
-        if self._is_error_thrown:
-            print("[!] Code Running Failed")
-        else:
-            print("[.] Code Runned Successfully")
-
-    def __run(self, line_details: Iterator[LineActionDetail]) -> str:
-        for line_detail in line_details:
-
-            if line_detail.line_action_type == LineActionTypeEnum.SET_VARIABLE:
-                self.__run_set_variable(line_detail)
-            elif line_detail.line_action_type == LineActionTypeEnum.IO_OUTPUT:
-                self.__run_output_variable(line_detail)
-            elif line_detail.line_action_type == LineActionTypeEnum.IO_INPUT_INT:
-                self.__run_input_int(line_detail)
-
-    def __run_input_int(self, line_detail: LineActionDetail) -> str:
-        variable_name = line_detail.line_word_details[1].word
-
-        symbol = self._symbol_table.get(variable_name)
-        symbol_exists = False
-        if symbol:
-            if symbol.symbol_type != SymbolTypeEnum.VARIABLE:
-                self._print_error("TypeError", f"Cannot use '{variable_name}': is not variable")
-                return
 
-            symbol_exists = True
+def variable_reader(values: list[Any], slot: int) -> Callable[[], Any]:
+    return lambda: values[slot]
 
-        else:
-            symbol = SymbolDetail(
-                symbol_type=SymbolTypeEnum.VARIABLE,
-                symbol_name=variable_name,
-                type_detail=SymbolVariableDetail(
-                    variable_type=ConstWordTypeKnownTypesEnum.NUM_INT.value,
-                    variable_value=None,
-                ),
-            )
-
-        if symbol_exists and symbol.type_detail.variable_type not in NUMERIC_TYPES:
-            self._print_error("TypeError", f"Cannot use '{variable_name}': is not numeric type")
-            return
-
-        input_value = None
-        input_type = None
-        while True:
-            try:
-                input_value = input(">>> Enter a number: ")
-                input_value = float(input_value)
-                input_type = ConstWordTypeKnownTypesEnum.NUM_FLOAT.value
-
-                try:
-                    input_value = int(input_value)
-                    input_type = ConstWordTypeKnownTypesEnum.NUM_INT.value
-                except Exception:
-                    pass
-
-                break
-
-            except Exception:
-                print("[!!!] Enter a valid number.")
-                continue
-
-        if symbol_exists and symbol.type_detail.variable_type != input_type:
-            self._print_error(
-                "TypeError",
-                f"Cannot assign '{variable_name}' as '{input_type}': is already declared as '{symbol.type_detail.variable_type}'",
-            )
-            return
-
-        symbol.type_detail.variable_value = input_value
-        symbol.type_detail.variable_type = input_type
-
-        self._symbol_table[variable_name] = symbol
-
-    def __run_output_variable(self, line_detail: LineActionDetail) -> str:
-        variable_value = ""
-        variable_type = None
-        word_must_be_operator = False
-        for word_detail in line_detail.line_word_details[1:]:
-            word_variable_type = None
-            if word_must_be_operator and word_detail.word_type.name.startswith("OPERATOR_ARITHMETIC"):
-                word_must_be_operator = False
-                variable_value += f"{word_detail.word} "
-                continue
-
-            elif word_detail.word_type == WordTypeEnum.CONST:
-                variable_type_detail: ConstWordTypeDetail = word_detail.detail
-                word_variable_type = variable_type_detail.const_type
-                if variable_type and word_variable_type != variable_type:
-                    self._print_error(
-                        "TypeError",
-                        f"Cannot use operators between '{word_variable_type}' and '{variable_type}': is not supported",
-                    )
-                    return
-
-                variable_value += f"{word_detail.word} "
-
-            elif word_detail.word_type == WordTypeEnum.VARIABLE_NAME:
-                word_symbol = self._symbol_table.get(word_detail.word)
-                if not word_symbol:
-                    self._print_error("ValueError", f"variable '{word_detail.word}' is not defined")
-                    return
-
-                if word_symbol.symbol_type != SymbolTypeEnum.VARIABLE:
-                    raise ValueError(f"'{word_detail.word}' is not a variable")
-
-                word_variable_type = word_symbol.type_detail.variable_type
-                if variable_type and word_variable_type != variable_type:
-                    self._print_error(
-                        "ValueError",
-                        f"Cannot use operators between '{word_variable_type}' and '{variable_type}': is not supported",
-                    )
-                    return
-
-                variable_value = f"{word_symbol.type_detail.variable_value} "
-
-            else:
-                self._print_error("SyntaxError")
-                return
 
-            variable_type = word_variable_type
-            word_must_be_operator = True
+def binary_operation_reader(
+    operator_function: Callable[[Any, Any], Any],
+    read_left: Callable[[], Any],
+    read_right: Callable[[], Any],
+) -> Callable[[], Any]:
+    return lambda: operator_function(read_left(), read_right())
 
-        if variable_type in NUMERIC_TYPES or len(line_detail.line_word_details) > 1:
-            calculated_value = eval(variable_value)
-        else:
-            calculated_value = variable_value
 
-        print(calculated_value)
+# Leaf operands are read in place, by slot or as the constant itself, which saves a reader call per operand
+def slots_operation_reader(
+    operator_function: Callable[[Any, Any], Any],
+    values: list[Any],
+    left_slot: int,
+    right_slot: int,
+) -> Callable[[], Any]:
+    return lambda: operator_function(values[left_slot], values[right_slot])
 
-    def __run_set_variable(self, line_detail: LineActionDetail) -> str:
-        variable_name = line_detail.line_word_details[0].word
 
-        variable_value = ""
-        variable_type = None
+def slot_const_operation_reader(
+    operator_function: Callable[[Any, Any], Any],
+    values: list[Any],
+    left_slot: int,
+    right_value: Any,
+) -> Callable[[], Any]:
+    return lambda: operator_function(values[left_slot], right_value)
+
+
+def reader_slot_operation_reader(
+    operator_function: Callable[[Any, Any], Any],
+    read_left: Callable[[], Any],
+    values: list[Any],
+    right_slot: int,
+) -> Callable[[], Any]:
+    return lambda: operator_function(read_left(), values[right_slot])
+
+
+def reader_const_operation_reader(
+    operator_function: Callable[[Any, Any], Any],
+    read_left: Callable[[], Any],
+    right_value: Any,
+) -> Callable[[], Any]:
+    return lambda: operator_function(read_left(), right_value)
 
-        symbol = self._symbol_table.get(variable_name)
-        symbol_exists = False
-        if symbol:
-            if symbol.symbol_type != SymbolTypeEnum.VARIABLE:
-                self._print_error("TypeError", f"Cannot use '{variable_name}': is not variable")
-                return
 
-            variable_type = symbol.type_detail.variable_type
-            symbol_exists = True
+def input_type_error_message(variable_name: str, input_type: str, variable_type: str) -> str:
+    return f"Cannot assign '{variable_name}' as '{input_type}': is already declared as '{variable_type}'"
 
+
+class Interpreter(Core):
+
+    def __init__(
+        self,
+        input_file_x_path: str | Source,
+        optimization_level: int = 0,
+        quiet: bool = False,
+        lex_workers: int = 1,
+        stats: PhaseStats | None = None,
+        number_input: str | NumberInput | None = None,
+        output_sink: str | OutputSink | None = None,
+    ) -> None:
+        super().__init__(input_file_x_path, optimization_level, quiet, lex_workers, stats)
+        # A path, `-` for stdin, or None to prompt on a terminal and read piped stdin without prompts
+        self.__number_input: NumberInput = open_number_input(number_input)
+        # A flush policy for stdout, or any `OutputSink` such as `CollectingOutputSink`
+        self.__output_sink: OutputSink = open_output_sink(output_sink)
+        # Variable values by symbol slot, sized once the whole program is resolved
+        self.__variable_values: list[Any] = []
+        self.__temp_readers: Dict[int, Callable[[], Any]] = {}
+        # Instruction type of every program statement, only kept to count executions for `stats`
+        self.__statement_types: list[str] = []
+        self.__instruction_compilers: Dict[IRInstructionTypeEnum, Callable[[IRInstruction], Callable[[], None] | None]] = {
+            IRInstructionTypeEnum.ASSIGN: self.__compile_assign,
+            IRInstructionTypeEnum.BINARY_OPERATION: self.__compile_binary_operation,
+            IRInstructionTypeEnum.INPUT: self.__compile_input_int,
+            IRInstructionTypeEnum.OUTPUT: self.__compile_output_variable,
+        }
+
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        stats = self._stats
+        if stats:
+            program = stats.call("build", self.__compile_program, instructions)
         else:
-            symbol = SymbolDetail(
-                symbol_type=SymbolTypeEnum.VARIABLE,
-                symbol_name=variable_name,
-                type_detail=SymbolVariableDetail(variable_type=variable_type, variable_value=variable_value),
-            )
-
-        word_must_be_operator = False
-        for word_detail in line_detail.line_word_details[2:]:
-            word_variable_type = None
-            if word_must_be_operator and word_detail.word_type.name.startswith("OPERATOR_ARITHMETIC"):
-                word_must_be_operator = False
-                variable_value += f"{word_detail.word} "
-                continue
-
-            elif word_detail.word_type == WordTypeEnum.CONST:
-                variable_type_detail: ConstWordTypeDetail = word_detail.detail
-                word_variable_type = variable_type_detail.const_type
-                if variable_type and word_variable_type != variable_type:
-                    self._print_error(
-                        "TypeError",
-                        f"Cannot assign '{variable_name}' as '{word_variable_type}': is already declared as '{variable_type}'",
-                    )
-                    return
-
-                variable_value += f"{word_detail.word} "
-
-            elif word_detail.word_type == WordTypeEnum.VARIABLE_NAME:
-                word_symbol = self._symbol_table.get(word_detail.word)
-                if not word_symbol:
-                    raise ValueError(f"variable '{word_detail.word}' is not defined")
-
-                if word_symbol.symbol_type != SymbolTypeEnum.VARIABLE:
-                    raise ValueError(f"'{word_detail.word}' is not a variable")
-
-                word_variable_type = word_symbol.type_detail.variable_type
-                if variable_type and word_variable_type != variable_type:
-                    self._print_error(
-                        "TypeError",
-                        f"Cannot assign '{variable_name}' as '{word_variable_type}': is already declared as '{variable_type}'",
-                    )
-                    return
-
-                variable_value += f"{word_symbol.type_detail.variable_value} "
-            else:
-                self._print_error("SyntaxError")
-                return
+            program = self.__compile_program(instructions)
 
-            variable_type = word_variable_type
-            word_must_be_operator = True
+        if not self._is_error_thrown:
+            self.__variable_values[:] = [None] * len(self._symbol_table)
+            try:
+                if stats:
+                    stats.call("execute", self.__run_counted, program, stats)
+                else:
+                    self.__run(program)
+            except InputError:
+                # Already reported by the `in` statement, the program can't go on without its number
+                pass
+            finally:
+                self.__output_sink.flush()
+
+        self.__number_input.close()
 
-        if variable_type in NUMERIC_TYPES:
-            calculated_value = eval(variable_value)
+        if self._is_error_thrown:
+            self._print("[!] Code Running Failed")
         else:
-            calculated_value = variable_value
+            self._print("[.] Code Runned Successfully")
+            self._print_optimization_report()
+
+    def __compile_program(self, instructions: Iterator[IRInstruction]) -> list[Callable[[], None]]:
+        # The whole program is kept alive while it is built, so cyclic GC passes would only rescan it
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            program: list[Callable[[], None]] = []
+            for instruction in instructions:
+                statement = self.__instruction_compilers[instruction.instruction_type](instruction)
+                if statement:
+                    program.append(statement)
+                    if self._stats:
+                        self.__statement_types.append(instruction.instruction_type.name)
+
+            return program
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def __run(self, program: list[Callable[[], None]]) -> None:
+        for statement in program:
+            statement()
+
+    def __run_counted(self, program: list[Callable[[], None]], stats: PhaseStats) -> None:
+        executed_statements = stats.group_counters.setdefault("executed_statements", Counter())
+        for statement, statement_type in zip(program, self.__statement_types):
+            statement()
+            executed_statements[statement_type] += 1
+
+    def __operand_reader(self, operand: IROperand) -> Callable[[], Any]:
+        if operand.operand_type == IROperandTypeEnum.TEMP:
+            return self.__temp_readers.pop(operand.index)
+        elif operand.operand_type == IROperandTypeEnum.CONST:
+            return const_reader(operand.value)
+        return variable_reader(self.__variable_values, operand.slot)
+
+    def __compile_store(self, target: IRVariable | IRTemp, evaluate: Callable[[], Any]) -> Callable[[], None] | None:
+        # Temporaries are read once, so their evaluation is inlined where it is used
+        if target.operand_type == IROperandTypeEnum.TEMP:
+            self.__temp_readers[target.index] = evaluate
+            return None
+
+        values = self.__variable_values
+        slot = target.slot
+
+        def run_set_variable() -> None:
+            values[slot] = evaluate()
+
+        return run_set_variable
+
+    def __compile_assign(self, instruction: IRAssign) -> Callable[[], None] | None:
+        return self.__compile_store(instruction.target, self.__operand_reader(instruction.source))
+
+    def __compile_binary_operation(self, instruction: IRBinaryOperation) -> Callable[[], None] | None:
+        operator_function = IR_OPERATOR_FUNCTIONS[instruction.operator]
+        values = self.__variable_values
+        left, right = instruction.left, instruction.right
+        left_type, right_type = left.operand_type, right.operand_type
+        if left_type == IROperandTypeEnum.VARIABLE and right_type == IROperandTypeEnum.VARIABLE:
+            evaluate = slots_operation_reader(operator_function, values, left.slot, right.slot)
+        elif left_type == IROperandTypeEnum.VARIABLE and right_type == IROperandTypeEnum.CONST:
+            evaluate = slot_const_operation_reader(operator_function, values, left.slot, right.value)
+        elif left_type != IROperandTypeEnum.VARIABLE and right_type == IROperandTypeEnum.VARIABLE:
+            evaluate = reader_slot_operation_reader(operator_function, self.__operand_reader(left), values, right.slot)
+        elif left_type != IROperandTypeEnum.VARIABLE and right_type == IROperandTypeEnum.CONST:
+            evaluate = reader_const_operation_reader(operator_function, self.__operand_reader(left), right.value)
+        else:
+            evaluate = binary_operation_reader(operator_function, self.__operand_reader(left), self.__operand_reader(right))
+        return self.__compile_store(instruction.target, evaluate)
+
+    def __compile_input_int(self, instruction: IRInput) -> Callable[[], None]:
+        values = self.__variable_values
+        slot = instruction.target.slot
+        variable_name = self._symbol_table.names[slot]
+        variable_type = self._symbol_table.type_of(slot)
+        line_number = instruction.line_number
+        read_number = self.__number_input.read_number
+
+        def run_input_int() -> None:
+            try:
+                input_value, input_type = read_number()
+            except InputError as ex:
+                self._print_error("InputError", str(ex), line_number=line_number)
+                raise
+            if variable_type != input_type:
+                self._print_error(
+                    "TypeError",
+                    input_type_error_message(variable_name, input_type, variable_type),
+                    line_number=line_number,
+                )
+                return
+
+            values[slot] = input_value
+
+        return run_input_int
+
+    def __compile_output_variable(self, instruction: IROutput) -> Callable[[], None]:
+        evaluate = self.__operand_reader(instruction.source)
+        write = self.__output_sink.write
+
+        def run_output_variable() -> None:
+            write(evaluate())
 
-        symbol.type_detail.variable_value = calculated_value
-        symbol.type_detail.variable_type = variable_type
-        self._symbol_table[variable_name] = symbol
+        return run_output_variable
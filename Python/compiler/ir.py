@@ -0,0 +1,174 @@
+from enum import Enum
+from typing import Any
+
+
+# Operand
+class IROperandTypeEnum(Enum):
+    CONST = 1
+    VARIABLE = 2
+    TEMP = 3
+
+
+class IROperand:
+    __slots__ = ("operand_type", "value_type")
+
+    operand_type: IROperandTypeEnum
+    value_type: str
+
+    def __init__(self, operand_type: IROperandTypeEnum, value_type: str) -> None:
+        self.operand_type = operand_type
+        self.value_type = value_type
+
+
+class IRConst(IROperand):
+    __slots__ = ("value", "word")
+
+    value: Any
+    word: str
+
+    def __init__(self, value_type: str, value: Any, word: str) -> None:
+        super().__init__(IROperandTypeEnum.CONST, value_type)
+        self.value = value
+        self.word = word
+
+    def __repr__(self) -> str:
+        return self.word
+
+
+class IRVariable(IROperand):
+    __slots__ = ("name", "slot")
+
+    name: str
+    slot: int
+
+    def __init__(self, value_type: str, name: str, slot: int) -> None:
+        super().__init__(IROperandTypeEnum.VARIABLE, value_type)
+        self.name = name
+        # Index of the variable in the `SymbolTable`, which backends use instead of the name
+        self.slot = slot
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+# Temporaries only live inside the statement that defines them and are read exactly once
+class IRTemp(IROperand):
+    __slots__ = ("index",)
+
+    index: int
+
+    def __init__(self, value_type: str, index: int) -> None:
+        super().__init__(IROperandTypeEnum.TEMP, value_type)
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"%{self.index}"
+
+
+# Operator
+class IROperatorEnum(Enum):
+    ADDITION = "+"
+    SUBSTRACTION = "-"
+
+
+# Instruction
+class IRInstructionTypeEnum(Enum):
+    ASSIGN = 1
+    BINARY_OPERATION = 2
+    INPUT = 3
+    OUTPUT = 4
+
+
+# Every instruction sets both fields in its own `__init__`, a front end builds one per operator and the
+# call to the base `__init__` showed up in its profile
+class IRInstruction:
+    __slots__ = ("instruction_type", "line_number")
+
+    instruction_type: IRInstructionTypeEnum
+    line_number: int
+
+    def __init__(self, instruction_type: IRInstructionTypeEnum, line_number: int) -> None:
+        self.instruction_type = instruction_type
+        self.line_number = line_number
+
+
+# target = source
+class IRAssign(IRInstruction):
+    __slots__ = ("target", "source", "is_declaration")
+
+    target: IRVariable | IRTemp
+    source: IROperand
+    is_declaration: bool
+
+    def __init__(self, target: IRVariable | IRTemp, source: IROperand, is_declaration: bool, line_number: int) -> None:
+        self.instruction_type = IRInstructionTypeEnum.ASSIGN
+        self.line_number = line_number
+        self.target = target
+        self.source = source
+        self.is_declaration = is_declaration
+
+    def __repr__(self) -> str:
+        return f"{self.target} = {self.source}"
+
+
+# target = left <operator> right
+class IRBinaryOperation(IRInstruction):
+    __slots__ = ("target", "operator", "left", "right", "is_declaration")
+
+    target: IRVariable | IRTemp
+    operator: IROperatorEnum
+    left: IROperand
+    right: IROperand
+    is_declaration: bool
+
+    def __init__(
+        self,
+        target: IRVariable | IRTemp,
+        operator: IROperatorEnum,
+        left: IROperand,
+        right: IROperand,
+        is_declaration: bool,
+        line_number: int,
+    ) -> None:
+        self.instruction_type = IRInstructionTypeEnum.BINARY_OPERATION
+        self.line_number = line_number
+        self.target = target
+        self.operator = operator
+        self.left = left
+        self.right = right
+        self.is_declaration = is_declaration
+
+    def __repr__(self) -> str:
+        return f"{self.target} = {self.left} {self.operator.value} {self.right}"
+
+
+# in target
+class IRInput(IRInstruction):
+    __slots__ = ("target", "is_declaration")
+
+    target: IRVariable
+    is_declaration: bool
+
+    def __init__(self, target: IRVariable, is_declaration: bool, line_number: int) -> None:
+        self.instruction_type = IRInstructionTypeEnum.INPUT
+        self.line_number = line_number
+        self.target = target
+        self.is_declaration = is_declaration
+
+    def __repr__(self) -> str:
+        return f"in {self.target}"
+
+
+# out source
+class IROutput(IRInstruction):
+    __slots__ = ("source",)
+
+    source: IROperand
+
+    def __init__(self, source: IROperand, line_number: int) -> None:
+        self.instruction_type = IRInstructionTypeEnum.OUTPUT
+        self.line_number = line_number
+        self.source = source
+
+    def __repr__(self) -> str:
+        return f"out {self.source}"
@@ -0,0 +1,187 @@
+import re
+from array import array
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator
+from .common import *
+
+REGEX_WORD_SEPARATOR = "\\s" + "".join(re.escape(operator) for operator in OPERATORS.keys())
+REGEX_WORD_END = f"(?=[{REGEX_WORD_SEPARATOR}]|$)"
+
+REGEX_OPERATOR = "|".join(re.escape(operator) for operator in sorted(OPERATORS.keys(), key=len, reverse=True))
+REGEX_COMMENT = re.escape(COMMENT_WORD)
+REGEX_VARIABLE_NAME = "[a-zA-Z_][a-zA-Z0-9_]*"
+REGEX_CONST_STRING = f'"[^{REGEX_WORD_SEPARATOR}]*"'
+REGEX_CONST_INTEGER = "[0-9]+"
+REGEX_CONST_FLOAT = "[0-9]*\\.[0-9]+"
+REGEX_INVALID_WORD = f"[^{REGEX_WORD_SEPARATOR}]+"
+
+# One alternation for every token of the language, each group is the token kind.
+# Leading whitespace is eaten by each match, so every match is a token and
+# `match.lastgroup` is the kind. Words that fit no known kind fall to `INVALID`.
+TOKEN_REGEX = re.compile(
+    "\\s*(?:"
+    + "|".join(
+        (
+            f"(?P<OPERATOR>{REGEX_OPERATOR})",
+            f"(?P<COMMENT>{REGEX_COMMENT}){REGEX_WORD_END}",
+            f"(?P<VARIABLE_NAME>{REGEX_VARIABLE_NAME}){REGEX_WORD_END}",
+            f"(?P<CONST_STRING>{REGEX_CONST_STRING}){REGEX_WORD_END}",
+            f"(?P<CONST_INTEGER>{REGEX_CONST_INTEGER}){REGEX_WORD_END}",
+            f"(?P<CONST_FLOAT>{REGEX_CONST_FLOAT}){REGEX_WORD_END}",
+            f"(?P<INVALID>{REGEX_INVALID_WORD})",
+        )
+    )
+    + ")"
+)
+
+
+def _lex_variable_name(word: str) -> int:
+    return RESERVED_WORD_TOKEN_KINDS.get(word, TokenKindEnum.VARIABLE_NAME)
+
+
+TOKEN_LEXERS: Dict[str, Callable[[str], int | None]] = {
+    "OPERATOR": OPERATOR_TOKEN_KINDS.get,
+    "COMMENT": lambda word: TokenKindEnum.COMMENT,
+    "VARIABLE_NAME": _lex_variable_name,
+    "CONST_STRING": lambda word: TokenKindEnum.CONST_STRING,
+    "CONST_INTEGER": lambda word: TokenKindEnum.CONST_NUM_INT,
+    "CONST_FLOAT": lambda word: TokenKindEnum.CONST_NUM_FLOAT,
+    "INVALID": lambda word: None,
+}
+
+# Line codes besides the `LineActionTypeEnum` values, for lines that failed to lex or to be recognized
+LINE_CODE_INVALID_WORD = 1
+LINE_CODE_UNKNOWN_ACTION = 2
+LINE_ACTION_TYPES: Dict[int, LineActionTypeEnum] = {
+    line_action_type.value: line_action_type for line_action_type in LineActionTypeEnum
+}
+
+# Blocks kept in flight per lexer process, enough to hide the hand-off without reading the whole source ahead
+LEX_BLOCKS_IN_FLIGHT_PER_WORKER = 2
+
+
+# Lexed and recognized lines of one source block, as flat arrays so it crosses process boundaries cheaply.
+# Blank lines are left out; the block text itself is not kept, the caller attaches it again.
+class LexedBlockDetail:
+    __slots__ = (
+        "first_line_number",
+        "kinds",
+        "starts",
+        "ends",
+        "line_numbers",
+        "line_codes",
+        "line_token_begins",
+        "line_token_ends",
+        "invalid_words",
+    )
+
+    first_line_number: int
+    kinds: array
+    starts: array
+    ends: array
+    line_numbers: array
+    line_codes: array
+    line_token_begins: array
+    line_token_ends: array
+    invalid_words: Dict[int, str]
+
+    def __init__(self, first_line_number: int, token_stream: TokenStream) -> None:
+        self.first_line_number = first_line_number
+        self.kinds = token_stream.kinds
+        self.starts = token_stream.starts
+        self.ends = token_stream.ends
+        self.line_numbers = array("I")
+        self.line_codes = array("H")
+        self.line_token_begins = array("I")
+        self.line_token_ends = array("I")
+        self.invalid_words = {}
+
+    def __len__(self) -> int:
+        return len(self.line_numbers)
+
+    def add_line(self, line_number: int, line_code: int, token_begin: int, token_end: int) -> None:
+        self.line_numbers.append(line_number)
+        self.line_codes.append(line_code)
+        self.line_token_begins.append(token_begin)
+        self.line_token_ends.append(token_end)
+
+    def token_stream(self, block_text: str) -> TokenStream:
+        return TokenStream(block_text, self.kinds, self.starts, self.ends)
+
+
+def lex_line(token_stream: TokenStream, line_start: int, line_end: int) -> str | None:
+    # Appends the tokens of one line, returns the first invalid word after dropping the line's tokens
+    source = token_stream.source
+    kinds, starts, ends = token_stream.kinds, token_stream.starts, token_stream.ends
+    first_token = len(kinds)
+    for match in TOKEN_REGEX.finditer(source, line_start, line_end):
+        token_group = match.lastgroup
+        start, end = match.span(token_group)
+
+        token_kind = TOKEN_LEXERS[token_group](source[start:end])
+        if token_kind is None:
+            del kinds[first_token:], starts[first_token:], ends[first_token:]
+            return source[start:end]
+
+        kinds.append(token_kind)
+        starts.append(start)
+        ends.append(end)
+
+    return None
+
+
+def lex_block(first_line_number: int, block_text: str) -> LexedBlockDetail:
+    # Lines are not stripped: the token regex skips surrounding whitespace, and blank lines yield no tokens
+    token_stream = TokenStream(block_text)
+    lexed_block = LexedBlockDetail(first_line_number, token_stream)
+    kinds = token_stream.kinds
+    block_length = len(block_text)
+    line_number = first_line_number
+    line_start = 0
+    while line_start < block_length:
+        line_end = block_text.find("\n", line_start)
+        if line_end == -1:
+            line_end = block_length
+
+        first_token = len(kinds)
+        invalid_word = lex_line(token_stream, line_start, line_end)
+        if invalid_word is not None:
+            lexed_block.add_line(line_number, LINE_CODE_INVALID_WORD, first_token, first_token)
+            lexed_block.invalid_words[line_number] = invalid_word
+        elif len(kinds) > first_token:
+            line_action_type = LINE_ACTIONS.match(token_stream.view(first_token))
+            line_code = line_action_type.value if line_action_type else LINE_CODE_UNKNOWN_ACTION
+            lexed_block.add_line(line_number, line_code, first_token, len(kinds))
+
+        line_start = line_end + 1
+        line_number += 1
+
+    return lexed_block
+
+
+def _lex_block_job(block: tuple[int, str]) -> LexedBlockDetail:
+    return lex_block(*block)
+
+
+def lex_blocks(blocks: Iterable[tuple[int, str]], workers: int = 1) -> Iterator[tuple[LexedBlockDetail, str]]:
+    # Yields every block with its text in source order. With several workers the blocks are lexed in
+    # processes, with a bounded window in flight, so a huge source is never read far ahead of the parser.
+    if workers <= 1:
+        for first_line_number, block_text in blocks:
+            yield lex_block(first_line_number, block_text), block_text
+        return
+
+    # Imported here, the process pool is only started for --lex-workers above 1
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[tuple[Future, str]] = deque()
+        for block in blocks:
+            pending.append((executor.submit(_lex_block_job, block), block[1]))
+            if len(pending) >= workers * LEX_BLOCKS_IN_FLIGHT_PER_WORKER:
+                future, block_text = pending.popleft()
+                yield future.result(), block_text
+
+        while pending:
+            future, block_text = pending.popleft()
+            yield future.result(), block_text
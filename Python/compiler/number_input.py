@@ -0,0 +1,121 @@
+import sys
+from abc import ABC, abstractmethod
+from .common import ConstWordTypeKnownTypesEnum
+from .source import FileSource, STDIN_SOURCE_PATH, Source, StdinSource
+
+INT_TYPE = ConstWordTypeKnownTypesEnum.NUM_INT.value
+FLOAT_TYPE = ConstWordTypeKnownTypesEnum.NUM_FLOAT.value
+# Longer digit strings go through `float()` like any other number, so huge values round the same way
+MAX_EXACT_INT_LENGTH = 15
+
+
+class InputError(Exception):
+    pass
+
+
+def parse_number(text: str) -> tuple[int | float, str]:
+    # Whole and fractional numbers both end up as int, only `inf` and `nan` stay float; `int()` is tried
+    # first because it is much cheaper, and gives the same value for short digit strings
+    if len(text) <= MAX_EXACT_INT_LENGTH:
+        try:
+            return int(text), INT_TYPE
+        except ValueError:
+            pass
+
+    input_value = float(text)
+    try:
+        return int(input_value), INT_TYPE
+    except (OverflowError, ValueError):
+        return input_value, FLOAT_TYPE
+
+
+# Numbers for the `in` statements of a running program
+class NumberInput(ABC):
+    name: str
+
+    @abstractmethod
+    def read_number(self) -> tuple[int | float, str]:
+        raise NotImplementedError("Method `read_number()` isn't implemented")
+
+    def close(self) -> None:
+        pass
+
+
+# Asks on the terminal until a number is entered
+class PromptNumberInput(NumberInput):
+    name = "<stdin>"
+
+    def read_number(self) -> tuple[int | float, str]:
+        while True:
+            try:
+                return parse_number(input(">>> Enter a number: ").strip())
+            except EOFError:
+                raise InputError(f"no numbers left in {self.name}") from None
+            except ValueError:
+                print("[!!!] Enter a valid number.", file=sys.stderr)
+
+
+# One number per line, no prompts. The source is parsed a block at a time, with a single `map(int, ...)`
+# when the whole block is plain integers; blank lines are skipped. A bad line is only reported once the
+# program asks for it, so every number before it is still used.
+class BatchNumberInput(NumberInput):
+
+    def __init__(self, source: Source) -> None:
+        self.name = source.name
+        self.__source = source
+        self.__blocks = source.read_blocks()
+        self.__numbers: list[tuple[int | float, str]] = []
+        self.__index = 0
+        self.__pending_error: InputError | None = None
+
+    def read_number(self) -> tuple[int | float, str]:
+        while self.__index == len(self.__numbers):
+            if self.__pending_error:
+                raise self.__pending_error
+            self.__read_block()
+
+        number = self.__numbers[self.__index]
+        self.__index += 1
+        return number
+
+    def __read_block(self) -> None:
+        self.__index = 0
+        block = next(self.__blocks, None)
+        if block is None:
+            self.__numbers = []
+            self.__pending_error = InputError(f"no numbers left in {self.name}")
+            return
+
+        first_line_number, block_text = block
+        lines = block_text.splitlines()
+        try:
+            self.__numbers = [(value, INT_TYPE) for value in map(int, lines)]
+            if all(len(line) <= MAX_EXACT_INT_LENGTH for line in lines):
+                return
+        except ValueError:
+            pass
+
+        self.__numbers = []
+        for line_number, line in enumerate(lines, first_line_number):
+            text = line.strip()
+            if not text:
+                continue
+            try:
+                self.__numbers.append(parse_number(text))
+            except ValueError:
+                self.__pending_error = InputError(f"'{text}' is not a valid number ({self.name} line {line_number})")
+                return
+
+    def close(self) -> None:
+        self.__source.close()
+
+
+def open_number_input(number_input: str | NumberInput | None = None) -> NumberInput:
+    # None prompts on a terminal and reads piped stdin as a batch; `-` always reads stdin as a batch
+    if isinstance(number_input, NumberInput):
+        return number_input
+    if number_input is None:
+        return PromptNumberInput() if sys.stdin.isatty() else BatchNumberInput(StdinSource())
+    if number_input == STDIN_SOURCE_PATH:
+        return BatchNumberInput(StdinSource())
+    return BatchNumberInput(FileSource(number_input))
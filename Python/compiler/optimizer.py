@@ -0,0 +1,210 @@
+from typing import Any, Dict, Iterable, Iterator
+from .common import *
+from .ir import *
+
+OPTIMIZATION_LEVELS = (0, 1, 2)
+
+# C++ `int` is 32 bits wide, so folding past its range would change what the compiled program prints
+CPP_INT_MIN = -(2**31)
+CPP_INT_MAX = 2**31 - 1
+
+CONST_FOLDERS = {
+    IROperatorEnum.ADDITION: lambda left, right: left + right,
+    IROperatorEnum.SUBSTRACTION: lambda left, right: left - right,
+}
+
+
+class OptimizationReport:
+    __slots__ = ("optimization_level", "instruction_count_before", "instruction_count_after")
+
+    optimization_level: int
+    instruction_count_before: int
+    instruction_count_after: int
+
+    def __init__(self, optimization_level: int, instruction_count_before: int, instruction_count_after: int) -> None:
+        self.optimization_level = optimization_level
+        self.instruction_count_before = instruction_count_before
+        self.instruction_count_after = instruction_count_after
+
+    @property
+    def removed_instruction_count(self) -> int:
+        return self.instruction_count_before - self.instruction_count_after
+
+
+def is_cpp_int_const(operand: IROperand) -> bool:
+    # False for an int constant past the C++ range; stored in an `int` it wraps, so only the variable holds its value
+    return not (
+        operand.operand_type == IROperandTypeEnum.CONST
+        and operand.value_type == ConstWordTypeKnownTypesEnum.NUM_INT.value
+        and not CPP_INT_MIN <= operand.value <= CPP_INT_MAX
+    )
+
+
+def make_const(value_type: str, value: Any) -> IRConst | None:
+    if value_type == ConstWordTypeKnownTypesEnum.STRING.value:
+        word = f'"{value}"'
+    elif value_type == ConstWordTypeKnownTypesEnum.NUM_INT.value:
+        if not CPP_INT_MIN <= value <= CPP_INT_MAX:
+            return None
+        word = str(value)
+    else:
+        word = repr(value)
+
+    return IRConst(value_type=value_type, value=value, word=word)
+
+
+def store(target: IRVariable | IRTemp, source: IROperand, instruction: IRInstruction) -> IRAssign:
+    return IRAssign(target, source, instruction.is_declaration, line_number=instruction.line_number)
+
+
+def fold_constants(instructions: Iterable[IRInstruction], propagate_copies: bool = False) -> Iterator[IRInstruction]:
+    # Forward walk that evaluates operations on constants. With `propagate_copies`, reads of a variable
+    # whose current value is a constant or a copy of another variable are replaced by that value, which
+    # in turn lets more operations fold in the same walk.
+    temp_values: Dict[int, IROperand] = {}
+    variable_values: Dict[str, IROperand] = {}
+
+    def resolve(operand: IROperand) -> IROperand:
+        if operand.operand_type == IROperandTypeEnum.TEMP:
+            return temp_values.pop(operand.index, operand)
+        elif operand.operand_type == IROperandTypeEnum.VARIABLE:
+            return variable_values.get(operand.name, operand)
+        return operand
+
+    def forget(variable: IRVariable) -> None:
+        variable_values.pop(variable.name, None)
+        for name, value in list(variable_values.items()):
+            if value.operand_type == IROperandTypeEnum.VARIABLE and value.name == variable.name:
+                del variable_values[name]
+
+    def remember(target: IRVariable | IRTemp, value: IROperand) -> bool:
+        # Returns True when the store was absorbed into a temporary and needs no instruction
+        if target.operand_type == IROperandTypeEnum.TEMP:
+            temp_values[target.index] = value
+            return True
+
+        forget(target)
+        is_self_copy = value.operand_type == IROperandTypeEnum.VARIABLE and value.name == target.name
+        if propagate_copies and not is_self_copy and is_cpp_int_const(value):
+            variable_values[target.name] = value
+        return False
+
+    for instruction in instructions:
+        if instruction.instruction_type == IRInstructionTypeEnum.BINARY_OPERATION:
+            left = resolve(instruction.left)
+            right = resolve(instruction.right)
+            folded = None
+            if left.operand_type == IROperandTypeEnum.CONST and right.operand_type == IROperandTypeEnum.CONST:
+                folded = make_const(left.value_type, CONST_FOLDERS[instruction.operator](left.value, right.value))
+
+            if folded:
+                if not remember(instruction.target, folded):
+                    yield store(instruction.target, folded, instruction)
+                continue
+
+            if instruction.target.operand_type == IROperandTypeEnum.VARIABLE:
+                forget(instruction.target)
+
+            if left is instruction.left and right is instruction.right:
+                yield instruction
+            else:
+                yield IRBinaryOperation(
+                    target=instruction.target,
+                    operator=instruction.operator,
+                    left=left,
+                    right=right,
+                    is_declaration=instruction.is_declaration,
+                    line_number=instruction.line_number,
+                )
+
+        elif instruction.instruction_type == IRInstructionTypeEnum.ASSIGN:
+            source = resolve(instruction.source)
+            if not remember(instruction.target, source):
+                yield instruction if source is instruction.source else store(instruction.target, source, instruction)
+
+        elif instruction.instruction_type == IRInstructionTypeEnum.INPUT:
+            forget(instruction.target)
+            yield instruction
+
+        elif instruction.instruction_type == IRInstructionTypeEnum.OUTPUT:
+            source = resolve(instruction.source)
+            yield instruction if source is instruction.source else IROutput(source, line_number=instruction.line_number)
+
+
+def eliminate_dead_stores(instructions: Iterable[IRInstruction]) -> list[IRInstruction]:
+    # Backward walk that drops stores nobody reads before the next store. `in` is always kept since it
+    # consumes input. Dropping the declaring store moves the declaration to the next store that is kept.
+    live: set[tuple[IROperandTypeEnum, str | int]] = set()
+    kept: list[IRInstruction] = []
+
+    def key(operand: IROperand) -> tuple[IROperandTypeEnum, str | int]:
+        if operand.operand_type == IROperandTypeEnum.TEMP:
+            return operand.operand_type, operand.index
+        return operand.operand_type, operand.name
+
+    def read(operand: IROperand) -> None:
+        if operand.operand_type != IROperandTypeEnum.CONST:
+            live.add(key(operand))
+
+    for instruction in reversed(list(instructions)):
+        if instruction.instruction_type == IRInstructionTypeEnum.OUTPUT:
+            read(instruction.source)
+            kept.append(instruction)
+            continue
+
+        target_key = key(instruction.target)
+        if instruction.instruction_type != IRInstructionTypeEnum.INPUT and target_key not in live:
+            continue
+
+        live.discard(target_key)
+        if instruction.instruction_type == IRInstructionTypeEnum.ASSIGN:
+            read(instruction.source)
+        elif instruction.instruction_type == IRInstructionTypeEnum.BINARY_OPERATION:
+            read(instruction.left)
+            read(instruction.right)
+        kept.append(instruction)
+
+    kept.reverse()
+    return list(redeclare(kept))
+
+
+def redeclare(instructions: Iterable[IRInstruction]) -> Iterator[IRInstruction]:
+    declared: set[str] = set()
+    for instruction in instructions:
+        if instruction.instruction_type == IRInstructionTypeEnum.OUTPUT:
+            yield instruction
+            continue
+
+        target = instruction.target
+        if target.operand_type == IROperandTypeEnum.TEMP:
+            yield instruction
+            continue
+
+        is_declaration = target.name not in declared
+        declared.add(target.name)
+        if instruction.is_declaration == is_declaration:
+            yield instruction
+        elif instruction.instruction_type == IRInstructionTypeEnum.INPUT:
+            yield IRInput(target, is_declaration, line_number=instruction.line_number)
+        elif instruction.instruction_type == IRInstructionTypeEnum.ASSIGN:
+            yield IRAssign(target, instruction.source, is_declaration, line_number=instruction.line_number)
+        else:
+            yield IRBinaryOperation(
+                target=target,
+                operator=instruction.operator,
+                left=instruction.left,
+                right=instruction.right,
+                is_declaration=is_declaration,
+                line_number=instruction.line_number,
+            )
+
+
+def optimize(instructions: list[IRInstruction], optimization_level: int) -> tuple[list[IRInstruction], OptimizationReport]:
+    optimized = instructions
+    if optimization_level >= 1:
+        optimized = fold_constants(optimized, propagate_copies=optimization_level >= 2)
+    if optimization_level >= 2:
+        optimized = eliminate_dead_stores(optimized)
+
+    optimized = list(optimized)
+    return optimized, OptimizationReport(optimization_level, len(instructions), len(optimized))
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Option values the command line offers before it imports the module of the action that uses them
+
+# Engines that run a program, by their `--engine` name
+ENGINE_NAMES = ("tree", "vm", "pyjit")
+# Requests a `serve` process answers
+REQUEST_ACTIONS = ("compile", "check", "run")
+SERVER_SOCKET_PATH = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+    f"pnu_compiler-{os.getuid()}.sock",
+)
+WATCH_POLL_SECONDS = 0.2
@@ -0,0 +1,81 @@
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, TextIO
+
+FLUSH_AUTO = "auto"
+FLUSH_LINE = "line"
+FLUSH_BLOCK = "block"
+FLUSH_POLICIES = (FLUSH_AUTO, FLUSH_LINE, FLUSH_BLOCK)
+# `out` lines held back by a block-buffered sink before they are written in one go
+OUTPUT_BUFFER_LINES = 8192
+
+
+# Values of the `out` statements of a running program, each written as one line like `print()` would
+class OutputSink(ABC):
+
+    @abstractmethod
+    def write(self, value: Any) -> None:
+        raise NotImplementedError("Method `write(value)` isn't implemented")
+
+    def flush(self) -> None:
+        pass
+
+
+class LineOutputSink(OutputSink):
+
+    def __init__(self, stream: TextIO) -> None:
+        self.__stream = stream
+
+    def write(self, value: Any) -> None:
+        self.__stream.write(f"{value}\n")
+        self.__stream.flush()
+
+
+class BlockOutputSink(OutputSink):
+
+    def __init__(self, stream: TextIO, buffer_lines: int = OUTPUT_BUFFER_LINES) -> None:
+        self.__stream = stream
+        self.__buffer_lines = buffer_lines
+        self.__lines: list[str] = []
+
+    def write(self, value: Any) -> None:
+        lines = self.__lines
+        lines.append(str(value))
+        if len(lines) >= self.__buffer_lines:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.__lines:
+            self.__stream.write("\n".join(self.__lines) + "\n")
+            self.__lines.clear()
+        self.__stream.flush()
+
+
+# Keeps the output in memory, e.g. to run programs from a library or a test
+class CollectingOutputSink(OutputSink):
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def write(self, value: Any) -> None:
+        self.lines.append(str(value))
+
+    @property
+    def text(self) -> str:
+        return "".join(line + "\n" for line in self.lines)
+
+
+def open_output_sink(output_sink: str | OutputSink | None = None, stream: TextIO | None = None) -> OutputSink:
+    # A flush policy or a ready sink; `auto`, like None, flushes every line on a terminal and whole blocks otherwise
+    if isinstance(output_sink, OutputSink):
+        return output_sink
+
+    stream = stream or sys.stdout
+    flush_policy = output_sink or FLUSH_AUTO
+    if flush_policy == FLUSH_AUTO:
+        flush_policy = FLUSH_LINE if stream.isatty() else FLUSH_BLOCK
+    if flush_policy == FLUSH_LINE:
+        return LineOutputSink(stream)
+    elif flush_policy == FLUSH_BLOCK:
+        return BlockOutputSink(stream)
+    raise ValueError(f"unknown flush policy '{flush_policy}', expected one of {', '.join(FLUSH_POLICIES)}")
@@ -0,0 +1,206 @@
+import gc
+import math
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Iterator
+from .cache import CompilationCache, cache_key
+from .common import *
+from .core import Core
+from .interpreter import input_type_error_message
+from .ir import *
+from .number_input import InputError, NumberInput, open_number_input
+from .output_sink import OutputSink, open_output_sink
+from .source import Source
+from .stats import PhaseStats
+
+PYJIT_FUNCTION_NAME = "run_program"
+# Compiled programs kept per process, by the cache key of their generated Python source
+PYJIT_CACHE_ENTRIES = 64
+# Operands inlined into one Python expression; longer chains are split into locals so the CPython
+# compiler never recurses too deep
+PYJIT_MAX_EXPRESSION_OPERANDS = 100
+
+IR_OPERATOR_SYMBOLS: Dict[IROperatorEnum, str] = {
+    IROperatorEnum.ADDITION: "+",
+    IROperatorEnum.SUBSTRACTION: "-",
+}
+
+_code_cache: OrderedDict[str, Any] = OrderedDict()
+_code_cache_lock = threading.Lock()
+
+
+def const_literal(value: Any) -> str:
+    # Python source for a constant; infinities and NaN have no literal of their own
+    if isinstance(value, float) and not math.isfinite(value):
+        return f'float("{value}")'
+    return repr(value)
+
+
+def compile_program_code(python_source: str, cache: CompilationCache | None = None) -> Any:
+    # Looked up in this process first, then in the compilation cache shared with other runs; the compile server
+    # runs requests on threads, so the process cache is only touched under its lock
+    key = cache_key(python_source.encode("utf-8"), engine="pyjit", python=sys.implementation.cache_tag)
+    with _code_cache_lock:
+        code = _code_cache.get(key)
+        if code is not None:
+            _code_cache.move_to_end(key)
+            return code
+
+    code = cache.load_code(key) if cache else None
+    if code is None:
+        code = compile(python_source, "<pyjit>", "exec")
+        if cache:
+            try:
+                cache.store_code(key, code)
+            except OSError:
+                # The cache is only an accelerator, a full disk or a read-only home must not fail the run
+                pass
+
+    with _code_cache_lock:
+        _code_cache[key] = code
+        if len(_code_cache) > PYJIT_CACHE_ENTRIES:
+            _code_cache.popitem(last=False)
+    return code
+
+
+# Writes the whole program as the source of one Python function: variables are its locals, `in` reads
+# through `read_input` and `out` writes through `write`. Temporaries are inlined into the expression that
+# reads them, as the tree interpreter does.
+class PythonSourceGenerator:
+
+    def __init__(self, symbol_table: SymbolTable) -> None:
+        self.__symbol_table = symbol_table
+        self.__temp_expressions: Dict[int, tuple[str, int]] = {}
+        self.__spilled_count = 0
+        self.__lines: list[str] = []
+
+    def generate(self, instructions: Iterator[IRInstruction]) -> str:
+        self.__lines = []
+        for instruction in instructions:
+            if instruction.instruction_type == IRInstructionTypeEnum.ASSIGN:
+                self.__store(instruction.target, self.__operand(instruction.source))
+            elif instruction.instruction_type == IRInstructionTypeEnum.BINARY_OPERATION:
+                self.__store(instruction.target, self.__binary_operation(instruction))
+            elif instruction.instruction_type == IRInstructionTypeEnum.INPUT:
+                slot = instruction.target.slot
+                self.__lines.append(f"    v{slot} = read_input(v{slot}, {slot}, {instruction.line_number})")
+            else:
+                expression, _ = self.__operand(instruction.source)
+                self.__lines.append(f"    write({expression})")
+        # Every variable exists from the start, like the `None` slots of the other engines; the symbol table is
+        # only complete once every instruction was resolved
+        header = [f"def {PYJIT_FUNCTION_NAME}(read_input, write):"]
+        header.extend(f"    v{slot} = None" for slot in range(len(self.__symbol_table)))
+        return "\n".join((*header, *self.__lines, "    return")) + "\n"
+
+    def __operand(self, operand: IROperand) -> tuple[str, int]:
+        # The expression and how many operands it holds
+        if operand.operand_type == IROperandTypeEnum.TEMP:
+            return self.__temp_expressions.pop(operand.index)
+        elif operand.operand_type == IROperandTypeEnum.CONST:
+            return const_literal(operand.value), 1
+        return f"v{operand.slot}", 1
+
+    def __binary_operation(self, instruction: IRBinaryOperation) -> tuple[str, int]:
+        left, left_count = self.__operand(instruction.left)
+        right, right_count = self.__operand(instruction.right)
+        if right_count > 1:
+            right = f"({right})"
+        return f"{left} {IR_OPERATOR_SYMBOLS[instruction.operator]} {right}", left_count + right_count
+
+    def __store(self, target: IRVariable | IRTemp, operand: tuple[str, int]) -> None:
+        expression, operand_count = operand
+        if target.operand_type == IROperandTypeEnum.VARIABLE:
+            self.__lines.append(f"    v{target.slot} = {expression}")
+            return
+
+        if operand_count >= PYJIT_MAX_EXPRESSION_OPERANDS:
+            spilled_name = f"t{self.__spilled_count}"
+            self.__spilled_count += 1
+            self.__lines.append(f"    {spilled_name} = {expression}")
+            operand = (spilled_name, 1)
+        self.__temp_expressions[target.index] = operand
+
+
+# Runs the program as one generated Python function, compiled once and then executed at CPython bytecode speed
+class PythonJit(Core):
+
+    def __init__(
+        self,
+        input_file_x_path: str | Source,
+        optimization_level: int = 0,
+        quiet: bool = False,
+        lex_workers: int = 1,
+        stats: PhaseStats | None = None,
+        number_input: str | NumberInput | None = None,
+        output_sink: str | OutputSink | None = None,
+        cache: CompilationCache | None = None,
+    ) -> None:
+        super().__init__(input_file_x_path, optimization_level, quiet, lex_workers, stats)
+        self.__number_input: NumberInput = open_number_input(number_input)
+        self.__output_sink: OutputSink = open_output_sink(output_sink)
+        # Shares compiled functions between runs; without it they are only kept for this process
+        self.__cache = cache
+        self.python_source = ""
+
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        stats = self._stats
+        if stats:
+            self.python_source = stats.call("build", self.__generate, instructions)
+        else:
+            self.python_source = self.__generate(instructions)
+
+        if not self._is_error_thrown:
+            if stats:
+                code = stats.call("jit", compile_program_code, self.python_source, self.__cache)
+            else:
+                code = compile_program_code(self.python_source, self.__cache)
+            namespace: Dict[str, Any] = {}
+            exec(code, namespace)
+            run_program = namespace[PYJIT_FUNCTION_NAME]
+            try:
+                if stats:
+                    stats.call("execute", run_program, self.__read_input, self.__output_sink.write)
+                else:
+                    run_program(self.__read_input, self.__output_sink.write)
+            except InputError:
+                # Already reported by the `in` statement, the program can't go on without its number
+                pass
+            finally:
+                self.__output_sink.flush()
+
+        self.__number_input.close()
+
+        if self._is_error_thrown:
+            self._print("[!] Code Running Failed")
+        else:
+            self._print("[.] Code Runned Successfully")
+            self._print_optimization_report()
+
+    def __generate(self, instructions: Iterator[IRInstruction]) -> str:
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return PythonSourceGenerator(self._symbol_table).generate(instructions)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def __read_input(self, current_value: Any, slot: int, line_number: int) -> Any:
+        # The new value of the variable, or its current one when the number has another type
+        try:
+            input_value, input_type = self.__number_input.read_number()
+        except InputError as ex:
+            self._print_error("InputError", str(ex), line_number=line_number)
+            raise
+
+        variable_type = self._symbol_table.type_of(slot)
+        if variable_type != input_type:
+            self._print_error(
+                "TypeError",
+                input_type_error_message(self._symbol_table.names[slot], input_type, variable_type),
+                line_number=line_number,
+            )
+            return current_value
+        return input_value
@@ -0,0 +1,303 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator
+from .cache import cache_key
+from .checker import Checker
+from .common import ErrorDetail
+from .compiler import CPP_EPILOGUE, CPP_PROLOGUE, Compiler, save_file_atomically
+from .interpreter import Interpreter
+from .ir import IRInstruction
+from .number_input import BatchNumberInput
+from .optimizer import OPTIMIZATION_LEVELS
+from .options import SERVER_SOCKET_PATH
+from .output_sink import CollectingOutputSink
+from .pyjit import PythonJit
+from .source import Source, StringSource
+from .vm import VirtualMachine
+
+# Compile and check responses kept per source and options, the least recently used go first
+SERVER_CACHE_ENTRIES = 1024
+SERVER_ENGINES = {"tree": Interpreter, "vm": VirtualMachine, "pyjit": PythonJit}
+REQUEST_SOURCE_NAME = "<request>"
+
+
+class ServerRequestError(Exception):
+    pass
+
+
+# Keeps the C++ in memory instead of saving it to a file
+class MemoryCompiler(Compiler):
+
+    def __init__(self, input_file_x_path: str | Source, optimization_level: int = 0) -> None:
+        super().__init__(input_file_x_path, "", optimization_level, quiet=True)
+        self.cpp_code: str | None = None
+
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        cpp_body = self._compile_statements(instructions)
+        if not self._is_error_thrown:
+            self.cpp_code = CPP_PROLOGUE + cpp_body + CPP_EPILOGUE
+
+
+def normalize_request(request: dict) -> dict:
+    # The request with every option checked and defaulted once, so the handlers and the cache key see the same
+    # values; anything the JSON may hold besides them is a request error, never an exception in the handler
+    source_text = request.get("source")
+    if not isinstance(source_text, str):
+        raise ServerRequestError("'source' must be the program text")
+
+    name = request.get("name") or REQUEST_SOURCE_NAME
+    if not isinstance(name, str):
+        raise ServerRequestError("'name' must be a string")
+
+    optimization_level = request.get("optimization_level", 0)
+    # `True` is an int too, and `"2"` would be a cache entry of its own
+    if type(optimization_level) is not int or optimization_level not in OPTIMIZATION_LEVELS:
+        levels = ", ".join(map(str, OPTIMIZATION_LEVELS))
+        raise ServerRequestError(f"'optimization_level' must be one of {levels}")
+
+    engine = request.get("engine", "tree")
+    if not isinstance(engine, str) or engine not in SERVER_ENGINES:
+        raise ServerRequestError(f"'engine' must be one of {', '.join(SERVER_ENGINES)}")
+
+    number_input_text = request.get("input") or ""
+    if not isinstance(number_input_text, str):
+        raise ServerRequestError("'input' must be the numbers as text")
+
+    return {
+        **request,
+        "name": name,
+        "optimization_level": optimization_level,
+        "engine": engine,
+        "input": number_input_text,
+    }
+
+
+def request_source(request: dict) -> StringSource:
+    return StringSource(request["source"], name=request["name"])
+
+
+def handle_compile(request: dict) -> dict:
+    compiler = MemoryCompiler(request_source(request), optimization_level=request["optimization_level"])
+    compiler.start()
+    return {"errors": [error.as_dict() for error in compiler.errors], "cpp": compiler.cpp_code}
+
+
+def handle_check(request: dict) -> dict:
+    checker = Checker(request_source(request))
+    checker.start()
+    return {"errors": [error.as_dict() for error in checker.errors]}
+
+
+def handle_run(request: dict) -> dict:
+    output_sink = CollectingOutputSink()
+    interpreter = SERVER_ENGINES[request["engine"]](
+        request_source(request),
+        optimization_level=request["optimization_level"],
+        quiet=True,
+        number_input=BatchNumberInput(StringSource(request["input"], name="<input>")),
+        output_sink=output_sink,
+    )
+    interpreter.start()
+    return {"errors": [error.as_dict() for error in interpreter.errors], "output": output_sink.text}
+
+
+REQUEST_HANDLERS: Dict[str, Callable[[dict], dict]] = {
+    "compile": handle_compile,
+    "check": handle_check,
+    "run": handle_run,
+}
+# Actions whose response depends on nothing but the source and the options
+CACHED_ACTIONS = ("compile", "check")
+
+
+# Responses of the compile and check requests, shared by all connections
+class ResponseCache:
+
+    def __init__(self, max_entries: int = SERVER_CACHE_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.__responses: OrderedDict[str, dict] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self.__lock:
+            response = self.__responses.get(key)
+            if response is not None:
+                self.__responses.move_to_end(key)
+            return response
+
+    def put(self, key: str, response: dict) -> None:
+        with self.__lock:
+            self.__responses[key] = response
+            self.__responses.move_to_end(key)
+            while len(self.__responses) > self.max_entries:
+                self.__responses.popitem(last=False)
+
+
+def handle_request(request: Any, cache: ResponseCache | None = None) -> dict:
+    # Every request builds its own `Core`, so symbol tables never leak between requests or threads
+    started_at = time.perf_counter()
+    try:
+        if not isinstance(request, dict):
+            raise ServerRequestError("a request must be a JSON object")
+
+        action = request.get("action")
+        handler = REQUEST_HANDLERS.get(action) if isinstance(action, str) else None
+        if handler is None:
+            raise ServerRequestError(f"'action' must be one of {', '.join(REQUEST_HANDLERS)}")
+        request = normalize_request(request)
+
+        key = None
+        if cache is not None and action in CACHED_ACTIONS:
+            key = cache_key(
+                request["source"].encode(),
+                action=action,
+                name=request["name"],
+                optimization_level=request["optimization_level"],
+            )
+            response = cache.get(key)
+            if response is not None:
+                return {**response, "is_cached": True, "elapsed_seconds": time.perf_counter() - started_at}
+
+        response = handler(request)
+        response["ok"] = not response["errors"]
+        if key is not None:
+            cache.put(key, response)
+
+    except (ServerRequestError, ValueError, OSError) as ex:
+        response = {"ok": False, "request_error": str(ex)}
+
+    return {**response, "is_cached": False, "elapsed_seconds": time.perf_counter() - started_at}
+
+
+class ServerRequestHandler(socketserver.StreamRequestHandler):
+
+    # One JSON request per line and one JSON response line back, for as long as the client keeps the connection
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as ex:
+                response = {"ok": False, "request_error": f"invalid JSON: {ex}"}
+            else:
+                response = handle_request(request, self.server.response_cache)
+
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class CompileServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str = SERVER_SOCKET_PATH) -> None:
+        self.socket_path = socket_path
+        self.response_cache = ResponseCache()
+        remove_stale_socket(socket_path)
+        super().__init__(socket_path, ServerRequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    # A socket file nobody answers on was left behind by a killed server
+    if not os.path.exists(socket_path):
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.remove(socket_path)
+    else:
+        raise OSError(f"a server is already listening on '{socket_path}'")
+    finally:
+        probe.close()
+
+
+def serve(socket_path: str = SERVER_SOCKET_PATH) -> None:
+    server = CompileServer(socket_path)
+    # A service manager stops the server with SIGTERM, which must remove the socket just like Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"[.] Serving on '{socket_path}', press Ctrl+C to stop", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# Keeps one connection open, so a client sending many requests pays for the connect once
+class ServerClient:
+
+    def __init__(self, socket_path: str = SERVER_SOCKET_PATH) -> None:
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.connect(socket_path)
+        self.__reader = self.__socket.makefile("rb")
+
+    def request(self, request: dict) -> dict:
+        self.__socket.sendall(json.dumps(request).encode() + b"\n")
+        response_line = self.__reader.readline()
+        if not response_line:
+            raise ConnectionError("the server closed the connection")
+        return json.loads(response_line)
+
+    def close(self) -> None:
+        self.__reader.close()
+        self.__socket.close()
+
+
+def client(
+    action: str,
+    input_file_x_path: str,
+    output_file_cpp_path: str | None = None,
+    socket_path: str = SERVER_SOCKET_PATH,
+    number_input_path: str | None = None,
+    engine: str = "tree",
+    optimization_level: int = 0,
+) -> int:
+    # Program output and C++ go to stdout, or the C++ to `output_file_cpp_path`; errors go to stderr
+    with open(input_file_x_path, "r") as input_file:
+        request = {
+            "action": action,
+            "source": input_file.read(),
+            "name": input_file_x_path,
+            "optimization_level": optimization_level,
+            "engine": engine,
+        }
+    if number_input_path:
+        with open(number_input_path, "r") as number_input_file:
+            request["input"] = number_input_file.read()
+
+    server_client = ServerClient(socket_path)
+    try:
+        response = server_client.request(request)
+    finally:
+        server_client.close()
+
+    if "request_error" in response:
+        print(f"Error request to '{socket_path}' : {response['request_error']}", file=sys.stderr)
+        return 1
+
+    sys.stdout.write(response.get("output") or "")
+    cpp_code = response.get("cpp")
+    if cpp_code is not None:
+        if output_file_cpp_path:
+            save_file_atomically(output_file_cpp_path, lambda output_file: output_file.write(cpp_code))
+        else:
+            sys.stdout.write(cpp_code)
+
+    for error in response["errors"]:
+        print(ErrorDetail(**error), file=sys.stderr)
+    return 0 if response["ok"] else 1
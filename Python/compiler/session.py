@@ -0,0 +1,182 @@
+import asyncio
+import sys
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+from .core import Core
+from .ir import IRInstruction
+from .number_input import InputError, parse_number
+from .output_sink import CollectingOutputSink, OutputSink
+from .source import Source
+from .vm import BytecodeCompiler, BytecodeProgramDetail, BytecodeRunner
+
+# Instructions a session runs before it lets the other sessions in, even without an `in`
+SESSION_YIELD_INSTRUCTIONS = 10_000
+
+
+# Numbers for the `in` statements of a session, one per line; waiting for one lets other sessions run
+class AsyncNumberInput(ABC):
+    name: str
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.__line_number = 0
+
+    @abstractmethod
+    async def _read_line(self) -> str | None:
+        raise NotImplementedError("Method `_read_line()` isn't implemented")
+
+    async def read_number(self) -> tuple[int | float, str]:
+        while True:
+            line = await self._read_line()
+            if line is None:
+                raise InputError(f"no numbers left in {self.name}")
+
+            self.__line_number += 1
+            text = line.strip()
+            if not text:
+                continue
+            try:
+                return parse_number(text)
+            except ValueError:
+                raise InputError(f"'{text}' is not a valid number ({self.name} line {self.__line_number})") from None
+
+
+# Fed by the caller: `feed()` adds lines as they arrive and `close()` marks the end of the input
+class QueueNumberInput(AsyncNumberInput):
+
+    def __init__(self, name: str = "<session>") -> None:
+        super().__init__(name)
+        self.__lines: asyncio.Queue[str | None] = asyncio.Queue()
+
+    def feed(self, text: str) -> None:
+        for line in text.splitlines():
+            self.__lines.put_nowait(line)
+
+    def close(self) -> None:
+        self.__lines.put_nowait(None)
+
+    async def _read_line(self) -> str | None:
+        return await self.__lines.get()
+
+
+class StreamNumberInput(AsyncNumberInput):
+
+    def __init__(self, reader: asyncio.StreamReader, name: str = "<stream>") -> None:
+        super().__init__(name)
+        self.__reader = reader
+
+    async def _read_line(self) -> str | None:
+        line = await self.__reader.readline()
+        return line.decode() if line else None
+
+
+# `out` lines to an asyncio stream, drained whenever the session yields
+class StreamOutputSink(OutputSink):
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.__writer = writer
+
+    def write(self, value) -> None:
+        self.__writer.write(f"{value}\n".encode())
+
+    async def drain(self) -> None:
+        await self.__writer.drain()
+
+
+class SessionLimitError(Exception):
+    pass
+
+
+# One program run inside an event loop. The front end and the bytecode compile run at once in `run()`;
+# execution then yields at every `in` while it waits for its number, and every `SESSION_YIELD_INSTRUCTIONS`
+# instructions. `max_instructions` and `timeout_seconds` stop a session that runs too long, with an error
+# on the line it was running.
+class Session(Core):
+
+    def __init__(
+        self,
+        input_file_x_path: str | Source,
+        number_input: AsyncNumberInput | None = None,
+        output_sink: OutputSink | None = None,
+        optimization_level: int = 0,
+        max_instructions: int | None = None,
+        timeout_seconds: float | None = None,
+    ) -> None:
+        super().__init__(input_file_x_path, optimization_level, quiet=True)
+        self.number_input: AsyncNumberInput = number_input or QueueNumberInput()
+        self.output_sink: OutputSink = output_sink or CollectingOutputSink()
+        self.__max_instructions = max_instructions
+        self.__timeout_seconds = timeout_seconds
+        self.__program: BytecodeProgramDetail | None = None
+        # Instruction the session stopped at, kept up to date at every point it may be cancelled
+        self.__instruction_index = 0
+        self.executed_instructions = 0
+
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        self.__program = BytecodeCompiler().compile(instructions)
+
+    async def run(self) -> bool:
+        # True when the program ran to its end without errors
+        self.start()
+        if self._is_error_thrown:
+            return False
+
+        try:
+            await asyncio.wait_for(self.__execute(self.__program), self.__timeout_seconds)
+        except asyncio.TimeoutError:
+            self.__report_stop("TimeoutError", f"ran longer than {self.__timeout_seconds}s")
+        except SessionLimitError as ex:
+            self.__report_stop("LimitError", str(ex))
+        except InputError as ex:
+            self.__report_stop("InputError", str(ex))
+        finally:
+            self.output_sink.flush()
+            if isinstance(self.output_sink, StreamOutputSink):
+                await self.output_sink.drain()
+
+        return not self._is_error_thrown
+
+    def __report_stop(self, error_type: str, message_detail: str) -> None:
+        line_numbers = self.__program.line_numbers
+        line_number = line_numbers[self.__instruction_index] if self.__instruction_index < len(line_numbers) else None
+        self._print_error(error_type, message_detail, line_number=line_number)
+
+    async def __execute(self, program: BytecodeProgramDetail) -> None:
+        runner = BytecodeRunner(program, self.output_sink.write)
+        stream_output_sink = self.output_sink if isinstance(self.output_sink, StreamOutputSink) else None
+        max_instructions = sys.maxsize if self.__max_instructions is None else self.__max_instructions
+        while not runner.is_finished:
+            remaining_instructions = max_instructions - runner.instruction_index
+            if remaining_instructions <= 0:
+                raise SessionLimitError(f"ran more than {max_instructions} instructions")
+
+            input_instruction = runner.run(min(SESSION_YIELD_INSTRUCTIONS, remaining_instructions))
+            self.__instruction_index = runner.instruction_index
+            self.executed_instructions = runner.instruction_index
+            if input_instruction is None:
+                if stream_output_sink:
+                    await stream_output_sink.drain()
+                await asyncio.sleep(0)
+                continue
+
+            # Still on the `in` while its number is awaited
+            self.__instruction_index -= 1
+            register, line_number = input_instruction
+            input_value, input_type = await self.number_input.read_number()
+            type_error_message = runner.store_input(register, input_value, input_type)
+            if type_error_message:
+                self._print_error("TypeError", type_error_message, line_number=line_number)
+            self.__instruction_index = runner.instruction_index
+
+
+async def run_sessions(sessions: Iterable[Session], concurrency: int | None = None) -> list[bool]:
+    # Runs every session in this event loop, at most `concurrency` at a time
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def run_session(session: Session) -> bool:
+        if semaphore is None:
+            return await session.run()
+        async with semaphore:
+            return await session.run()
+
+    return await asyncio.gather(*(run_session(session) for session in sessions))
@@ -0,0 +1,110 @@
+import io
+import sys
+from abc import ABC, abstractmethod
+from typing import Iterator, TextIO
+
+SOURCE_CHUNK_SIZE = 1 << 20
+STDIN_SOURCE_PATH = "-"
+ARTIFACT_SUFFIX = ".xc"
+
+
+# Program text read as line-aligned blocks, each paired with the number of its first line
+class Source(ABC):
+    name: str
+
+    @abstractmethod
+    def read_blocks(self) -> Iterator[tuple[int, str]]:
+        raise NotImplementedError("Method `read_blocks()` isn't implemented")
+
+    def close(self) -> None:
+        pass
+
+
+class TextFileSource(Source):
+
+    def __init__(self, text_file: TextIO, name: str, chunk_size: int = SOURCE_CHUNK_SIZE, close_file: bool = True) -> None:
+        self.name = name
+        self.__text_file = text_file
+        self.__chunk_size = chunk_size
+        self.__close_file = close_file
+
+    def read_blocks(self) -> Iterator[tuple[int, str]]:
+        line_number = 1
+        pending_parts: list[str] = []
+        while True:
+            chunk = self.__text_file.read(self.__chunk_size)
+            if not chunk:
+                break
+
+            last_line_end = chunk.rfind("\n")
+            if last_line_end == -1:
+                pending_parts.append(chunk)
+                continue
+
+            block_end = last_line_end + 1
+            if pending_parts:
+                pending_parts.append(chunk[:block_end])
+                block = "".join(pending_parts)
+            else:
+                block = chunk[:block_end]
+            pending_parts = [chunk[block_end:]] if block_end < len(chunk) else []
+
+            yield line_number, block
+            line_number += block.count("\n")
+
+        if pending_parts:
+            yield line_number, "".join(pending_parts)
+
+    def close(self) -> None:
+        if self.__close_file:
+            self.__text_file.close()
+
+
+class FileSource(TextFileSource):
+
+    def __init__(self, path: str, chunk_size: int = SOURCE_CHUNK_SIZE) -> None:
+        super().__init__(open(path, "r"), name=path, chunk_size=chunk_size)
+
+
+class StdinSource(TextFileSource):
+
+    def __init__(self, chunk_size: int = SOURCE_CHUNK_SIZE) -> None:
+        super().__init__(sys.stdin, name="<stdin>", chunk_size=chunk_size, close_file=False)
+
+
+# Raw file contents already in memory, decoded like `FileSource` decodes the file
+class BytesSource(TextFileSource):
+
+    def __init__(self, data: bytes, name: str = "<bytes>", chunk_size: int = SOURCE_CHUNK_SIZE) -> None:
+        super().__init__(io.TextIOWrapper(io.BytesIO(data)), name=name, chunk_size=chunk_size)
+
+
+def read_source_bytes(path: str) -> bytes:
+    if path == STDIN_SOURCE_PATH:
+        return sys.stdin.buffer.read()
+    with open(path, "rb") as source_file:
+        return source_file.read()
+
+
+class StringSource(Source):
+
+    def __init__(self, text: str, name: str = "<string>") -> None:
+        self.name = name
+        self.__text = text
+
+    def read_blocks(self) -> Iterator[tuple[int, str]]:
+        if self.__text:
+            yield 1, self.__text
+
+
+def open_source(source: str | Source) -> Source:
+    if isinstance(source, Source):
+        return source
+    if source == STDIN_SOURCE_PATH:
+        return StdinSource()
+    if source.endswith(ARTIFACT_SUFFIX):
+        # Imported here, the artifact format itself builds on `Source`
+        from .artifact import ArtifactSource
+
+        return ArtifactSource(source)
+    return FileSource(source)
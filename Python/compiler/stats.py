@@ -0,0 +1,82 @@
+import json
+import sys
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+# Wall time per phase and counters of one run. Phases nest, e.g. pulling a line out of the parser runs
+# the lexer and the reader, so every phase is charged its own time only, without the phases it called.
+# Nothing here runs unless a `PhaseStats` is passed in, so a run without `--stats` pays no cost.
+class PhaseStats:
+
+    def __init__(self) -> None:
+        self.phase_seconds: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.group_counters: Dict[str, Counter] = {}
+        # Open phases as [phase, start time, time spent in nested phases]
+        self.__open_phases: list[list] = []
+        self.__start_time = time.perf_counter()
+        self.__end_time: float | None = None
+
+    def begin(self, phase: str) -> None:
+        self.__open_phases.append([phase, time.perf_counter(), 0.0])
+
+    def end(self) -> None:
+        phase, start_time, nested_seconds = self.__open_phases.pop()
+        elapsed = time.perf_counter() - start_time
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + elapsed - nested_seconds
+        if self.__open_phases:
+            self.__open_phases[-1][2] += elapsed
+
+    def call(self, phase: str, function: Callable[..., T], *args) -> T:
+        self.begin(phase)
+        try:
+            return function(*args)
+        finally:
+            self.end()
+
+    def timed(self, phase: str, items: Iterable[T]) -> Iterator[T]:
+        # Charges the time spent producing every item to `phase`
+        iterator = iter(items)
+        while True:
+            self.begin(phase)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.end()
+            yield item
+
+    def counted(self, group: str, items: Iterable[T], key: Callable[[T], str]) -> Iterator[T]:
+        counter = self.group_counters.setdefault(group, Counter())
+        for item in items:
+            counter[key(item)] += 1
+            yield item
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def finish(self) -> None:
+        self.__end_time = time.perf_counter()
+
+    def as_dict(self) -> dict:
+        total_seconds = (self.__end_time or time.perf_counter()) - self.__start_time
+        return {
+            "total_seconds": round(total_seconds, 6),
+            "phase_seconds": {phase: round(seconds, 6) for phase, seconds in self.phase_seconds.items()},
+            "counters": dict(self.counters),
+            **{group: dict(counter) for group, counter in self.group_counters.items()},
+        }
+
+    def write_json(self, path: str | None = None) -> None:
+        # Without a path the report goes to stderr, away from the program's own output
+        report_text = json.dumps(self.as_dict(), indent=2)
+        if path:
+            with open(path, "w") as report_file:
+                report_file.write(report_text + "\n")
+        else:
+            print(report_text, file=sys.stderr)
@@ -0,0 +1,301 @@
+import csv
+import gc
+import sys
+from typing import Any, Iterator
+from .common import *
+from .core import Core
+from .interpreter import IR_OPERATOR_FUNCTIONS, input_type_error_message
+from .ir import *
+from .number_input import INT_TYPE, InputError, parse_number
+from .pyjit import PYJIT_FUNCTION_NAME, PythonSourceGenerator, compile_program_code
+from .source import Source
+from .stats import PhaseStats
+
+try:
+    import numpy
+except ImportError:
+    # Only batch runs need numpy
+    numpy = None
+
+NUMPY_AVAILABLE = numpy is not None
+NUMPY_TABLE_SUFFIX = ".npy"
+# Cell of an `out` a row stopped before
+MISSING_OUTPUT = ""
+# Finite inputs below this become int64 exactly as `parse_number` turns them into ints
+VECTOR_INT_LIMIT = float(1 << 63)
+
+
+def load_input_rows(path: str) -> Any:
+    # A numeric (rows, columns) array, or the cells of every row as text when they aren't all numbers
+    if path.endswith(NUMPY_TABLE_SUFFIX):
+        table = numpy.load(path, allow_pickle=False)
+        if table.ndim == 1:
+            table = table.reshape(-1, 1)
+        elif table.ndim != 2:
+            raise ValueError(f"'{path}' holds a {table.ndim}-dimensional array, expected rows of numbers")
+        if table.dtype.kind in "iuf":
+            return table
+        return table.astype(str).tolist()
+
+    try:
+        return numpy.loadtxt(path, delimiter=",", dtype=numpy.float64, ndmin=2)
+    except ValueError:
+        with open(path, "r", newline="") as rows_file:
+            return [[cell.strip() for cell in row] for row in csv.reader(rows_file) if row]
+
+
+def vector_input_column(table: Any, column_index: int) -> Any:
+    # The int64 values `parse_number` gives for one column, or None when some row can't be vectorized
+    if not hasattr(table, "dtype") or column_index >= table.shape[1]:
+        return None
+    column = table[:, column_index].astype(numpy.float64)
+    if not numpy.all(numpy.abs(column) < VECTOR_INT_LIMIT):
+        # Infinities and NaN stay float and don't fit an int variable, NaN fails the comparison too
+        return None
+    return numpy.trunc(column).astype(numpy.int64)
+
+
+def _is_int_operand(value: Any) -> bool:
+    if isinstance(value, numpy.ndarray):
+        return value.dtype == numpy.int64
+    return isinstance(value, int)
+
+
+def _as_object(value: Any) -> Any:
+    return value.astype(object) if isinstance(value, numpy.ndarray) else value
+
+
+def vector_operation(operator: IROperatorEnum, left: Any, right: Any) -> Any:
+    # `left op right` for every row; int64 columns that would overflow are redone with Python ints
+    operator_function = IR_OPERATOR_FUNCTIONS[operator]
+    if not isinstance(left, numpy.ndarray) and not isinstance(right, numpy.ndarray):
+        return operator_function(left, right)
+
+    try:
+        with numpy.errstate(all="ignore"):
+            result = operator_function(left, right)
+    except OverflowError:
+        # A Python int beyond int64 next to an int64 column
+        return operator_function(_as_object(left), _as_object(right))
+
+    if _is_int_operand(left) and _is_int_operand(right) and result.dtype == numpy.int64:
+        if operator == IROperatorEnum.ADDITION:
+            overflow = ((left ^ result) & (right ^ result)) < 0
+        else:
+            overflow = ((left ^ right) & (left ^ result)) < 0
+        if numpy.any(overflow):
+            return operator_function(_as_object(left), _as_object(right))
+    return result
+
+
+def output_column(value: Any, row_count: int) -> Any:
+    if isinstance(value, numpy.ndarray):
+        return value
+    try:
+        return numpy.full(row_count, value)
+    except OverflowError:
+        return numpy.full(row_count, value, dtype=object)
+
+
+def write_output_columns(path: str | None, columns: list[Any], row_count: int) -> None:
+    # One row per input row and one column per `out`; a `.npy` path gets an array, anything else CSV
+    if path is not None and path.endswith(NUMPY_TABLE_SUFFIX):
+        dtypes = {column.dtype for column in columns}
+        if len(dtypes) == 1 and next(iter(dtypes)).kind in "if":
+            table = numpy.column_stack(columns) if columns else numpy.empty((row_count, 0))
+        else:
+            texts = [[str(value) for value in column.tolist()] for column in columns]
+            table = numpy.array(texts).T if columns else numpy.empty((row_count, 0), dtype=str)
+        numpy.save(path, table, allow_pickle=False)
+        return
+
+    # `str()` of every value, as an `out` prints it; the csv module would write None as an empty cell
+    rows = zip(*(map(str, column.tolist()) for column in columns)) if columns else ([] for _ in range(row_count))
+    if path is None:
+        csv.writer(sys.stdout, lineterminator="\n").writerows(rows)
+        return
+    with open(path, "w", newline="") as output_file:
+        csv.writer(output_file, lineterminator="\n").writerows(rows)
+
+
+# Runs the program once over a whole table of inputs: the n-th `in` reads the n-th column, and every `out`
+# becomes an output column. Assignments and arithmetic are evaluated a column at a time with numpy; values
+# that don't depend on the input, strings among them, stay plain Python values. When the table can't be
+# vectorized exactly (a number that isn't a whole int64, a missing column, an `in` into a variable that isn't
+# an int), every row runs on its own through the pyjit function instead, with the same output.
+class VectorizedRunner(Core):
+
+    def __init__(
+        self,
+        input_file_x_path: str | Source,
+        input_rows_path: str,
+        output_path: str | None = None,
+        optimization_level: int = 0,
+        quiet: bool = False,
+        lex_workers: int = 1,
+        stats: PhaseStats | None = None,
+    ) -> None:
+        super().__init__(input_file_x_path, optimization_level, quiet, lex_workers, stats)
+        self.__input_rows_path = input_rows_path
+        self.__output_path = output_path
+        self.row_count = 0
+        self.is_vectorized = False
+        self.output_columns: list[Any] = []
+
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        stats = self._stats
+        instructions = list(instructions)
+        if self._is_error_thrown:
+            self._print("[!] Code Running Failed")
+            return
+
+        try:
+            if stats:
+                table = stats.call("load_rows", load_input_rows, self.__input_rows_path)
+            else:
+                table = load_input_rows(self.__input_rows_path)
+        except (OSError, ValueError) as ex:
+            self._is_error_thrown = True
+            error = ErrorDetail("IOError", f"Cannot read rows from '{self.__input_rows_path}': {ex}")
+            self._errors.append(error)
+            self._print(str(error))
+            self._print("[!] Code Running Failed")
+            return
+        self.row_count = len(table)
+
+        if stats:
+            self.output_columns = stats.call("execute", self.__run, instructions, table)
+            stats.call("write", write_output_columns, self.__output_path, self.output_columns, self.row_count)
+            stats.count("rows", self.row_count)
+        else:
+            self.output_columns = self.__run(instructions, table)
+            write_output_columns(self.__output_path, self.output_columns, self.row_count)
+
+        if self._is_error_thrown:
+            self._print("[!] Code Running Failed")
+        else:
+            mode = "vectorized" if self.is_vectorized else "row by row"
+            self._print(f"[.] Code Runned Successfully over {self.row_count} rows, {mode}")
+            self._print_optimization_report()
+
+    def __run(self, instructions: list[IRInstruction], table: Any) -> list[Any]:
+        input_columns = self.__input_columns(instructions, table)
+        if input_columns is not None:
+            try:
+                output_columns = self.__run_vectorized(instructions, input_columns)
+                self.is_vectorized = True
+                return output_columns
+            except ArithmeticError:
+                pass
+        return self.__run_rows(instructions, table)
+
+    def __input_columns(self, instructions: list[IRInstruction], table: Any) -> list[Any] | None:
+        input_columns = []
+        for instruction in instructions:
+            if instruction.instruction_type != IRInstructionTypeEnum.INPUT:
+                continue
+            if self._symbol_table.type_of(instruction.target.slot) != INT_TYPE:
+                # Every number is an int by then, so each row would only report a type error
+                return None
+            column = vector_input_column(table, len(input_columns))
+            if column is None:
+                return None
+            input_columns.append(column)
+        return input_columns
+
+    def __run_vectorized(self, instructions: list[IRInstruction], input_columns: list[Any]) -> list[Any]:
+        values: list[Any] = [None] * len(self._symbol_table)
+        temps: Dict[int, Any] = {}
+        output_columns = []
+        next_input_column = iter(input_columns)
+
+        def read(operand: IROperand) -> Any:
+            if operand.operand_type == IROperandTypeEnum.TEMP:
+                return temps.pop(operand.index)
+            elif operand.operand_type == IROperandTypeEnum.CONST:
+                return operand.value
+            return values[operand.slot]
+
+        def store(target: IRVariable | IRTemp, value: Any) -> None:
+            if target.operand_type == IROperandTypeEnum.TEMP:
+                temps[target.index] = value
+            else:
+                values[target.slot] = value
+
+        for instruction in instructions:
+            instruction_type = instruction.instruction_type
+            if instruction_type == IRInstructionTypeEnum.ASSIGN:
+                store(instruction.target, read(instruction.source))
+            elif instruction_type == IRInstructionTypeEnum.BINARY_OPERATION:
+                left = read(instruction.left)
+                store(instruction.target, vector_operation(instruction.operator, left, read(instruction.right)))
+            elif instruction_type == IRInstructionTypeEnum.INPUT:
+                values[instruction.target.slot] = next(next_input_column)
+            else:
+                output_columns.append(output_column(read(instruction.source), self.row_count))
+        return output_columns
+
+    def __run_rows(self, instructions: list[IRInstruction], table: Any) -> list[Any]:
+        # Each row through the same compiled function, its cells as the numbers of the `in` statements
+        output_count = sum(instruction.instruction_type == IRInstructionTypeEnum.OUTPUT for instruction in instructions)
+        namespace: Dict[str, Any] = {}
+        exec(compile_program_code(PythonSourceGenerator(self._symbol_table).generate(iter(instructions))), namespace)
+        run_program = namespace[PYJIT_FUNCTION_NAME]
+        symbol_table = self._symbol_table
+
+        rows = table.tolist() if hasattr(table, "tolist") else table
+        output_rows = []
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for row_number, row in enumerate(rows, 1):
+                cells = iter(row)
+                outputs: list[Any] = []
+
+                def read_input(current_value: Any, slot: int, line_number: int) -> Any:
+                    try:
+                        text = str(next(cells))
+                    except StopIteration:
+                        error = InputError(f"no numbers left in row {row_number}")
+                        self._print_error("InputError", str(error), line_number=line_number)
+                        raise error from None
+                    try:
+                        input_value, input_type = parse_number(text)
+                    except ValueError:
+                        error = InputError(f"'{text}' is not a valid number (row {row_number})")
+                        self._print_error("InputError", str(error), line_number=line_number)
+                        raise error from None
+
+                    variable_type = symbol_table.type_of(slot)
+                    if variable_type != input_type:
+                        self._print_error(
+                            "TypeError",
+                            f"{input_type_error_message(symbol_table.names[slot], input_type, variable_type)} "
+                            f"(row {row_number})",
+                            line_number=line_number,
+                        )
+                        return current_value
+                    return input_value
+
+                try:
+                    run_program(read_input, outputs.append)
+                except InputError:
+                    # Already reported, the row can't go on without its number
+                    pass
+                except Exception as ex:
+                    # Such as arithmetic on a variable an `in` left unset; only this row stops
+                    self._is_error_thrown = True
+                    self._errors.append(ErrorDetail("SystemError", f"{ex} (row {row_number})"))
+                    self._print(f"System Error!{ex} (row {row_number})")
+                outputs.extend([MISSING_OUTPUT] * (output_count - len(outputs)))
+                output_rows.append(outputs)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        output_columns = []
+        for column in zip(*output_rows) if output_rows else ([] for _ in range(output_count)):
+            output_column_values = numpy.empty(len(column), dtype=object)
+            output_column_values[:] = column
+            output_columns.append(output_column_values)
+        return output_columns
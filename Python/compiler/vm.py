@@ -0,0 +1,256 @@
+import gc
+from array import array
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator
+from .common import *
+from .core import Core
+from .interpreter import input_type_error_message
+from .ir import *
+from .number_input import InputError, NumberInput, open_number_input
+from .output_sink import OutputSink, open_output_sink
+from .source import Source
+from .stats import PhaseStats
+
+# Every instruction is four slots: opcode and three operands, unused ones are 0
+INSTRUCTION_WIDTH = 4
+
+OP_MOVE = 0  # MOVE target, source
+OP_ADD = 1  # ADD target, left, right
+OP_SUBTRACT = 2  # SUBTRACT target, left, right
+OP_INPUT = 3  # INPUT target, line number
+OP_OUTPUT = 4  # OUTPUT source
+
+OPCODE_NAMES = ("MOVE", "ADD", "SUBTRACT", "INPUT", "OUTPUT")
+
+IR_OPERATOR_OPCODES: Dict[IROperatorEnum, int] = {
+    IROperatorEnum.ADDITION: OP_ADD,
+    IROperatorEnum.SUBSTRACTION: OP_SUBTRACT,
+}
+
+
+# Register machine for the IR. Every operand lives in a register: each variable and each distinct constant
+# gets its own slot, constants are filled in before the run, and statement-local temporaries share a slot
+# per temporary index. Operands are resolved to slots while compiling, so running is a loop over a flat
+# code array with no name lookups.
+class BytecodeProgramDetail:
+    __slots__ = ("code", "line_numbers", "registers", "register_names", "register_types")
+
+    code: array
+    line_numbers: array
+    registers: list[Any]
+    register_names: list[str | None]
+    register_types: list[str | None]
+
+    def __init__(
+        self,
+        code: array,
+        line_numbers: array,
+        registers: list[Any],
+        register_names: list[str | None],
+        register_types: list[str | None],
+    ) -> None:
+        self.code = code
+        # Source line of every instruction, for errors raised while running
+        self.line_numbers = line_numbers
+        # Initial register values: constants set, variables and temporaries None
+        self.registers = registers
+        # Variable names and declared types per register, for runtime error messages
+        self.register_names = register_names
+        self.register_types = register_types
+
+    def disassemble(self) -> Iterator[str]:
+        code = self.code
+        for index in range(0, len(code), INSTRUCTION_WIDTH):
+            opcode, first, second, third = code[index : index + INSTRUCTION_WIDTH]
+            yield f"{index // INSTRUCTION_WIDTH:>6} {OPCODE_NAMES[opcode]:<9} {first} {second} {third}"
+
+
+class BytecodeCompiler:
+
+    def __init__(self) -> None:
+        self.__code = array("I")
+        self.__line_numbers = array("I")
+        self.__registers: list[Any] = []
+        self.__register_names: list[str | None] = []
+        self.__register_types: list[str | None] = []
+        # Register of every variable, by symbol slot
+        self.__variable_registers: list[int | None] = []
+        self.__const_slots: Dict[tuple[str, Any], int] = {}
+        self.__temp_slots: Dict[int, int] = {}
+
+    def compile(self, instructions: Iterator[IRInstruction]) -> BytecodeProgramDetail:
+        code = self.__code
+        operand_slot = self.__operand_slot
+        for instruction in instructions:
+            self.__line_numbers.append(instruction.line_number)
+            instruction_type = instruction.instruction_type
+            if instruction_type == IRInstructionTypeEnum.BINARY_OPERATION:
+                code.extend(
+                    (
+                        IR_OPERATOR_OPCODES[instruction.operator],
+                        operand_slot(instruction.target),
+                        operand_slot(instruction.left),
+                        operand_slot(instruction.right),
+                    )
+                )
+            elif instruction_type == IRInstructionTypeEnum.ASSIGN:
+                code.extend((OP_MOVE, operand_slot(instruction.target), operand_slot(instruction.source), 0))
+            elif instruction_type == IRInstructionTypeEnum.OUTPUT:
+                code.extend((OP_OUTPUT, operand_slot(instruction.source), 0, 0))
+            elif instruction_type == IRInstructionTypeEnum.INPUT:
+                code.extend((OP_INPUT, operand_slot(instruction.target), instruction.line_number, 0))
+
+        return BytecodeProgramDetail(
+            code,
+            self.__line_numbers,
+            self.__registers,
+            self.__register_names,
+            self.__register_types,
+        )
+
+    def __new_slot(self, value: Any = None, name: str | None = None, value_type: str | None = None) -> int:
+        self.__registers.append(value)
+        self.__register_names.append(name)
+        self.__register_types.append(value_type)
+        return len(self.__registers) - 1
+
+    def __operand_slot(self, operand: IROperand) -> int:
+        if operand.operand_type == IROperandTypeEnum.VARIABLE:
+            variable_registers = self.__variable_registers
+            if operand.slot >= len(variable_registers):
+                variable_registers.extend([None] * (operand.slot + 1 - len(variable_registers)))
+            slot = variable_registers[operand.slot]
+            if slot is None:
+                slot = variable_registers[operand.slot] = self.__new_slot(None, operand.name, operand.value_type)
+            return slot
+        elif operand.operand_type == IROperandTypeEnum.CONST:
+            # `1` and `1.0` are equal keys in a dict, so the type is part of the key
+            const_key = (operand.value_type, operand.value)
+            slot = self.__const_slots.get(const_key)
+            if slot is None:
+                slot = self.__const_slots[const_key] = self.__new_slot(operand.value)
+            return slot
+
+        slot = self.__temp_slots.get(operand.index)
+        if slot is None:
+            slot = self.__temp_slots[operand.index] = self.__new_slot()
+        return slot
+
+
+# Runs the code of a program up to its next `in`, whose number is left to the caller: the VM reads it at once,
+# a session waits for it without blocking the other sessions. Instructions only run forward, so the index of
+# the next one is also how many ran.
+class BytecodeRunner:
+
+    def __init__(self, program: BytecodeProgramDetail, write: Callable[[Any], None]) -> None:
+        self.program = program
+        self.registers = list(program.registers)
+        self.instruction_index = 0
+        self.instruction_count = len(program.code) // INSTRUCTION_WIDTH
+        code = iter(program.code)
+        self.__instructions = zip(code, code, code, code)
+        self.__write = write
+
+    @property
+    def is_finished(self) -> bool:
+        return self.instruction_index >= self.instruction_count
+
+    def run(self, max_instructions: int | None = None) -> tuple[int, int] | None:
+        # The target register and line number of the `in` it stopped after, None when the program ended or
+        # `max_instructions` instructions ran
+        registers = self.registers
+        write = self.__write
+        instructions = self.__instructions
+        if max_instructions is not None:
+            instructions = islice(instructions, max_instructions)
+        index = self.instruction_index - 1
+        for index, (opcode, first, second, third) in enumerate(instructions, self.instruction_index):
+            if opcode == OP_ADD:
+                registers[first] = registers[second] + registers[third]
+            elif opcode == OP_MOVE:
+                registers[first] = registers[second]
+            elif opcode == OP_SUBTRACT:
+                registers[first] = registers[second] - registers[third]
+            elif opcode == OP_OUTPUT:
+                write(registers[first])
+            else:
+                self.instruction_index = index + 1
+                return first, second
+        self.instruction_index = index + 1
+        return None
+
+    def store_input(self, register: int, input_value: int | float, input_type: str) -> str | None:
+        # The type error message when the number doesn't fit the variable, which then keeps its value
+        register_type = self.program.register_types[register]
+        if register_type != input_type:
+            return input_type_error_message(self.program.register_names[register], input_type, register_type)
+        self.registers[register] = input_value
+        return None
+
+
+class VirtualMachine(Core):
+
+    def __init__(
+        self,
+        input_file_x_path: str | Source,
+        optimization_level: int = 0,
+        quiet: bool = False,
+        lex_workers: int = 1,
+        stats: PhaseStats | None = None,
+        number_input: str | NumberInput | None = None,
+        output_sink: str | OutputSink | None = None,
+    ) -> None:
+        super().__init__(input_file_x_path, optimization_level, quiet, lex_workers, stats)
+        self.__number_input: NumberInput = open_number_input(number_input)
+        self.__output_sink: OutputSink = open_output_sink(output_sink)
+
+    def _handle(self, instructions: Iterator[IRInstruction]):
+        stats = self._stats
+        if stats:
+            program = stats.call("build", self.__compile_program, instructions)
+        else:
+            program = self.__compile_program(instructions)
+
+        if not self._is_error_thrown:
+            try:
+                if stats:
+                    stats.call("execute", self.__run, program)
+                else:
+                    self.__run(program)
+            finally:
+                self.__output_sink.flush()
+
+        self.__number_input.close()
+
+        if self._is_error_thrown:
+            self._print("[!] Code Running Failed")
+        else:
+            self._print("[.] Code Runned Successfully")
+            self._print_optimization_report()
+
+    def __compile_program(self, instructions: Iterator[IRInstruction]) -> BytecodeProgramDetail:
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return BytecodeCompiler().compile(instructions)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def __run(self, program: BytecodeProgramDetail) -> None:
+        runner = BytecodeRunner(program, self.__output_sink.write)
+        read_number = self.__number_input.read_number
+        while True:
+            input_instruction = runner.run()
+            if input_instruction is None:
+                return
+            register, line_number = input_instruction
+            try:
+                input_value, input_type = read_number()
+            except InputError as ex:
+                # The program can't go on without its number
+                self._print_error("InputError", str(ex), line_number=line_number)
+                return
+            type_error_message = runner.store_input(register, input_value, input_type)
+            if type_error_message:
+                self._print_error("TypeError", type_error_message, line_number=line_number)
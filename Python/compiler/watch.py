@@ -0,0 +1,204 @@
+import os
+import time
+from typing import Dict
+from .common import ErrorDetail, TokenStream
+from .compiler import CPP_EPILOGUE, CPP_PROLOGUE, Compiler, save_file_atomically
+from .lexer import LexedBlockDetail, lex_block
+from .options import WATCH_POLL_SECONDS
+from .source import StringSource
+
+
+# A line's tokens, as line `index` of a lexed block; -1 for a line without tokens
+class LexedLineDetail:
+    __slots__ = ("lexed_block", "token_stream", "index")
+
+    lexed_block: LexedBlockDetail
+    token_stream: TokenStream
+    index: int
+
+    def __init__(self, lexed_block: LexedBlockDetail, token_stream: TokenStream, index: int) -> None:
+        self.lexed_block = lexed_block
+        self.token_stream = token_stream
+        self.index = index
+
+
+# What one source line produced in the last build
+class LineStateDetail:
+    __slots__ = ("text", "lexed_line", "declaration_count", "cpp_code", "errors")
+
+    text: str
+    lexed_line: LexedLineDetail
+    declaration_count: int
+    cpp_code: str
+    errors: list[ErrorDetail]
+
+    def __init__(
+        self,
+        text: str,
+        lexed_line: LexedLineDetail,
+        declaration_count: int,
+        cpp_code: str,
+        errors: list[ErrorDetail],
+    ) -> None:
+        self.text = text
+        self.lexed_line = lexed_line
+        # Declarations made before this line, where the symbol table is rolled back to when it is rebuilt
+        self.declaration_count = declaration_count
+        self.cpp_code = cpp_code
+        self.errors = errors
+
+
+def lex_lines(texts: list[str]) -> Dict[str, LexedLineDetail]:
+    # Lexes the lines as one block, which costs far less than a block per line
+    block_text = "\n".join(texts)
+    lexed_block = lex_block(1, block_text)
+    token_stream = lexed_block.token_stream(block_text)
+    line_indexes = {line_number: index for index, line_number in enumerate(lexed_block.line_numbers)}
+    return {
+        text: LexedLineDetail(lexed_block, token_stream, line_indexes.get(line_number, -1))
+        for line_number, text in enumerate(texts, start=1)
+    }
+
+
+class RebuildReportDetail:
+    __slots__ = ("line_count", "relexed_line_count", "resolved_line_count", "elapsed_seconds", "is_saved")
+
+    line_count: int
+    relexed_line_count: int
+    resolved_line_count: int
+    elapsed_seconds: float
+    is_saved: bool
+
+    def __init__(
+        self,
+        line_count: int,
+        relexed_line_count: int,
+        resolved_line_count: int,
+        elapsed_seconds: float,
+        is_saved: bool,
+    ) -> None:
+        self.line_count = line_count
+        self.relexed_line_count = relexed_line_count
+        self.resolved_line_count = resolved_line_count
+        self.elapsed_seconds = elapsed_seconds
+        self.is_saved = is_saved
+
+    def __str__(self) -> str:
+        status = "Recompiled" if self.is_saved else "Recompile failed"
+        return (
+            f"[.] {status} in {self.elapsed_seconds * 1000:.1f} ms: {self.line_count} lines, "
+            f"{self.relexed_line_count} re-lexed, {self.resolved_line_count} re-resolved"
+        )
+
+
+# Compiles the same file again and again, keeping every line's tokens, declarations and C++ from the last
+# build. Only changed lines are lexed again, and resolution restarts at the first changed line, since the
+# symbol table at a line depends on every line before it. Optimizations work across statements, so this
+# always compiles as -O0.
+class IncrementalCompiler(Compiler):
+
+    def __init__(self, input_file_x_path: str, output_file_cpp_path: str) -> None:
+        super().__init__(StringSource("", name=input_file_x_path), output_file_cpp_path, quiet=True)
+        self.__input_file_x_path = input_file_x_path
+        self.__output_file_cpp_path = output_file_cpp_path
+        self.__lines: list[LineStateDetail] = []
+
+    def rebuild(self) -> RebuildReportDetail:
+        start_time = time.perf_counter()
+        with open(self.__input_file_x_path, "r") as input_file:
+            texts = input_file.read().split("\n")
+
+        first_changed_index = 0
+        common_line_count = min(len(texts), len(self.__lines))
+        lines = self.__lines
+        while first_changed_index < common_line_count and texts[first_changed_index] == lines[first_changed_index].text:
+            first_changed_index += 1
+
+        # Lines after the edit are usually the same text, possibly moved, so their tokens are reused
+        lexed_lines: Dict[str, LexedLineDetail] = {
+            line_state.text: line_state.lexed_line for line_state in self.__lines[first_changed_index:]
+        }
+        new_texts = list(dict.fromkeys(text for text in texts[first_changed_index:] if text not in lexed_lines))
+        lexed_lines.update(lex_lines(new_texts))
+
+        if first_changed_index < len(self.__lines):
+            self._rollback_declarations(self.__lines[first_changed_index].declaration_count)
+        del self.__lines[first_changed_index:]
+
+        for index in range(first_changed_index, len(texts)):
+            text = texts[index]
+            self.__lines.append(self.__build_line(index + 1, text, lexed_lines[text]))
+
+        self._errors = [error for line_state in self.__lines for error in line_state.errors]
+        self._is_error_thrown = bool(self._errors)
+        is_saved = not self._is_error_thrown and self.__save()
+
+        return RebuildReportDetail(
+            line_count=len(texts),
+            relexed_line_count=len(new_texts),
+            resolved_line_count=len(texts) - first_changed_index,
+            elapsed_seconds=time.perf_counter() - start_time,
+            is_saved=is_saved,
+        )
+
+    def __build_line(self, line_number: int, text: str, lexed_line: LexedLineDetail) -> LineStateDetail:
+        declaration_count = len(self._symbol_table)
+        self._errors = []
+        cpp_code = ""
+        if lexed_line.index != -1:
+            line_detail = self._parse_lexed_line(
+                lexed_line.lexed_block,
+                lexed_line.token_stream,
+                lexed_line.index,
+                line_number=line_number,
+            )
+            instructions = self._lower_line(line_detail) if line_detail else None
+            if instructions:
+                cpp_code = self._compile_statements(instructions)
+
+        return LineStateDetail(text, lexed_line, declaration_count, cpp_code, self._errors)
+
+    def __save(self) -> bool:
+        def write_cpp(output_file):
+            output_file.write(CPP_PROLOGUE)
+            for line_state in self.__lines:
+                output_file.write(line_state.cpp_code)
+            output_file.write(CPP_EPILOGUE)
+
+        try:
+            save_file_atomically(self.__output_file_cpp_path, write_cpp)
+            return True
+        except OSError as ex:
+            self._errors.append(ErrorDetail("IOError", f"Cannot save file to '{self.__output_file_cpp_path}': {ex}"))
+            return False
+
+
+def file_signature(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def watch(input_file_x_path: str, output_file_cpp_path: str, poll_seconds: float = WATCH_POLL_SECONDS) -> None:
+    # Polls the file's mtime and size, and rebuilds on every change until interrupted
+    compiler = IncrementalCompiler(input_file_x_path, output_file_cpp_path)
+    last_signature = None
+    print(f"[.] Watching '{input_file_x_path}', press Ctrl+C to stop")
+    try:
+        while True:
+            signature = file_signature(input_file_x_path)
+            if signature is not None and signature != last_signature:
+                last_signature = signature
+                try:
+                    report = compiler.rebuild()
+                except OSError as ex:
+                    print(f"Error read file '{input_file_x_path}' : {ex}")
+                else:
+                    for error in compiler.errors:
+                        print(error)
+                    print(report)
+            time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,66 @@
+import pytest
+
+from benchmarks.generator import ProgramGenerator, ProgramOptionsDetail
+from compiler import CollectingOutputSink, Interpreter, StringSource, VirtualMachine
+from compiler.number_input import BatchNumberInput
+from compiler.optimizer import OPTIMIZATION_LEVELS
+from compiler.pyjit import PythonJit
+
+ENGINES = {"tree": Interpreter, "vm": VirtualMachine, "pyjit": PythonJit}
+
+
+def generated_program(seed: int) -> tuple[str, str]:
+    options = ProgramOptionsDetail(line_count=400, expression_length=6, input_density=0.05, output_density=0.2, seed=seed)
+    generator = ProgramGenerator(options)
+    program_text = "".join(line + "\n" for line in generator.lines())
+    return program_text, "3\n" * generator.input_count
+
+
+# Program text and the numbers its `in` lines read
+PROGRAMS = {
+    "chains": (
+        'a = 2\nb = 3+2-1\nc = "Hi"+"o"+"n"\nd = 2.2\ne = a + b + 3 - 1\nout e+8+69\nout c + "!"\nout d + 0.5 - d\n',
+        "",
+    ),
+    "copies": ("a = 5\nb = a\na = 7\nout b\nb = b + a\nout b\nc = b - a - a\nout c\n", ""),
+    "input": ("in a\nb = a + 1\nout b\nin a\nout a + b\nc = 4\nc = c + a\nout c\n", "3\n-8\n"),
+    "big_int": ("a = 3000000000\nout a\nb = a + 1\nout b\nc = 2147483647 + 1\nout c\nd = 5\nout d + 2\n", ""),
+    "generated": generated_program(seed=7),
+}
+
+
+def run_engine(engine_name: str, program_text: str, numbers_text: str, optimization_level: int) -> tuple[str, list[str]]:
+    output_sink = CollectingOutputSink()
+    engine = ENGINES[engine_name](
+        StringSource(program_text, name="<test>"),
+        optimization_level=optimization_level,
+        quiet=True,
+        number_input=BatchNumberInput(StringSource(numbers_text, name="<input>")),
+        output_sink=output_sink,
+    )
+    engine.start()
+    return output_sink.text, [str(error) for error in engine.errors]
+
+
+@pytest.mark.parametrize("optimization_level", OPTIMIZATION_LEVELS)
+@pytest.mark.parametrize("program_name", PROGRAMS)
+def test_engines_agree(program_name: str, optimization_level: int):
+    program_text, numbers_text = PROGRAMS[program_name]
+    expected_output, expected_errors = run_engine("tree", program_text, numbers_text, optimization_level=0)
+    assert expected_output
+    assert not expected_errors
+
+    for engine_name in ENGINES:
+        output, errors = run_engine(engine_name, program_text, numbers_text, optimization_level)
+        assert (engine_name, output, errors) == (engine_name, expected_output, expected_errors)
+
+
+@pytest.mark.parametrize("optimization_level", OPTIMIZATION_LEVELS)
+def test_engines_agree_on_errors(optimization_level: int):
+    program_text = "a = 1\nout a\nb = a + c\nin a\n"
+    outcomes = {
+        engine_name: run_engine(engine_name, program_text, "", optimization_level) for engine_name in ENGINES
+    }
+
+    assert all(errors for _, errors in outcomes.values())
+    assert len({(output, tuple(errors)) for output, errors in outcomes.values()}) == 1
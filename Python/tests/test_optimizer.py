@@ -0,0 +1,63 @@
+from compiler.common import ConstWordTypeKnownTypesEnum
+from compiler.ir import *
+from compiler.optimizer import CPP_INT_MAX, CPP_INT_MIN, fold_constants
+
+INT_TYPE = ConstWordTypeKnownTypesEnum.NUM_INT.value
+
+
+def int_const(value: int) -> IRConst:
+    return IRConst(INT_TYPE, value, str(value))
+
+
+def variable(name: str, slot: int) -> IRVariable:
+    return IRVariable(INT_TYPE, name, slot)
+
+
+def test_folds_within_the_int_range():
+    a = variable("a", 0)
+    instructions = [IRBinaryOperation(a, IROperatorEnum.ADDITION, int_const(CPP_INT_MAX - 1), int_const(1), True, 1)]
+
+    [folded] = fold_constants(instructions)
+
+    assert folded.instruction_type == IRInstructionTypeEnum.ASSIGN
+    assert folded.source.value == CPP_INT_MAX
+
+
+def test_keeps_operations_past_the_int_range():
+    a = variable("a", 0)
+    b = variable("b", 1)
+    overflow = IRBinaryOperation(a, IROperatorEnum.ADDITION, int_const(CPP_INT_MAX), int_const(1), True, 1)
+    underflow = IRBinaryOperation(b, IROperatorEnum.SUBSTRACTION, int_const(CPP_INT_MIN), int_const(1), True, 2)
+
+    assert list(fold_constants([overflow, underflow], propagate_copies=True)) == [overflow, underflow]
+
+
+def test_does_not_propagate_constants_past_the_int_range():
+    a = variable("a", 0)
+    b = variable("b", 1)
+    instructions = [
+        IRAssign(a, int_const(3_000_000_000), True, 1),
+        IROutput(a, 2),
+        IRBinaryOperation(b, IROperatorEnum.ADDITION, a, int_const(1), True, 3),
+    ]
+
+    assign, output, operation = fold_constants(instructions, propagate_copies=True)
+
+    # `a` wraps once stored in a C++ `int`, so every read must go through the variable
+    assert output.source is a
+    assert operation.left is a
+    assert operation.instruction_type == IRInstructionTypeEnum.BINARY_OPERATION
+
+
+def test_propagates_constants_within_the_int_range():
+    a = variable("a", 0)
+    b = variable("b", 1)
+    instructions = [
+        IRAssign(a, int_const(5), True, 1),
+        IRBinaryOperation(b, IROperatorEnum.ADDITION, a, int_const(1), True, 2),
+        IROutput(b, 3),
+    ]
+
+    folded = list(fold_constants(instructions, propagate_copies=True))
+
+    assert folded[-1].source.value == 6
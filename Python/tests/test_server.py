@@ -0,0 +1,41 @@
+import pytest
+
+from compiler.server import ResponseCache, handle_request
+
+SOURCE = "a = 2\nout a + 3\n"
+
+MALFORMED_REQUESTS = {
+    "not an object": ["compile", SOURCE],
+    "no action": {"source": SOURCE},
+    "unknown action": {"action": "link", "source": SOURCE},
+    "unhashable action": {"action": ["compile"], "source": SOURCE},
+    "no source": {"action": "compile"},
+    "source not text": {"action": "check", "source": 12},
+    "name not text": {"action": "compile", "source": SOURCE, "name": ["a.x"]},
+    "level as text": {"action": "compile", "source": SOURCE, "optimization_level": "2"},
+    "level as bool": {"action": "compile", "source": SOURCE, "optimization_level": True},
+    "unknown level": {"action": "compile", "source": SOURCE, "optimization_level": 3},
+    "unknown engine": {"action": "run", "source": SOURCE, "engine": "gpu"},
+    "unhashable engine": {"action": "run", "source": SOURCE, "engine": {"name": "vm"}},
+    "input not text": {"action": "run", "source": SOURCE, "input": [3]},
+}
+
+
+@pytest.mark.parametrize("request_name", MALFORMED_REQUESTS)
+def test_malformed_request_is_a_request_error(request_name: str):
+    response = handle_request(MALFORMED_REQUESTS[request_name], ResponseCache())
+
+    assert response["ok"] is False
+    assert response["request_error"]
+
+
+def test_valid_requests():
+    cache = ResponseCache()
+
+    compile_response = handle_request({"action": "compile", "source": SOURCE, "optimization_level": 2}, cache)
+    run_response = handle_request({"action": "run", "source": SOURCE, "engine": "vm"}, cache)
+
+    assert compile_response["ok"] is True
+    assert "request_error" not in compile_response
+    assert run_response["ok"] is True
+    assert run_response["output"] == "5\n"